@@ -5,28 +5,49 @@ import com.example.sensorsvr.model.SensorData
 import kotlin.math.pow
 import kotlin.math.sqrt
 
-fun calculateConfusionMatrix(results: List<PredictionResultData>): Map<Pair<String, String>, Int> {
-    val matrix = mutableMapOf<Pair<String, String>, Int>()
+data class ClassMetrics(
+    val precision: Double,
+    val recall: Double,
+    val f1: Double,
+    val support: Int
+)
 
-    for (res in results) {
-        val key = Pair(res.trueLabel, res.predictedLabel)
-        matrix[key] = matrix.getOrDefault(key, 0) + 1
-    }
-    return matrix
-}
+fun calculateConfusionMatrix(results: List<PredictionResultData>): Map<Pair<String, String>, Int> =
+    results.groupingBy { Pair(it.trueLabel, it.predictedLabel) }.eachCount()
 
 fun calculateAccuracy(results: List<PredictionResultData>): Double {
     require(results.isNotEmpty()) { "Cannot calculate accuracy for empty results" }
     return results.count { it.trueLabel == it.predictedLabel }.toDouble() / results.size
 }
 
-fun calculatePrecision(label: String, results: List<PredictionResultData>): Double {
-    val tp = results.count { it.predictedLabel == label && it.trueLabel == label }
-    val fp = results.count { it.predictedLabel == label && it.trueLabel != label }
+// Precision, recall, F1 and support for every label in a single pass over the results
+fun calculateClassMetrics(results: List<PredictionResultData>): Map<String, ClassMetrics> {
+    val tp = mutableMapOf<String, Int>()
+    val predicted = mutableMapOf<String, Int>()
+    val actual = mutableMapOf<String, Int>()
+
+    for (res in results) {
+        predicted[res.predictedLabel] = predicted.getOrDefault(res.predictedLabel, 0) + 1
+        actual[res.trueLabel] = actual.getOrDefault(res.trueLabel, 0) + 1
+        if (res.trueLabel == res.predictedLabel) {
+            tp[res.trueLabel] = tp.getOrDefault(res.trueLabel, 0) + 1
+        }
+    }
 
-    return if (tp + fp == 0) 0.0 else tp.toDouble() / (tp + fp)
+    return (predicted.keys + actual.keys).associateWith { label ->
+        val hits = tp.getOrDefault(label, 0)
+        val p = predicted.getOrDefault(label, 0)
+        val a = actual.getOrDefault(label, 0)
+        val precision = if (p == 0) 0.0 else hits.toDouble() / p
+        val recall = if (a == 0) 0.0 else hits.toDouble() / a
+        val f1 = if (precision + recall == 0.0) 0.0 else 2 * precision * recall / (precision + recall)
+        ClassMetrics(precision, recall, f1, a)
+    }
 }
 
+fun calculatePrecision(label: String, results: List<PredictionResultData>): Double =
+    calculateClassMetrics(results)[label]?.precision ?: 0.0
+
 fun analyzeMovement(data: List<SensorData>): String {
     if (data.size < 20) return "Insufficient data for analysis"
 
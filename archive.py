@@ -0,0 +1,288 @@
+import argparse
+import lzma
+import os
+import struct
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from session import SENSOR_TYPES, Session
+
+# Posnetek je ena datoteka <ime>.vra:
+#   MAGIC, nato zaporedje kosov; vsak kos vsebuje vzorce enega senzorja:
+#   glava (senzor, kodek, število vzorcev, dolžina podatkov, crc32 nestisnjenih)
+#   stisnjeni podatki: razlike timestamp (int64) ter x, y, z (float32)
+# Stolpci so pred stiskanjem razporejeni po bajtih (vsi prvi bajti, vsi drugi
+# ...), kar zlib/lzma pri majhnih razlikah in float32 stisne precej bolje.
+ARCHIVE_EXTENSION = ".vra"
+MAGIC = b"VRA\x01"
+DEFAULT_CHUNK_SAMPLES = 4096
+DEFAULT_CODEC = "zlib"
+# Zgornja meja vzorcev v kosu: število iz glave določa tudi, koliko se sme
+# razširiti, zato poškodovan ali sovražen kos ne more porabiti več pomnilnika
+MAX_CHUNK_SAMPLES = 1 << 20
+
+_CHUNK_HEADER = struct.Struct("<bBIII")
+_COLUMNS = (("timestamp", np.dtype("<i8")), ("x", np.dtype("<f4")), ("y", np.dtype("<f4")), ("z", np.dtype("<f4")))
+_BYTES_PER_SAMPLE = sum(dtype.itemsize for _, dtype in _COLUMNS)
+
+def _zlib_decompress(data: bytes, max_length: int) -> bytes:
+    return zlib.decompressobj().decompress(data, max_length)
+
+
+def _lzma_decompress(data: bytes, max_length: int) -> bytes:
+    return lzma.LZMADecompressor().decompress(data, max_length)
+
+
+# Razširjanje vrne največ max_length bajtov; daljši rezultat je napaka kosa
+CODECS = {
+    "none": (0, lambda data: data, lambda data, max_length: data[:max_length]),
+    "zlib": (1, lambda data: zlib.compress(data, 6), _zlib_decompress),
+    "lzma": (2, lambda data: lzma.compress(data, preset=6), _lzma_decompress),
+}
+_DECOMPRESS = {codec_id: decompress for codec_id, _, decompress in CODECS.values()}
+
+
+def _shuffle(column: np.ndarray) -> bytes:
+    return column.view(np.uint8).reshape(-1, column.itemsize).T.tobytes()
+
+
+def _unshuffle(data: bytes, dtype: np.dtype, count: int) -> np.ndarray:
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, count)
+    return np.ascontiguousarray(planes.T).view(dtype).reshape(count)
+
+
+def encode_chunk(sensor: int, timestamp: np.ndarray, x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                 codec: str = DEFAULT_CODEC) -> bytes:
+    codec_id, compress, _ = CODECS[codec]
+    # Prva razlika je kar prvi timestamp, zato kos ne potrebuje izhodišča
+    deltas = np.diff(timestamp.astype("<i8"), prepend=np.int64(0))
+    raw = b"".join(_shuffle(np.ascontiguousarray(column, dtype=dtype))
+                   for column, (_, dtype) in zip((deltas, x, y, z), _COLUMNS))
+    payload = compress(raw)
+    return _CHUNK_HEADER.pack(sensor, codec_id, len(timestamp), len(payload), zlib.crc32(raw)) + payload
+
+
+def _read_chunk(f: BinaryIO, file_path: str) -> Optional[Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    header = f.read(_CHUNK_HEADER.size)
+    if not header:
+        return None
+    if len(header) < _CHUNK_HEADER.size:
+        raise ValueError(f"{file_path}: nepopolna glava kosa")
+    sensor, codec_id, count, length, crc = _CHUNK_HEADER.unpack(header)
+    if count > MAX_CHUNK_SAMPLES or codec_id not in _DECOMPRESS or not 0 <= sensor < len(SENSOR_TYPES):
+        raise ValueError(f"{file_path}: poškodovan kos")
+    payload = f.read(length)
+    if len(payload) < length:
+        raise ValueError(f"{file_path}: poškodovan kos")
+    try:
+        # En bajt več od pričakovanega, da se predolg kos zazna
+        raw = _DECOMPRESS[codec_id](payload, count * _BYTES_PER_SAMPLE + 1)
+    except (zlib.error, lzma.LZMAError) as exc:
+        raise ValueError(f"{file_path}: poškodovan kos ({exc})") from exc
+    if len(raw) != count * _BYTES_PER_SAMPLE or zlib.crc32(raw) != crc:
+        raise ValueError(f"{file_path}: napačna kontrolna vsota kosa")
+    columns = []
+    offset = 0
+    for _, dtype in _COLUMNS:
+        size = count * dtype.itemsize
+        columns.append(_unshuffle(raw[offset:offset + size], dtype, count))
+        offset += size
+    return sensor, np.cumsum(columns[0]), columns[1], columns[2], columns[3]
+
+
+def _open(file_path: str) -> BinaryIO:
+    f = open(file_path, "rb")
+    if f.read(len(MAGIC)) != MAGIC:
+        f.close()
+        raise ValueError(f"{file_path}: ni arhiv posnetka")
+    return f
+
+
+def iter_chunks(file_path: str) -> Iterator[Session]:
+    # Pretočno branje: v pomnilniku je le en kos (vzorci enega senzorja)
+    with _open(file_path) as f:
+        while True:
+            chunk = _read_chunk(f, file_path)
+            if chunk is None:
+                return
+            sensor, timestamp, x, y, z = chunk
+            yield Session(timestamp, np.full(len(timestamp), sensor, dtype=np.int8), x, y, z)
+
+
+def read_archive(file_path: str) -> Session:
+    parts: Dict[int, List[Tuple[np.ndarray, ...]]] = {code: [] for code in range(len(SENSOR_TYPES))}
+    with _open(file_path) as f:
+        while True:
+            chunk = _read_chunk(f, file_path)
+            if chunk is None:
+                break
+            parts[chunk[0]].append(chunk[1:])
+    columns = [[], [], [], [], []]
+    for code, chunks in parts.items():
+        for timestamp, x, y, z in chunks:
+            for column, values in zip(columns, (timestamp, np.full(len(timestamp), code, np.int8), x, y, z)):
+                column.append(values)
+    if not columns[0]:
+        return Session.empty()
+    return Session(*(np.concatenate(column) for column in columns))
+
+
+class ArchiveWriter:
+    # Vzorci se zbirajo po senzorjih; polni kosi obeh senzorjev se zapišejo
+    # urejeni po prvem timestamp, zato pretočno branje vrača vzorce približno
+    # v časovnem zaporedju.
+    def __init__(self, file_path: str, chunk_samples: int = DEFAULT_CHUNK_SAMPLES, codec: str = DEFAULT_CODEC):
+        if codec not in CODECS:
+            raise ValueError(f"Neznan kodek: {codec}")
+        if not 0 < chunk_samples <= MAX_CHUNK_SAMPLES:
+            raise ValueError(f"Velikost kosa mora biti med 1 in {MAX_CHUNK_SAMPLES}")
+        self.file_path = file_path
+        self.chunk_samples = chunk_samples
+        self.codec = codec
+        self._pending: Dict[int, List[Tuple[np.ndarray, ...]]] = {code: [] for code in range(len(SENSOR_TYPES))}
+        self._pending_count = {code: 0 for code in range(len(SENSOR_TYPES))}
+        # Edinstveno začasno ime v ciljni mapi: hkratni pisci se ne prepisujejo,
+        # os.replace pa ostane atomaren
+        self._f = tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(file_path)),
+                                              prefix=os.path.basename(file_path) + ".", suffix=".tmp",
+                                              delete=False)
+        self._tmp_path = self._f.name
+        self._f.write(MAGIC)
+
+    def _ready(self, code: int, final: bool) -> List[Tuple[int, bytes]]:
+        count = self._pending_count[code]
+        if count == 0 or (count < self.chunk_samples and not final):
+            return []
+        columns = [np.concatenate(column) for column in zip(*self._pending[code])]
+        full = count if final else count // self.chunk_samples * self.chunk_samples
+        chunks = []
+        for start in range(0, full, self.chunk_samples):
+            stop = min(start + self.chunk_samples, full)
+            data = encode_chunk(code, *(column[start:stop] for column in columns), codec=self.codec)
+            chunks.append((int(columns[0][start]), data))
+        self._pending[code] = [tuple(column[full:] for column in columns)] if full < count else []
+        self._pending_count[code] = count - full
+        return chunks
+
+    def _flush(self, final: bool = False) -> None:
+        chunks = [chunk for code in self._pending for chunk in self._ready(code, final)]
+        chunks.sort(key=lambda chunk: chunk[0])
+        self._f.writelines(data for _, data in chunks)
+
+    def append(self, session: Session) -> None:
+        for code, name in enumerate(SENSOR_TYPES):
+            series = session.sensor_series(name)
+            if len(series):
+                self._pending[code].append((series.timestamp, series.x, series.y, series.z))
+                self._pending_count[code] += len(series)
+        self._flush()
+
+    def close(self) -> None:
+        if self._f is None:
+            return
+        self._flush(final=True)
+        self._f.close()
+        self._f = None
+        # Delna datoteka nikoli ne nadomesti obstoječega arhiva
+        os.replace(self._tmp_path, self.file_path)
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
+            self._f = None
+            os.remove(self._tmp_path)
+
+
+def write_archive(session: Session, file_path: str, chunk_samples: int = DEFAULT_CHUNK_SAMPLES,
+                  codec: str = DEFAULT_CODEC) -> None:
+    with ArchiveWriter(file_path, chunk_samples, codec) as writer:
+        writer.append(session)
+
+
+def convert_to_archive(source: str, target: str, codec: str = DEFAULT_CODEC,
+                       chunk_samples: int = DEFAULT_CHUNK_SAMPLES) -> int:
+    # Iz saveToJson/CSV posnetka; json.load je precej hitrejši od pretočnega
+    # razčlenjevalnika, en posnetek pa vedno pride v pomnilnik
+    from loaders import parser_for
+
+    session = parser_for(source)(source)
+    write_archive(session, target, chunk_samples, codec)
+    return len(session)
+
+
+def _convert_task(args: Tuple[List[Tuple[str, str]], str]) -> List[Tuple[int, int, int]]:
+    pairs, codec = args
+    out = []
+    for source, target in pairs:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        samples = convert_to_archive(source, target, codec)
+        out.append((samples, os.path.getsize(source), os.path.getsize(target)))
+    return out
+
+
+def convert_corpus(source_dir: str, target_dir: str, codec: str = DEFAULT_CODEC, workers: Optional[int] = None,
+                   files_per_task: int = 8) -> Tuple[int, int, int, int]:
+    # Ohrani strukturo map; vrne (datoteke, vzorci, izvorni bajti, arhivski bajti)
+    from batch import STORE_EXTENSION, scan_recordings
+
+    extensions = (".json", ".csv")
+    pairs = []
+    for info in scan_recordings(source_dir, extensions):
+        relative = os.path.relpath(info.path, source_dir)
+        pairs.append((info.path, os.path.join(target_dir, os.path.splitext(relative)[0] + ARCHIVE_EXTENSION)))
+    accepted = {source for source, _ in pairs}
+    for directory, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and not d.endswith(STORE_EXTENSION))
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            if name.endswith(extensions) and path not in accepted:
+                print(f"Preskočeno (ime ne ustreza vzorcu posnetka): {os.path.relpath(path, source_dir)}")
+    tasks = [(pairs[i:i + files_per_task], codec) for i in range(0, len(pairs), files_per_task)]
+    if workers == 1 or len(tasks) <= 1:
+        results = [r for task in tasks for r in _convert_task(task)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [r for part in pool.map(_convert_task, tasks) for r in part]
+    return (len(results), sum(r[0] for r in results), sum(r[1] for r in results), sum(r[2] for r in results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stisnjen stolpčni arhiv posnetkov (.vra)")
+    parser.add_argument("source", help="posnetek, arhiv (.vra) ali mapa s posnetki")
+    parser.add_argument("target", help="ciljna datoteka ali mapa")
+    parser.add_argument("--codec", choices=sorted(CODECS), default=DEFAULT_CODEC)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if os.path.isdir(args.source):
+        files, samples, source_bytes, target_bytes = convert_corpus(args.source, args.target, args.codec,
+                                                                    args.workers)
+    elif args.source.endswith(ARCHIVE_EXTENSION):
+        from synth import write_json
+
+        session = read_archive(args.source)
+        write_json(session, args.target)
+        files, samples = 1, len(session)
+        source_bytes, target_bytes = os.path.getsize(args.source), os.path.getsize(args.target)
+    else:
+        samples = convert_to_archive(args.source, args.target, args.codec)
+        files, source_bytes, target_bytes = 1, os.path.getsize(args.source), os.path.getsize(args.target)
+    elapsed = time.perf_counter() - start
+    ratio = source_bytes / target_bytes if target_bytes else 0.0
+    print(f"Pretvorjenih datotek: {files} ({samples} vzorcev) v {elapsed:.2f} s; "
+          f"{source_bytes / 1024:.0f} KB -> {target_bytes / 1024:.0f} KB ({ratio:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
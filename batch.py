@@ -0,0 +1,154 @@
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from archive import ARCHIVE_EXTENSION
+from classifier import LABELS, classify_features
+from features import extract_features
+from loaders import load_session
+from profiling import enable_from_env, instrumented
+from quality import QUALITY_POLICIES, check_files, repair_session
+from segstore import STORE_EXTENSION
+
+RECORDING_EXTENSIONS = (".json", ".csv", ".npz", STORE_EXTENSION, ARCHIVE_EXTENSION)
+# saveToJson: name_user_movement_yyyyMMdd_HHmmss.json (name lahko vsebuje "_")
+_FILENAME_RE = re.compile(r"^(?P<name>.+)_(?P<user>[^_]+)_(?P<movement>[^_]+)_(?P<date>\d{8})_(?P<time>\d{6})$")
+
+
+class RecordingInfo(NamedTuple):
+    path: str
+    name: str
+    user: str
+    movement: str
+    recorded_at: str
+
+
+class FileResult(NamedTuple):
+    path: str
+    user: str
+    true_label: str
+    predicted: str
+    std_z: float
+    avg_gyro: float
+    samples: int
+
+
+def parse_recording_name(file_path: str) -> Optional[RecordingInfo]:
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    match = _FILENAME_RE.match(stem)
+    if match is None:
+        return None
+    return RecordingInfo(file_path, match["name"], match["user"], match["movement"],
+                         f"{match['date']}_{match['time']}")
+
+
+def scan_recordings(root: str, extensions: Tuple[str, ...] = RECORDING_EXTENSIONS) -> Iterator[RecordingInfo]:
+    for directory, dirs, files in os.walk(root):
+        # Segmentna shramba (.vrs) je mapa, ki je posnetek in se je ne preiskuje naprej
+        stores = [d for d in dirs if d.endswith(STORE_EXTENSION)]
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and not d.endswith(STORE_EXTENSION))
+        for name in sorted(files + stores):
+            if not name.endswith(extensions):
+                continue
+            info = parse_recording_name(os.path.join(directory, name))
+            if info is not None and info.movement in LABELS:
+                yield info
+
+
+def classify_recording(info: RecordingInfo, use_cache: bool = True, repair: bool = False) -> FileResult:
+    session = load_session(info.path, use_cache)
+    if repair:
+        session = repair_session(session)
+    features = extract_features(session)
+    return FileResult(info.path, info.user, info.movement, classify_features(features),
+                      features.std_z, features.avg_gyro, len(session))
+
+
+def _classify_chunk(args: Tuple[List[RecordingInfo], bool, bool]) -> List[FileResult]:
+    infos, use_cache, repair = args
+    return [classify_recording(info, use_cache, repair) for info in infos]
+
+
+@instrumented("classify_directory", samples=lambda results, *a, **k: sum(r.samples for r in results))
+def classify_directory(root: str, workers: Optional[int] = None, chunk_size: int = 16,
+                       use_cache: bool = True, recordings: Optional[List[RecordingInfo]] = None,
+                       repair: bool = False) -> List[FileResult]:
+    recordings = list(recordings if recordings is not None else scan_recordings(root))
+    if workers == 1 or len(recordings) <= chunk_size:
+        return [classify_recording(info, use_cache, repair) for info in recordings]
+
+    # Datoteke pošljemo v kosih, da je strošek IPC razdeljen na več datotek
+    chunks = [(recordings[i:i + chunk_size], use_cache, repair) for i in range(0, len(recordings), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_classify_chunk, chunks):
+            results.extend(part)
+    return results
+
+
+def main():
+    from corpusindex import CorpusIndex, add_filter_arguments, filters_from_args
+
+    parser = argparse.ArgumentParser(description="Paketna klasifikacija vseh posnetkov v mapi")
+    parser.add_argument("directory", nargs="?", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--workers", type=int, default=None, help="število procesov (privzeto vsa jedra)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="število datotek na nalogo")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--no-plot", action="store_true", help="brez grafa konfuzijske matrike")
+    parser.add_argument("--index", action="store_true", help="izberi posnetke iz indeksa korpusa (corpusindex.py)")
+    parser.add_argument("--quality", choices=QUALITY_POLICIES, default="off",
+                        help="preverjanje kakovosti pred klasifikacijo: report izpiše težave, "
+                             "reject izloči slabe posnetke, repair uredi in odstrani podvojene vzorce")
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+    enable_from_env()
+
+    recordings = None
+    filters = filters_from_args(args)
+    if args.index or any(value is not None for value in filters.values()):
+        start = time.perf_counter()
+        index = CorpusIndex(args.directory)
+        index.update(args.workers)
+        recordings = index.recordings(**filters)
+        index.close()
+        print(f"Izbranih posnetkov iz indeksa: {len(recordings)} v {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.quality != "off":
+        if recordings is None:
+            recordings = list(scan_recordings(args.directory))
+        start = time.perf_counter()
+        reports = check_files([info.path for info in recordings], args.workers)
+        rejected = {r.path for r in reports if r.problems()}
+        for r in reports:
+            if r.path in rejected:
+                print(f"❌ {os.path.basename(r.path)}: {'; '.join(r.problems())}")
+        print(f"Preverjanje kakovosti: {len(rejected)}/{len(reports)} posnetkov s težavami "
+              f"v {time.perf_counter() - start:.2f} s")
+        if args.quality == "reject":
+            recordings = [info for info in recordings if info.path not in rejected]
+
+    start = time.perf_counter()
+    results = classify_directory(args.directory, args.workers, args.chunk_size, not args.no_cache, recordings,
+                                 repair=args.quality == "repair")
+    elapsed = time.perf_counter() - start
+
+    if args.verbose:
+        for r in results:
+            print(f"{os.path.basename(r.path)}: {r.true_label} -> {r.predicted} "
+                  f"(STD Z: {r.std_z:.3f}, AVG GYRO: {r.avg_gyro:.3f})")
+
+    samples = sum(r.samples for r in results)
+    print(f"\nObdelanih datotek: {len(results)} v {elapsed:.2f} s "
+          f"({len(results) / elapsed if elapsed else 0:.1f} datotek/s, {samples / elapsed if elapsed else 0:.0f} vzorcev/s)")
+
+    if results:
+        from hypotesis import calculate_metrics
+        calculate_metrics([(r.true_label, r.predicted) for r in results], plot=not args.no_plot)
+
+
+if __name__ == "__main__":
+    main()
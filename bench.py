@@ -0,0 +1,281 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import batch
+from classifier import LABELS
+from features import extract_features
+from hypotesis import analyze_session, calculate_metrics, filter_sensor_data
+from loaders import load_session
+from synth import generate_corpus, generate_session, write_json
+
+QUICK_SESSION_SECONDS = (10, 60, 600)
+FULL_SESSION_SECONDS = (10, 60, 600, 3600, 3 * 3600)
+QUICK_CORPUS_SIZES = (3, 30, 300)
+FULL_CORPUS_SIZES = (3, 30, 300, 1000, 10000)
+REGRESSION_TOLERANCE = 0.20
+# Razlike pod to mejo so pri kratkih stopnjah le šum merjenja
+REGRESSION_MIN_DELTA_MS = 1.0
+
+
+# Izhodiščna (prvotna) implementacija nad seznamom slovarjev, da je vsak
+# zagon primerljiv z njo na istem računalniku.
+
+def legacy_load_data(file_path: str) -> List[Dict]:
+    with open(file_path, "r") as f:
+        return json.load(f)
+
+
+def legacy_filter_sensor_data(session: List[Dict], sensor_type: str) -> List[Dict]:
+    return [s for s in session if s["sensorType"] == sensor_type]
+
+
+def legacy_compute_features(session: List[Dict]) -> Tuple:
+    accel = legacy_filter_sensor_data(session, "accelerometer")
+    gyro = legacy_filter_sensor_data(session, "gyroscope")
+    z_vals = [s["z"] for s in accel]
+    avg_z = sum(z_vals) / len(z_vals)
+    std_dev_z = math.sqrt(sum((z - avg_z) ** 2 for z in z_vals) / len(z_vals))
+    gyro_mags = [math.sqrt(s["x"] ** 2 + s["y"] ** 2 + s["z"] ** 2) for s in gyro]
+    avg_gyro = sum(gyro_mags) / len(gyro_mags)
+    mins = [{a: min(s[a] for s in data) for a in "xyz"} for data in (accel, gyro)]
+    maxs = [{a: max(s[a] for s in data) for a in "xyz"} for data in (accel, gyro)]
+    return std_dev_z, avg_gyro, mins, maxs
+
+
+def legacy_analyze_session(session: List[Dict]) -> str:
+    std_dev_z, avg_gyro, _, _ = legacy_compute_features(session)
+    if std_dev_z > 0.30 and avg_gyro > 0.045:
+        return "Up"
+    elif std_dev_z > 0.22 and avg_gyro > 0.035:
+        return "Down"
+    return "Straight"
+
+
+def legacy_classify_files(paths: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    return [(label, legacy_analyze_session(legacy_load_data(path))) for path, label in paths]
+
+
+def legacy_calculate_metrics(results: List[Tuple[str, str]]) -> None:
+    labels = sorted({t for t, _ in results} | {p for _, p in results})
+    label_to_index = {label: i for i, label in enumerate(labels)}
+
+    matrix = np.zeros((len(labels), len(labels)), dtype=int)
+    for true, pred in results:
+        matrix[label_to_index[true]][label_to_index[pred]] += 1
+
+    print("\n--- Konfuzijska matrika ---")
+    for i, true_label in enumerate(labels):
+        row = "\t".join(str(matrix[i][j]) for j in range(len(labels)))
+        print(f"{true_label:>7}: {row}")
+
+    correct = np.trace(matrix)
+    total = np.sum(matrix)
+    print(f"\nSkupna točnost: {correct / total * 100:.2f}% ({correct}/{total})")
+
+    print("\n--- Preciznost po razredih ---")
+    for i, label in enumerate(labels):
+        tp = matrix[i][i]
+        fp = sum(matrix[j][i] for j in range(len(labels)) if j != i)
+        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+        print(f"{label:>7}: {precision:.2f}")
+
+
+def _quiet_metrics(results: List[Tuple[str, str]]) -> None:
+    # Brez toplotne karte: meri se izračun metrik, ne izris
+    with contextlib.redirect_stdout(io.StringIO()):
+        calculate_metrics(results, plot=False)
+
+
+def _quiet_legacy_metrics(results: List[Tuple[str, str]]) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_calculate_metrics(results)
+
+
+def measure(fn: Callable[[], object], repeats: int, samples: int) -> Dict[str, float]:
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times_ms = np.array(times) * 1000
+    p50, p90, p99 = np.percentile(times_ms, [50, 90, 99])
+    mean = float(times_ms.mean())
+    return {
+        "repeats": repeats,
+        "samples": samples,
+        "mean_ms": mean,
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "throughput_samples_s": samples / (mean / 1000) if mean > 0 else 0.0,
+        "peak_alloc_bytes": int(peak),
+    }
+
+
+def _repeats_for(samples: int) -> int:
+    return max(3, min(50, int(2_000_000 / max(samples, 1))))
+
+
+def bench_sessions(workdir: str, seconds: Tuple[int, ...], include_legacy: bool) -> List[Dict]:
+    rows = []
+    for duration in seconds:
+        session = generate_session("Up", duration, seed=duration)
+        path = os.path.join(workdir, f"session_{duration}s.json")
+        write_json(session, path)
+        n = len(session)
+        repeats = _repeats_for(n)
+        records = session.to_records() if include_legacy else None
+        predictions = [(LABELS[i % 3], LABELS[(i * 7) % 3]) for i in range(n)]
+
+        stages = {
+            "current": {
+                "load": lambda: load_session(path, use_cache=False),
+                "load_cached": lambda: load_session(path),
+                "filter": lambda: filter_sensor_data(session, "accelerometer"),
+                "features": lambda: extract_features(session),
+                "classify": lambda: analyze_session(session),
+            },
+            "legacy": {
+                "load": lambda: legacy_load_data(path),
+                "filter": lambda: legacy_filter_sensor_data(records, "accelerometer"),
+                "features": lambda: legacy_compute_features(records),
+                "classify": lambda: legacy_analyze_session(records),
+            },
+        }
+        if not include_legacy:
+            del stages["legacy"]
+
+        for impl, impl_stages in stages.items():
+            for stage, fn in impl_stages.items():
+                row = {"stage": stage, "impl": impl, "size": f"{duration}s"}
+                row.update(measure(fn, repeats, n))
+                rows.append(row)
+                _print_row(row)
+
+        # Metrike so odvisne od števila napovedi, ne od vzorcev
+        metrics = {"current": lambda: _quiet_metrics(predictions)}
+        if include_legacy:
+            metrics["legacy"] = lambda: _quiet_legacy_metrics(predictions)
+        for impl, fn in metrics.items():
+            row = {"stage": "metrics", "impl": impl, "size": f"{duration}s"}
+            row.update(measure(fn, 3, len(predictions)))
+            rows.append(row)
+            _print_row(row)
+    return rows
+
+
+def bench_corpora(workdir: str, sizes: Tuple[int, ...], include_legacy: bool, workers: Optional[int]) -> List[Dict]:
+    rows = []
+    for count in sizes:
+        directory = os.path.join(workdir, f"corpus_{count}")
+        generate_corpus(directory, count, duration_s=10.0, workers=workers)
+        recordings = list(batch.scan_recordings(directory))
+        samples = sum(len(load_session(r.path)) for r in recordings)
+        repeats = 3 if count <= 300 else 1
+
+        cases = {"current": lambda: batch.classify_directory(directory, workers, recordings=recordings)}
+        if include_legacy:
+            paths = [(r.path, r.movement) for r in recordings]
+            cases["legacy"] = lambda: legacy_classify_files(paths)
+        for impl, fn in cases.items():
+            row = {"stage": "corpus", "impl": impl, "size": f"{count} files"}
+            row.update(measure(fn, repeats, samples))
+            rows.append(row)
+            _print_row(row)
+    return rows
+
+
+def _print_row(row: Dict) -> None:
+    print(f"{row['stage']:>12} {row['impl']:>7} {row['size']:>10}: p50 {row['p50_ms']:10.2f} ms  "
+          f"p99 {row['p99_ms']:10.2f} ms  {row['throughput_samples_s']:14,.0f} vzorcev/s  "
+          f"peak {row['peak_alloc_bytes'] / 1e6:8.1f} MB")
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    key = lambda r: (r["stage"], r["impl"], r["size"])
+    previous = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for row in results["results"]:
+        old = previous.get(key(row))
+        if old is None or old["p50_ms"] <= 0:
+            continue
+        ratio = row["p50_ms"] / old["p50_ms"]
+        marker = ""
+        if ratio > 1 + tolerance and row["p50_ms"] - old["p50_ms"] > REGRESSION_MIN_DELTA_MS:
+            marker = "  <-- regresija"
+            regressions.append(f"{key(row)}: {ratio:.2f}x")
+        print(f"{row['stage']:>12} {row['impl']:>7} {row['size']:>10}: {old['p50_ms']:10.2f} -> "
+              f"{row['p50_ms']:10.2f} ms ({ratio:.2f}x){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merjenje hitrosti nalaganja, značilk, klasifikacije in metrik")
+    parser.add_argument("--full", action="store_true", help="tudi večurne seje in korpus do 10.000 datotek")
+    parser.add_argument("--no-legacy", action="store_true", help="brez izhodiščne implementacije (seznam slovarjev)")
+    parser.add_argument("--skip-corpus", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="shrani rezultate v JSON")
+    parser.add_argument("--compare", default=None, help="primerjaj z rezultati iz JSON datoteke")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    workdir = tempfile.mkdtemp(prefix="vr_bench_")
+    try:
+        rows = bench_sessions(workdir, FULL_SESSION_SECONDS if args.full else QUICK_SESSION_SECONDS,
+                              not args.no_legacy)
+        if not args.skip_corpus:
+            rows += bench_corpora(workdir, FULL_CORPUS_SIZES if args.full else QUICK_CORPUS_SIZES,
+                                  not args.no_legacy, args.workers)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        # ru_maxrss je vrh celotnega procesa čez vse stopnje, zato ni v vrsticah;
+        # porabo posamezne stopnje meri peak_alloc_bytes (tracemalloc)
+        "process_peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "results": rows,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nRezultati shranjeni v {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        print("\n--- Primerjava ---")
+        regressions = compare(results, baseline)
+        if regressions:
+            print(f"\nRegresije (> {REGRESSION_TOLERANCE:.0%}): " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from batch import scan_recordings
+from calibration import WindowDataset, extract_window_dataset
+from classifier import LABELS, classify_batch
+from windows import DEFAULT_HOP_S, DEFAULT_WINDOW_S
+
+# Trditve iz hipotez H1–H3 (pytho_part/hypotesis.py): natančnost po razredih
+ACCURACY_CLAIMS = {"Straight": 0.90, "Up": 0.85, "Down": 0.85}
+DEFAULT_RESAMPLES = 10000
+DEFAULT_SHARD = 500
+DEFAULT_BLOCK = 32
+DEFAULT_CONFIDENCE = 0.95
+# Pod toliko enotami (okni ali posnetki) razreda preizkus ne da odločitve
+MIN_TEST_UNITS = 10
+
+
+class ClassInterval(NamedTuple):
+    label: str
+    windows: int
+    accuracy: float
+    accuracy_ci: Tuple[float, float]
+    precision: float
+    precision_ci: Tuple[float, float]
+    claim: Optional[float]
+    units: int                    # enote razreda (okna ali posnetki)
+    correct_units: int            # pravilne enote (posnetek: večina oken pravilnih)
+    p_value: Optional[float]      # točni binomski, enostranski: H0 natančnost <= trditev
+    lower_bound: Optional[float]  # enostranska Clopper-Pearsonova spodnja meja
+    no_verdict: Optional[str]     # razlog, zakaj preizkus ne da odločitve
+
+
+class BootstrapResult(NamedTuple):
+    resamples: int
+    confidence: float
+    unit: str
+    accuracy: float
+    accuracy_ci: Tuple[float, float]
+    classes: List[ClassInterval]
+
+
+def unit_counts(true: np.ndarray, predicted: np.ndarray, groups: Optional[np.ndarray] = None,
+                k: int = len(LABELS)) -> List[np.ndarray]:
+    # Za vsak pravi razred tabela (enote, k) s številom napovedi po oznakah.
+    # Enota je okno ali (z groups) cel posnetek: okna istega posnetka se
+    # prekrivajo, zato je vzorčenje posnetkov bolj pošteno.
+    rows = []
+    for c in range(k):
+        mask = true == c
+        if groups is None:
+            counts = np.zeros((int(mask.sum()), k), dtype=np.int64)
+            counts[np.arange(len(counts)), predicted[mask]] = 1
+        else:
+            unit_ids, unit = np.unique(groups[mask], return_inverse=True)
+            counts = np.zeros((len(unit_ids), k), dtype=np.int64)
+            np.add.at(counts, (unit.reshape(-1), predicted[mask]), 1)
+        rows.append(counts)
+    return rows
+
+
+def _resample_windows(counts: np.ndarray, rng: np.random.Generator, size: int) -> np.ndarray:
+    # Vsaka enota ima natanko eno napoved: enote uredimo po napovedi, tako da
+    # je napoved indeksa floor(u * n) določena le z mejami med oznakami.
+    # Število napovedi je potem štetje primerjav u z mejami, brez zbiranja.
+    n = len(counts)
+    bounds = np.cumsum(counts.sum(axis=0))[:-1] / n
+    u = rng.random((size, n), dtype=np.float32)
+    below = np.stack([np.count_nonzero(u < b, axis=1) for b in bounds], axis=1)
+    cumulative = np.concatenate((np.zeros((size, 1), np.int64), below, np.full((size, 1), n)), axis=1)
+    return np.diff(cumulative, axis=1)
+
+
+def _resample_units(counts: np.ndarray, rng: np.random.Generator, size: int) -> np.ndarray:
+    # Splošne enote (posnetki): kratnosti izžrebanih indeksov z eno np.bincount,
+    # vsota napovedi pa z matričnim produktom.
+    n = len(counts)
+    index = rng.integers(0, n, size=(size, n), dtype=np.int64)
+    index += (np.arange(size, dtype=np.int64) * n)[:, None]
+    multiplicity = np.bincount(index.ravel(), minlength=size * n).reshape(size, n)
+    return multiplicity @ counts
+
+
+def _resample_shard(args: Tuple[List[np.ndarray], int, np.random.SeedSequence, int]) -> np.ndarray:
+    # Vrne (ponovitve, k, k) konfuzijskih matrik. Indeksi enot se za vsak
+    # razred posebej (stratificirano) žrebajo kot tabela (blok, n_c).
+    rows, resamples, seed, block = args
+    rng = np.random.default_rng(seed)
+    k = len(rows)
+    out = np.zeros((resamples, k, k), dtype=np.int64)
+    for c, counts in enumerate(rows):
+        if len(counts) == 0:
+            continue
+        resample = _resample_windows if np.all(counts.sum(axis=1) == 1) else _resample_units
+        for start in range(0, resamples, block):
+            size = min(block, resamples - start)
+            out[start:start + size, c, :] = resample(counts, rng, size)
+    return out
+
+
+def bootstrap_confusion(rows: List[np.ndarray], resamples: int = DEFAULT_RESAMPLES, seed: int = 0,
+                        workers: Optional[int] = None, shard: int = DEFAULT_SHARD,
+                        block: int = DEFAULT_BLOCK) -> np.ndarray:
+    # Ponovitve so razdeljene na kose z neodvisnimi semeni (SeedSequence.spawn);
+    # rezultat je pri istem seed enak ne glede na število procesov.
+    sizes = [min(shard, resamples - start) for start in range(0, resamples, shard)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(rows, size, s, block) for size, s in zip(sizes, seeds)]
+    if workers == 1 or len(tasks) <= 1:
+        parts = [_resample_shard(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_resample_shard, tasks))
+    k = len(rows)
+    return np.concatenate(parts) if parts else np.zeros((0, k, k), dtype=np.int64)
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), np.nan)
+
+
+def _interval(values: np.ndarray, confidence: float) -> Tuple[float, float]:
+    alpha = (1 - confidence) / 2
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return float("nan"), float("nan")
+    lo, hi = np.quantile(values, [alpha, 1 - alpha])
+    return float(lo), float(hi)
+
+
+def _log_binom_tail(k: int, n: int, p: float) -> float:
+    # log P(X >= k) za X ~ Bin(n, p), s seštevanjem v logaritmih (n do ~1e6)
+    if k <= 0 or p >= 1:
+        return 0.0
+    if k > n or p <= 0:
+        return -np.inf
+    j = np.arange(k, n + 1)
+    log_fact = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, n + 1)))))
+    terms = log_fact[n] - log_fact[j] - log_fact[n - j] + j * np.log(p) + (n - j) * np.log1p(-p)
+    top = terms.max()
+    return float(top + np.log(np.exp(terms - top).sum()))
+
+
+def binomial_p_value(k: int, n: int, claim: float) -> float:
+    # Točni enostranski preizkus H0: p <= claim proti H1: p > claim
+    return float(np.exp(_log_binom_tail(k, n, claim)))
+
+
+def clopper_pearson_lower(k: int, n: int, alpha: float) -> float:
+    # Največji p, pri katerem je P(X >= k | p) <= alpha; bisekcija, tail narašča s p
+    if k <= 0:
+        return 0.0
+    lo, hi, log_alpha = 0.0, 1.0, np.log(alpha)
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if _log_binom_tail(k, n, mid) > log_alpha:
+            hi = mid
+        else:
+            lo = mid
+    return lo
+
+
+def correct_units(counts: np.ndarray, c: int) -> int:
+    # Enota je pravilna, če je večina njenih oken pravilno razvrščenih;
+    # pri oknih (ena napoved na enoto) je to kar diagonala.
+    return int(np.count_nonzero(2 * counts[:, c] > counts.sum(axis=1)))
+
+
+def summarize(observed: np.ndarray, samples: np.ndarray, rows: List[np.ndarray],
+              confidence: float = DEFAULT_CONFIDENCE, claims: Optional[Dict[str, float]] = None,
+              unit: str = "okno") -> BootstrapResult:
+    # Intervali so percentilni bootstrap; trditve pa preverja točni binomski
+    # preizkus nad enotami, ker je porazdelitev bootstrapa središčena na
+    # opaženi natančnosti in ne na H0 (pri 100 % pravilnih se izrodi).
+    claims = ACCURACY_CLAIMS if claims is None else claims
+    diagonal = np.arange(observed.shape[0])
+    # Natančnost razreda = delež pravilno prepoznanih oken tega razreda (priklic)
+    accuracy = _ratio(observed[diagonal, diagonal], observed.sum(axis=1))
+    precision = _ratio(observed[diagonal, diagonal], observed.sum(axis=0))
+    sample_accuracy = _ratio(samples[:, diagonal, diagonal], samples.sum(axis=2))
+    sample_precision = _ratio(samples[:, diagonal, diagonal], samples.sum(axis=1))
+
+    classes = []
+    for c, label in enumerate(LABELS):
+        claim = claims.get(label)
+        n, k = len(rows[c]), correct_units(rows[c], c)
+        p_value = lower = reason = None
+        if claim is not None and n:
+            p_value = binomial_p_value(k, n, claim)
+            lower = clopper_pearson_lower(k, n, 1 - confidence)
+            # Interval bootstrapa ničelne širine (npr. vse pravilno) je veljaven
+            # rezultat; točni preizkus je tedaj najbolj poveden
+            if n < MIN_TEST_UNITS:
+                reason = f"premalo enot ({n} < {MIN_TEST_UNITS})"
+        classes.append(ClassInterval(label, int(observed[c].sum()), float(accuracy[c]),
+                                     _interval(sample_accuracy[:, c], confidence), float(precision[c]),
+                                     _interval(sample_precision[:, c], confidence), claim,
+                                     n, k, p_value, lower, reason))
+    total = observed.sum()
+    overall = float(np.trace(observed) / total) if total else float("nan")
+    sample_overall = _ratio(np.trace(samples, axis1=1, axis2=2), samples.sum(axis=(1, 2)))
+    return BootstrapResult(len(samples), confidence, unit, overall, _interval(sample_overall, confidence), classes)
+
+
+def evaluate(dataset: WindowDataset, resamples: int = DEFAULT_RESAMPLES, by_recording: bool = False,
+             seed: int = 0, workers: Optional[int] = None, confidence: float = DEFAULT_CONFIDENCE,
+             claims: Optional[Dict[str, float]] = None) -> BootstrapResult:
+    true = dataset.labels.astype(np.intp)
+    predicted = classify_batch(dataset.std_z, dataset.avg_gyro).astype(np.intp)
+    observed = np.bincount(true * len(LABELS) + predicted, minlength=len(LABELS) ** 2).reshape(len(LABELS), -1)
+    rows = unit_counts(true, predicted, dataset.groups if by_recording else None)
+    samples = bootstrap_confusion(rows, resamples, seed, workers)
+    return summarize(observed, samples, rows, confidence, claims, "posnetek" if by_recording else "okno")
+
+
+def print_result(result: BootstrapResult, alpha: float = 0.05) -> None:
+    percent = int(round(result.confidence * 100))
+    print(f"\n--- Bootstrap ({result.resamples} ponovitev, enota: {result.unit}, {percent}% IZ) ---")
+    lo, hi = result.accuracy_ci
+    print(f"Skupna točnost: {result.accuracy * 100:.2f}% [{lo * 100:.2f}, {hi * 100:.2f}]")
+    for c in result.classes:
+        print(f"{c.label:>8}: natančnost {c.accuracy * 100:6.2f}% [{c.accuracy_ci[0] * 100:.2f}, "
+              f"{c.accuracy_ci[1] * 100:.2f}], preciznost {c.precision * 100:6.2f}% "
+              f"[{c.precision_ci[0] * 100:.2f}, {c.precision_ci[1] * 100:.2f}] ({c.windows} oken)")
+    print(f"\n--- Točni binomski preizkus trditev (H0: natančnost <= trditev, enota: {result.unit}) ---")
+    for i, c in enumerate(result.classes, start=1):
+        if c.claim is None or c.p_value is None:
+            continue
+        if c.no_verdict:
+            verdict = f"⚠️ brez odločitve: {c.no_verdict}"
+        else:
+            verdict = "✅ potrjena" if c.p_value < alpha else "❌ ni potrjena"
+        print(f"H{i} ({c.label} > {c.claim * 100:.0f}%): {c.correct_units}/{c.units} pravilnih, "
+              f"spodnja meja {c.lower_bound * 100:.1f}% ({percent}%), p = {c.p_value:.4f} -> {verdict} "
+              f"(alfa = {alpha})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap intervali zaupanja za natančnost hipotez H1–H3")
+    parser.add_argument("directory", nargs="?", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument("--alpha", type=float, default=0.05, help="stopnja značilnosti preizkusa")
+    parser.add_argument("--by-recording", action="store_true",
+                        help="vzorči cele posnetke namesto posameznih (prekrivajočih se) oken")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW_S)
+    parser.add_argument("--hop", type=float, default=DEFAULT_HOP_S)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = extract_window_dataset(list(scan_recordings(args.directory)), args.window, args.hop, args.workers)
+    extracted = time.perf_counter()
+    if len(dataset.labels) == 0:
+        print("Ni označenih posnetkov.")
+        return
+    result = evaluate(dataset, args.resamples, args.by_recording, args.seed, args.workers, args.confidence)
+    done = time.perf_counter()
+
+    print(f"Oken: {len(dataset.labels)}, posnetkov: {len(np.unique(dataset.groups))}")
+    print(f"Značilke: {extracted - start:.2f} s, bootstrap: {done - extracted:.2f} s")
+    print_result(result, args.alpha)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from session import Session
+
+CACHE_DIR_NAME = ".session_cache"
+CACHE_FORMAT = 2
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Stolpci v .bin datoteki: timestamp (int64), x, y, z (float32), sensor (int8)
+_BYTES_PER_SAMPLE = 8 + 3 * 4 + 1
+
+# Ocena velikosti mape po procesu, da ni treba ob vsakem zapisu pregledati
+# celotne mape; ob prekoračitvi meje se velikost prešteje natančno.
+_known_sizes: Dict[str, int] = {}
+
+
+def file_digest(file_path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class SessionCache:
+    # Za vsako izvorno datoteko je majhen zapis (pot, velikost, mtime, zgoščena
+    # vrednost vsebine); stolpci so v <zgoščena vrednost>.bin, zato si enake
+    # datoteke na različnih poteh delijo isti vnos. Čas zadnje uporabe je
+    # mtime .bin datoteke (LRU).
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _source_path(self, file_path: str) -> str:
+        key = hashlib.blake2b(os.path.abspath(file_path).encode("utf-8"), digest_size=8).hexdigest()
+        return os.path.join(self.cache_dir, f"src-{key}.json")
+
+    def _bin_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.bin")
+
+    def _read_source(self, file_path: str) -> Optional[Dict]:
+        try:
+            with open(self._source_path(file_path), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("format") != CACHE_FORMAT or entry.get("path") != os.path.abspath(file_path):
+            return None
+        return entry
+
+    def digest(self, file_path: str) -> str:
+        # Vsebino ponovno zgostimo le, če se je spremenila velikost ali mtime
+        st = os.stat(file_path)
+        entry = self._read_source(file_path)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["digest"]
+        return file_digest(file_path)
+
+    def _map(self, digest: str) -> Session:
+        path = self._bin_path(digest)
+        n = os.path.getsize(path) // _BYTES_PER_SAMPLE
+        if n == 0:
+            return Session.empty()
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        return Session(
+            buf[0:8 * n].view(np.int64),
+            buf[20 * n:21 * n].view(np.int8),
+            buf[8 * n:12 * n].view(np.float32),
+            buf[12 * n:16 * n].view(np.float32),
+            buf[16 * n:20 * n].view(np.float32),
+        )
+
+    def get(self, file_path: str, digest: Optional[str] = None) -> Optional[Session]:
+        digest = digest or self.digest(file_path)
+        try:
+            os.utime(self._bin_path(digest))
+        except FileNotFoundError:
+            return None
+        self._write_source(file_path, digest)
+        return self._map(digest)
+
+    def put(self, file_path: str, session: Session, digest: Optional[str] = None) -> Session:
+        digest = digest or self.digest(file_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = b"".join((
+            np.ascontiguousarray(session.timestamp, dtype=np.int64).tobytes(),
+            np.ascontiguousarray(session.x, dtype=np.float32).tobytes(),
+            np.ascontiguousarray(session.y, dtype=np.float32).tobytes(),
+            np.ascontiguousarray(session.z, dtype=np.float32).tobytes(),
+            np.ascontiguousarray(session.sensor, dtype=np.int8).tobytes(),
+        ))
+        _write_atomic(self._bin_path(digest), data)
+        self._write_source(file_path, digest)
+
+        if self.cache_dir not in _known_sizes:
+            _known_sizes[self.cache_dir] = self.size()
+        else:
+            _known_sizes[self.cache_dir] += len(data)
+        if _known_sizes[self.cache_dir] > self.max_bytes:
+            self.evict(keep=digest)
+        return self._map(digest)
+
+    def load(self, file_path: str, parse: Callable[[str], Session]) -> Session:
+        digest = self.digest(file_path)
+        session = self.get(file_path, digest)
+        if session is None:
+            session = self.put(file_path, parse(file_path), digest)
+        return session
+
+    def _write_source(self, file_path: str, digest: str) -> None:
+        st = os.stat(file_path)
+        entry = {"format": CACHE_FORMAT, "path": os.path.abspath(file_path),
+                 "size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+        previous = self._read_source(file_path)
+        if previous != entry:
+            _write_atomic(self._source_path(file_path), json.dumps(entry).encode("utf-8"))
+
+    def invalidate(self, file_path: str) -> None:
+        entry = self._read_source(file_path)
+        for path in (self._source_path(file_path), entry and self._bin_path(entry["digest"])):
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _entries(self, prefix: str, suffix: str):
+        try:
+            entries = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return []
+        return [e for e in entries if e.name.startswith(prefix) and e.name.endswith(suffix)]
+
+    def _bins(self):
+        return self._entries("", ".bin")
+
+    def size(self) -> int:
+        return sum(e.stat().st_size for e in self._bins())
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        # Najprej odstranimo najdlje neuporabljene vnose (LRU)
+        bins = sorted(((e.stat().st_mtime_ns, e.stat().st_size, e.path) for e in self._bins()))
+        total = sum(size for _, size, _ in bins)
+        for _, size, path in bins:
+            if total <= self.max_bytes:
+                break
+            if keep and os.path.basename(path) == f"{keep}.bin":
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        _known_sizes[self.cache_dir] = total
+        self._remove_orphans()
+
+    def _remove_orphans(self) -> None:
+        # Zapisi virov, katerih .bin ni več, bi sicer ostali za vedno
+        digests = {e.name[:-len(".bin")] for e in self._bins()}
+        for e in self._entries("src-", ".json"):
+            try:
+                with open(e.path, "r") as f:
+                    digest = json.load(f).get("digest")
+            except (OSError, ValueError):
+                digest = None
+            if digest not in digests:
+                try:
+                    os.remove(e.path)
+                except FileNotFoundError:
+                    pass
+
+    def clear(self) -> None:
+        try:
+            entries = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return
+        for e in entries:
+            if e.name.endswith((".bin", ".json")):
+                os.remove(e.path)
+        _known_sizes.pop(self.cache_dir, None)
+
+
+def cache_for(file_path: str, max_bytes: int = DEFAULT_MAX_BYTES) -> SessionCache:
+    directory = os.path.dirname(os.path.abspath(file_path))
+    return SessionCache(os.path.join(directory, CACHE_DIR_NAME), max_bytes)
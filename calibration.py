@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from batch import RecordingInfo, scan_recordings
+from classifier import LABELS
+from featurestore import store_for
+from windows import DEFAULT_HOP_S, DEFAULT_WINDOW_S
+
+STRAIGHT, UP, DOWN = (LABELS.index(label) for label in ("Straight", "Up", "Down"))
+
+
+class WindowDataset(NamedTuple):
+    std_z: np.ndarray
+    avg_gyro: np.ndarray
+    labels: np.ndarray
+    groups: np.ndarray
+
+
+class CalibrationResult(NamedTuple):
+    thresholds: Dict[str, Dict[str, float]]
+    accuracy: float
+    candidates: int
+    fold_accuracies: List[float]
+
+
+def _recording_windows(args: Tuple[RecordingInfo, float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    info, window_s, hop_s = args
+    # Okna iz shrambe značilk: ponovno umerjanje nad nespremenjenim korpusom ne bere signalov
+    _, _, std_z, avg_gyro = store_for(info.path).window_features(info.path, window_s, hop_s)
+    valid = ~(np.isnan(std_z) | np.isnan(avg_gyro))
+    return std_z[valid], avg_gyro[valid]
+
+
+def extract_window_dataset(recordings: List[RecordingInfo], window_s: float = DEFAULT_WINDOW_S,
+                           hop_s: float = DEFAULT_HOP_S, workers: Optional[int] = None) -> WindowDataset:
+    tasks = [(info, window_s, hop_s) for info in recordings]
+    if workers == 1 or len(tasks) < 8:
+        parts = [_recording_windows(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_recording_windows, tasks, chunksize=8))
+
+    std_z = np.concatenate([p[0] for p in parts]) if parts else np.empty(0)
+    avg_gyro = np.concatenate([p[1] for p in parts]) if parts else np.empty(0)
+    labels = np.concatenate([np.full(len(p[0]), LABELS.index(info.movement), dtype=np.int8)
+                             for p, info in zip(parts, recordings)]) if parts else np.empty(0, np.int8)
+    # Okna istega posnetka se prekrivajo, zato morajo biti pri navzkrižnem
+    # preverjanju vedno v isti skupini.
+    groups = np.concatenate([np.full(len(p[0]), i, dtype=np.int32)
+                             for i, p in enumerate(parts)]) if parts else np.empty(0, np.int32)
+    return WindowDataset(std_z, avg_gyro, labels, groups)
+
+
+def candidate_grid(values: np.ndarray, size: int) -> np.ndarray:
+    return np.unique(np.quantile(values, np.linspace(0.0, 1.0, size)))
+
+
+def suffix_counts(std_z: np.ndarray, avg_gyro: np.ndarray, labels: np.ndarray,
+                  std_candidates: np.ndarray, gyro_candidates: np.ndarray) -> np.ndarray:
+    # Q[c, a, b] = število oken razreda c, za katera velja std_z > S[a] in avg_gyro > G[b].
+    # Okno z indeksom bin_s izpolnjuje std_z > S[a] natanko za a < bin_s.
+    n_s, n_g = len(std_candidates), len(gyro_candidates)
+    bin_s = np.searchsorted(std_candidates, std_z, side="left")
+    bin_g = np.searchsorted(gyro_candidates, avg_gyro, side="left")
+    flat = (labels.astype(np.int64) * (n_s + 1) + bin_s) * (n_g + 1) + bin_g
+    hist = np.bincount(flat, minlength=len(LABELS) * (n_s + 1) * (n_g + 1))
+    hist = hist.reshape(len(LABELS), n_s + 1, n_g + 1)
+    tail = hist[:, ::-1, ::-1].cumsum(axis=1).cumsum(axis=2)[:, ::-1, ::-1]
+    return tail[:, 1:, 1:]
+
+
+def correct_counts(q: np.ndarray) -> np.ndarray:
+    # Pravilno razvrščena okna za vse štirice (Up std, Up gyro, Down std, Down gyro) naenkrat.
+    # Pravilo: Up, če (s > Su in g > Gu); sicer Down, če (s > Sd in g > Gd); sicer Straight.
+    n_s, n_g = q.shape[1], q.shape[2]
+    a = np.arange(n_s)[:, None, None, None]
+    b = np.arange(n_g)[None, :, None, None]
+    c = np.arange(n_s)[None, None, :, None]
+    d = np.arange(n_g)[None, None, None, :]
+    ma = np.maximum(a, c)
+    mb = np.maximum(b, d)
+
+    q_up, q_down, q_straight = q[UP], q[DOWN], q[STRAIGHT]
+    up = q_up[a, b]
+    down = q_down[c, d] - q_down[ma, mb]
+    straight_moving = q_straight[a, b] + q_straight[c, d] - q_straight[ma, mb]
+    return up + down - straight_moving
+
+
+def _best(correct: np.ndarray) -> Tuple[int, int, int, int]:
+    return np.unravel_index(int(np.argmax(correct)), correct.shape)
+
+
+def _thresholds(std_candidates: np.ndarray, gyro_candidates: np.ndarray,
+                index: Tuple[int, int, int, int]) -> Dict[str, Dict[str, float]]:
+    a, b, c, d = index
+    up = {"std_z": float(std_candidates[a]), "avg_gyro": float(gyro_candidates[b])}
+    down = {"std_z": float(std_candidates[c]), "avg_gyro": float(gyro_candidates[d])}
+    # Straight ni posebno pravilo (je "vse ostalo"); za hipotezo H1 poročamo
+    # spodnji meji obeh razredov s stopnicami.
+    straight = {"std_z": min(up["std_z"], down["std_z"]), "avg_gyro": min(up["avg_gyro"], down["avg_gyro"])}
+    return {"Straight": straight, "Up": up, "Down": down}
+
+
+def calibrate(dataset: WindowDataset, grid_size: int = 32, folds: int = 0,
+              seed: int = 0) -> CalibrationResult:
+    std_candidates = candidate_grid(dataset.std_z, grid_size)
+    gyro_candidates = candidate_grid(dataset.avg_gyro, grid_size)
+
+    q = suffix_counts(dataset.std_z, dataset.avg_gyro, dataset.labels, std_candidates, gyro_candidates)
+    n_straight = int(np.count_nonzero(dataset.labels == STRAIGHT))
+    correct = correct_counts(q)
+    index = _best(correct)
+    accuracy = (int(correct[index]) + n_straight) / len(dataset.labels)
+
+    fold_accuracies = []
+    if folds > 1:
+        group_ids = np.unique(dataset.groups)
+        rng = np.random.default_rng(seed)
+        fold_of_group = rng.permutation(len(group_ids)) % folds
+        fold = fold_of_group[np.searchsorted(group_ids, dataset.groups)]
+        for k in range(folds):
+            test = fold == k
+            if not np.any(test):
+                continue
+            q_test = suffix_counts(dataset.std_z[test], dataset.avg_gyro[test], dataset.labels[test],
+                                   std_candidates, gyro_candidates)
+            train_index = _best(correct_counts(q - q_test))
+            test_correct = correct_counts(q_test)[train_index]
+            test_straight = int(np.count_nonzero(dataset.labels[test] == STRAIGHT))
+            fold_accuracies.append((int(test_correct) + test_straight) / int(np.count_nonzero(test)))
+
+    return CalibrationResult(_thresholds(std_candidates, gyro_candidates, index), accuracy,
+                             correct.size, fold_accuracies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Umerjanje pragov THRESHOLDS na označenem korpusu")
+    parser.add_argument("directory", nargs="?", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--grid", type=int, default=32, help="število kandidatov na značilko")
+    parser.add_argument("--folds", type=int, default=0, help="k-kratno navzkrižno preverjanje")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW_S)
+    parser.add_argument("--hop", type=float, default=DEFAULT_HOP_S)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = extract_window_dataset(list(scan_recordings(args.directory)), args.window, args.hop, args.workers)
+    extracted = time.perf_counter()
+    if len(dataset.labels) == 0:
+        print("Ni označenih posnetkov.")
+        return
+    result = calibrate(dataset, args.grid, args.folds)
+    done = time.perf_counter()
+
+    print(f"Oken: {len(dataset.labels)}, kandidatov: {result.candidates}")
+    print(f"Značilke: {extracted - start:.2f} s, iskanje: {done - extracted:.2f} s")
+    print(f"Točnost na učnih oknih: {result.accuracy * 100:.2f}%")
+    if result.fold_accuracies:
+        print(f"Navzkrižno preverjanje ({len(result.fold_accuracies)}-kratno): "
+              f"{np.mean(result.fold_accuracies) * 100:.2f}% ± {np.std(result.fold_accuracies) * 100:.2f}%")
+    print("THRESHOLDS =", json.dumps(result.thresholds, indent=4))
+
+
+if __name__ == "__main__":
+    main()
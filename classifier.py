@@ -0,0 +1,75 @@
+import math
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from features import FeatureAccumulator
+from resample import CHANNELS
+from session import Session
+
+THRESHOLDS = {
+    "Straight": {"std_z": 0.20, "avg_gyro": 0.03},
+    "Up": {"std_z": 0.30, "avg_gyro": 0.045},
+    "Down": {"std_z": 0.22, "avg_gyro": 0.035}
+}
+
+LABELS = ("Straight", "Up", "Down")
+# Koda oznake je indeks v LABELS (enako kot v metrics.ConfusionMatrix)
+LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+_ACCEL_Z = CHANNELS.index("accel_z")
+_GYRO = [CHANNELS.index(channel) for channel in ("gyro_x", "gyro_y", "gyro_z")]
+
+
+def classify(std_z: float, avg_gyro: float) -> str:
+    if std_z > THRESHOLDS["Up"]["std_z"] and avg_gyro > THRESHOLDS["Up"]["avg_gyro"]:
+        return "Up"
+    elif std_z > THRESHOLDS["Down"]["std_z"] and avg_gyro > THRESHOLDS["Down"]["avg_gyro"]:
+        return "Down"
+    return "Straight"
+
+
+def classify_accel(std_z: float) -> str:
+    # Samo pospeškometer (telefon objavlja le sensors/accel): pogoj za žiroskop
+    # se šteje za izpolnjen, odloča STD Z
+    return classify(std_z, math.inf)
+
+
+def classify_batch(std_z: np.ndarray, avg_gyro: np.ndarray) -> np.ndarray:
+    # Ista pravila kot classify, le kot maske čez vse vrstice hkrati; prvi
+    # izpolnjen pogoj zmaga, NaN ni večji od praga in da Straight.
+    std_z = np.asarray(std_z, dtype=np.float64)
+    avg_gyro = np.asarray(avg_gyro, dtype=np.float64)
+    conditions = [(std_z > THRESHOLDS[label]["std_z"]) & (avg_gyro > THRESHOLDS[label]["avg_gyro"])
+                  for label in ("Up", "Down")]
+    return np.select(conditions, [LABEL_CODES["Up"], LABEL_CODES["Down"]],
+                     default=LABEL_CODES["Straight"]).astype(np.int8)
+
+
+def frame_features(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # frames: (okna, dolžina, 6) v vrstnem redu resample.CHANNELS
+    frames = np.asarray(frames)
+    if frames.ndim != 3 or frames.shape[2] != len(CHANNELS):
+        raise ValueError(f"Pričakovana tabela oblike (okna, dolžina, {len(CHANNELS)})")
+    std_z = frames[:, :, _ACCEL_Z].astype(np.float64).std(axis=1)
+    gyro = frames[:, :, _GYRO].astype(np.float64)
+    avg_gyro = np.sqrt(np.einsum("nlc,nlc->nl", gyro, gyro)).mean(axis=1)
+    return std_z, avg_gyro
+
+
+def classify_frames(frames: np.ndarray) -> np.ndarray:
+    return classify_batch(*frame_features(frames))
+
+
+def decode_labels(codes: np.ndarray) -> np.ndarray:
+    return np.array(LABELS, dtype=object)[np.asarray(codes, dtype=np.intp)]
+
+
+def classify_features(features: FeatureAccumulator) -> str:
+    return classify(features.std_z, features.avg_gyro)
+
+
+def classify_chunks(chunks: Iterable[Session]) -> Tuple[str, FeatureAccumulator]:
+    features = FeatureAccumulator()
+    for chunk in chunks:
+        features.update(chunk)
+    return classify_features(features), features
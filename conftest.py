@@ -0,0 +1,2 @@
+# Pytest zaradi te datoteke doda korensko mapo na sys.path, zato testi v
+# tests/ uvozijo module projekta neposredno (import live_service, ...).
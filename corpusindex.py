@@ -0,0 +1,199 @@
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from batch import RecordingInfo, scan_recordings
+from cache import CACHE_DIR_NAME
+from classifier import classify_features
+from features import extract_features
+from hypotesis import duration_in_seconds, estimate_sampling_frequency
+from loaders import load_session
+
+INDEX_DB_NAME = "corpus.sqlite"
+# Povečaj ob spremembi stolpcev ali izračuna, da se indeks zgradi na novo
+INDEX_VERSION = 1
+
+_COLUMNS = ("path", "name", "user", "movement", "recorded_at", "size", "mtime_ns",
+            "start_ms", "end_ms", "duration_s", "accel_count", "gyro_count", "accel_hz", "gyro_hz",
+            "std_z", "avg_gyro", "predicted")
+
+
+class IndexedRecording(NamedTuple):
+    path: str
+    name: str
+    user: str
+    movement: str
+    recorded_at: str
+    size: int
+    mtime_ns: int
+    start_ms: int
+    end_ms: int
+    duration_s: float
+    accel_count: int
+    gyro_count: int
+    accel_hz: float
+    gyro_hz: float
+    std_z: float
+    avg_gyro: float
+    predicted: str
+
+    def info(self) -> RecordingInfo:
+        return RecordingInfo(self.path, self.name, self.user, self.movement, self.recorded_at)
+
+
+def fingerprint(path: str) -> Tuple[int, int]:
+    # (velikost, mtime); za segmentno shrambo (.vrs mapo) vsota velikosti in
+    # najnovejši mtime datotek v njej, ker dopolnjevanje ne spremeni mtime mape.
+    if not os.path.isdir(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    size, mtime = 0, 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            st = os.stat(os.path.join(directory, name))
+            size += st.st_size
+            mtime = max(mtime, st.st_mtime_ns)
+    return size, mtime
+
+
+def _rate(session, sensor_type: str) -> float:
+    try:
+        return float(estimate_sampling_frequency(session, sensor_type))
+    except ZeroDivisionError:
+        # Vsi vzorci z istim časom
+        return 0.0
+
+
+def describe_recording(info: RecordingInfo) -> Tuple:
+    size, mtime_ns = fingerprint(info.path)
+    session = load_session(info.path)
+    features = extract_features(session)
+    timestamps = session.timestamp
+    start_ms = int(timestamps.min()) if len(timestamps) else 0
+    end_ms = int(timestamps.max()) if len(timestamps) else 0
+    return (info.path, info.name, info.user, info.movement, info.recorded_at, size, mtime_ns,
+            start_ms, end_ms, float(duration_in_seconds(session)),
+            session.count("accelerometer"), session.count("gyroscope"),
+            _rate(session, "accelerometer"), _rate(session, "gyroscope"),
+            features.std_z, features.avg_gyro, classify_features(features))
+
+
+def _describe_chunk(infos: List[RecordingInfo]) -> List[Tuple]:
+    return [describe_recording(info) for info in infos]
+
+
+class CorpusIndex:
+    # Poti so shranjene relativno na korensko mapo, da se korpus lahko premakne
+    def __init__(self, root: str, db_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or os.path.join(self.root, CACHE_DIR_NAME, INDEX_DB_NAME)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, timeout=30)
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS recordings")
+            self._db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS recordings ("
+            "path TEXT PRIMARY KEY, name TEXT, user TEXT, movement TEXT, recorded_at TEXT, "
+            "size INTEGER, mtime_ns INTEGER, start_ms INTEGER, end_ms INTEGER, duration_s REAL, "
+            "accel_count INTEGER, gyro_count INTEGER, accel_hz REAL, gyro_hz REAL, "
+            "std_z REAL, avg_gyro REAL, predicted TEXT)")
+        for column in ("user", "movement", "duration_s"):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS recordings_{column} ON recordings ({column})")
+        self._db.commit()
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root)
+
+    def update(self, workers: Optional[int] = 1, chunk_size: int = 16) -> Dict[str, int]:
+        # Ponovno obdela le nove datoteke in tiste, ki jim je spremenjena velikost ali mtime
+        known = {path: (size, mtime) for path, size, mtime in
+                 self._db.execute("SELECT path, size, mtime_ns FROM recordings")}
+        seen = set()
+        stale = []
+        for info in scan_recordings(self.root):
+            rel = self._relative(info.path)
+            seen.add(rel)
+            if known.get(rel) != fingerprint(info.path):
+                stale.append(info)
+
+        if workers == 1 or len(stale) <= chunk_size:
+            rows = _describe_chunk(stale)
+        else:
+            chunks = [stale[i:i + chunk_size] for i in range(0, len(stale), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = [row for part in pool.map(_describe_chunk, chunks) for row in part]
+
+        removed = [(path,) for path in known if path not in seen]
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        self._db.executemany(f"INSERT OR REPLACE INTO recordings VALUES ({placeholders})",
+                             [(self._relative(row[0]),) + row[1:] for row in rows])
+        self._db.executemany("DELETE FROM recordings WHERE path = ?", removed)
+        self._db.commit()
+        return {"indexed": len(rows), "removed": len(removed), "unchanged": len(seen) - len(rows)}
+
+    def query(self, user: Optional[str] = None, movement: Optional[str] = None,
+              min_duration_s: Optional[float] = None, max_duration_s: Optional[float] = None,
+              min_rate_hz: Optional[float] = None) -> List[IndexedRecording]:
+        # min_rate_hz velja za oba senzorja
+        conditions, params = [], []
+        for column, op, value in (("user", "=", user), ("movement", "=", movement),
+                                  ("duration_s", ">=", min_duration_s), ("duration_s", "<=", max_duration_s),
+                                  ("MIN(accel_hz, gyro_hz)", ">=", min_rate_hz)):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM recordings{where} ORDER BY path", params)
+        return [IndexedRecording(os.path.join(self.root, row[0]), *row[1:]) for row in rows]
+
+    def recordings(self, **filters) -> List[RecordingInfo]:
+        return [r.info() for r in self.query(**filters)]
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--user", default=None)
+    parser.add_argument("--movement", default=None)
+    parser.add_argument("--min-duration", type=float, default=None, help="najmanjše trajanje v sekundah")
+    parser.add_argument("--max-duration", type=float, default=None, help="največje trajanje v sekundah")
+    parser.add_argument("--min-rate", type=float, default=None, help="najmanjša frekvenca vzorčenja (Hz)")
+
+
+def filters_from_args(args: argparse.Namespace) -> Dict:
+    return {"user": args.user, "movement": args.movement, "min_duration_s": args.min_duration,
+            "max_duration_s": args.max_duration, "min_rate_hz": args.min_rate}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indeks metapodatkov posnetkov v mapi")
+    parser.add_argument("directory", nargs="?", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument("--workers", type=int, default=None)
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
+    index = CorpusIndex(args.directory)
+    start = time.perf_counter()
+    stats = index.update(args.workers)
+    updated = time.perf_counter()
+    matches = index.query(**filters_from_args(args))
+    done = time.perf_counter()
+
+    for r in matches:
+        print(f"{os.path.relpath(r.path, index.root)}: {r.user} {r.movement} {r.duration_s:.1f} s, "
+              f"{r.accel_hz:.1f}/{r.gyro_hz:.1f} Hz, STD Z {r.std_z:.3f}, AVG GYRO {r.avg_gyro:.3f} -> {r.predicted}")
+    print(f"\nIndeks: {len(index)} posnetkov ({stats['indexed']} obdelanih, {stats['removed']} odstranjenih) "
+          f"v {updated - start:.2f} s; poizvedba: {len(matches)} zadetkov v {(done - updated) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
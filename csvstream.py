@@ -0,0 +1,96 @@
+import warnings
+from typing import Iterator, List
+
+import numpy as np
+
+from session import SENSOR_CODES, SENSOR_TYPES, Session
+
+# saveToCsv: "timestamp,sensorType,x,y,z" in ena vrstica na vzorec
+CSV_HEADER = b"timestamp,sensorType,x,y,z"
+_HEADER_PREFIX = b"timestamp"
+_COLUMNS = 5
+# Ime senzorja zamenjamo s kodo že v bajtih, da ne nastane niz na vrstico
+_SENSOR_BYTES = [(f",{name},".encode("ascii"), f",{SENSOR_CODES[name]},".encode("ascii")) for name in SENSOR_TYPES]
+_COMMA_TO_SPACE = bytes.maketrans(b",", b" ")
+
+
+def parse_block(block: bytes) -> np.ndarray:
+    # Vrne tabelo (vrstice, 5) float64; timestamp v ms je v float64 natančen.
+    lines = block.count(b"\n") + (0 if block.endswith(b"\n") else 1)
+    for name, code in _SENSOR_BYTES:
+        block = block.replace(name, code)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            values = np.fromstring(block.translate(_COMMA_TO_SPACE), dtype=np.float64, sep=" ")
+        except (DeprecationWarning, ValueError):
+            values = None
+    if values is not None and len(values) != lines * _COLUMNS:
+        # Prazne vrstice (tudi "\r") ne vsebujejo vrednosti; štejemo jih le,
+        # ko se števili ne ujemata, da hitra pot ostane brez deljenja vrstic
+        lines = sum(1 for line in block.split(b"\n") if line.strip())
+    if values is None or len(values) != lines * _COLUMNS:
+        raise ValueError("Nepravilna CSV vrstica (neznan tip senzorja ali manjkajoč stolpec)")
+    return values.reshape(lines, _COLUMNS)
+
+
+def _session(rows: np.ndarray) -> Session:
+    sensor = rows[:, 1]
+    if len(sensor) and (sensor.min() < 0 or sensor.max() >= len(SENSOR_TYPES)):
+        raise ValueError("Neznan tip senzorja v CSV")
+    return Session(rows[:, 0].astype(np.int64), sensor.astype(np.int8),
+                   rows[:, 2].astype(np.float32), rows[:, 3].astype(np.float32), rows[:, 4].astype(np.float32))
+
+
+def iter_blocks(file_path: str, buffer_size: int = 1 << 22) -> Iterator[np.ndarray]:
+    # Bere po buffer_size bajtov; nepopolna zadnja vrstica se prenese v naslednji blok.
+    with open(file_path, "rb") as f:
+        rest = b""
+        first = True
+        while True:
+            data = f.read(buffer_size)
+            if not data:
+                break
+            data = rest + data
+            cut = data.rfind(b"\n") + 1
+            if cut == 0:
+                rest = data
+                continue
+            block, rest = data[:cut], data[cut:]
+            if first:
+                first = False
+                if block.startswith(_HEADER_PREFIX):
+                    block = block[block.index(b"\n") + 1:]
+            block = block.strip()
+            if block:
+                yield parse_block(block)
+        rest = rest.strip()
+        if first and rest.startswith(_HEADER_PREFIX):
+            rest = b""
+        if rest:
+            yield parse_block(rest)
+
+
+def iter_chunks(file_path: str, chunk_size: int = 65536, buffer_size: int = 1 << 22) -> Iterator[Session]:
+    pending: List[np.ndarray] = []
+    count = 0
+    for rows in iter_blocks(file_path, buffer_size):
+        pending.append(rows)
+        count += len(rows)
+        if count < chunk_size:
+            continue
+        rows = np.concatenate(pending) if len(pending) > 1 else pending[0]
+        full = len(rows) // chunk_size * chunk_size
+        for start in range(0, full, chunk_size):
+            yield _session(rows[start:start + chunk_size])
+        pending = [rows[full:]] if full < len(rows) else []
+        count = len(rows) - full
+    if count:
+        yield _session(np.concatenate(pending))
+
+
+def parse_csv(file_path: str) -> Session:
+    blocks = list(iter_blocks(file_path))
+    if not blocks:
+        return Session.empty()
+    return _session(np.concatenate(blocks) if len(blocks) > 1 else blocks[0])
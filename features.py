@@ -0,0 +1,175 @@
+import math
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from session import AXES, SENSOR_TYPES, SensorSeries, SessionLike, as_session
+
+
+class AxisStats:
+    # Welfordova varianca po kosih (Chan et al.), da se delne rezultate
+    # lahko združi v poljubnem vrstnem redu.
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> "AxisStats":
+        n = len(values)
+        if n == 0:
+            return self
+        values = np.asarray(values, dtype=np.float64)
+        mean = float(values.mean())
+        delta = values - mean
+        other = AxisStats()
+        other.count = n
+        other.mean = mean
+        other.m2 = float(np.dot(delta, delta))
+        other.min = float(values.min())
+        other.max = float(values.max())
+        return self.merge(other)
+
+    def merge(self, other: "AxisStats") -> "AxisStats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, float]) -> "AxisStats":
+        stats = cls()
+        stats.count = int(data["count"])
+        stats.mean, stats.m2 = float(data["mean"]), float(data["m2"])
+        stats.min, stats.max = float(data["min"]), float(data["max"])
+        return stats
+
+
+class SensorStats:
+    __slots__ = ("axes", "magnitude")
+
+    def __init__(self):
+        self.axes = {axis: AxisStats() for axis in AXES}
+        self.magnitude = AxisStats()
+
+    def update(self, series: SensorSeries) -> "SensorStats":
+        if len(series) == 0:
+            return self
+        for axis in AXES:
+            self.axes[axis].update(series.axis(axis))
+        self.magnitude.update(series.magnitude())
+        return self
+
+    def merge(self, other: "SensorStats") -> "SensorStats":
+        for axis in AXES:
+            self.axes[axis].merge(other.axes[axis])
+        self.magnitude.merge(other.magnitude)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.axes["x"].count
+
+    def min_values(self) -> Dict[str, float]:
+        return {axis: stats.min for axis, stats in self.axes.items()}
+
+    def max_values(self) -> Dict[str, float]:
+        return {axis: stats.max for axis, stats in self.axes.items()}
+
+
+class FeatureAccumulator:
+    __slots__ = ("sensors",)
+
+    def __init__(self):
+        self.sensors = {name: SensorStats() for name in SENSOR_TYPES}
+
+    def update(self, session: SessionLike) -> "FeatureAccumulator":
+        session = as_session(session)
+        for name in SENSOR_TYPES:
+            self.sensors[name].update(session.sensor_series(name))
+        return self
+
+    def merge(self, other: "FeatureAccumulator") -> "FeatureAccumulator":
+        for name in SENSOR_TYPES:
+            self.sensors[name].merge(other.sensors[name])
+        return self
+
+    @property
+    def std_z(self) -> float:
+        return self.sensors["accelerometer"].axes["z"].std
+
+    @property
+    def avg_gyro(self) -> float:
+        return self.sensors["gyroscope"].magnitude.mean
+
+    def min_values(self, sensor_type: str) -> Dict[str, float]:
+        return self.sensors[sensor_type].min_values()
+
+    def max_values(self, sensor_type: str) -> Dict[str, float]:
+        return self.sensors[sensor_type].max_values()
+
+    def copy(self) -> "FeatureAccumulator":
+        return FeatureAccumulator.from_dict(self.to_dict())
+
+    def to_dict(self) -> Dict:
+        return {
+            name: {
+                "axes": {axis: s.to_dict() for axis, s in stats.axes.items()},
+                "magnitude": stats.magnitude.to_dict(),
+            }
+            for name, stats in self.sensors.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FeatureAccumulator":
+        acc = cls()
+        for name, stats in data.items():
+            sensor = acc.sensors[name]
+            sensor.axes = {axis: AxisStats.from_dict(s) for axis, s in stats["axes"].items()}
+            sensor.magnitude = AxisStats.from_dict(stats["magnitude"])
+        return acc
+
+
+def extract_features(session: SessionLike, chunk_size: Optional[int] = None) -> FeatureAccumulator:
+    session = as_session(session)
+    acc = FeatureAccumulator()
+    if not chunk_size:
+        return acc.update(session)
+    for name in SENSOR_TYPES:
+        series = session.sensor_series(name)
+        for start in range(0, len(series), chunk_size):
+            sl = slice(start, start + chunk_size)
+            acc.sensors[name].update(SensorSeries(name, series.timestamp[sl], series.x[sl],
+                                                  series.y[sl], series.z[sl]))
+    return acc
+
+
+def reduce_features(parts: Iterable[FeatureAccumulator]) -> FeatureAccumulator:
+    total = FeatureAccumulator()
+    for part in parts:
+        total.merge(part)
+    return total
@@ -0,0 +1,183 @@
+import io
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from cache import CACHE_DIR_NAME, file_digest
+from features import FeatureAccumulator, extract_features
+from loaders import load_session
+from segstore import is_store, store_digest
+from windows import DEFAULT_HOP_S, DEFAULT_WINDOW_S, window_features
+
+# Povečaj ob vsaki spremembi izračuna značilk, da se stari zapisi ne uporabijo
+FEATURE_SET_VERSION = 2
+FEATURE_DB_NAME = "features.sqlite"
+DEFAULT_MAX_ENTRIES = 4096
+
+WindowArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+Key = Tuple[str, str, str, int]
+
+
+def _encode_session(features: FeatureAccumulator) -> bytes:
+    return json.dumps(features.to_dict()).encode("utf-8")
+
+
+def _decode_session(data: bytes) -> FeatureAccumulator:
+    return FeatureAccumulator.from_dict(json.loads(data.decode("utf-8")))
+
+
+def _encode_windows(arrays: WindowArrays) -> bytes:
+    buf = io.BytesIO()
+    np.savez(buf, start=arrays[0], end=arrays[1], std_z=arrays[2], avg_gyro=arrays[3])
+    return buf.getvalue()
+
+
+def _decode_windows(data: bytes) -> WindowArrays:
+    with np.load(io.BytesIO(data)) as npz:
+        return _readonly(npz["start"], npz["end"], npz["std_z"], npz["avg_gyro"])
+
+
+def _readonly(*arrays: np.ndarray) -> WindowArrays:
+    # Isti objekt dobijo vsi klicatelji, zato ga ne smejo spreminjati
+    for a in arrays:
+        a.setflags(write=False)
+    return tuple(arrays)
+
+
+CODECS: Dict[str, Tuple[Callable, Callable]] = {
+    "session": (_encode_session, _decode_session),
+    "windows": (_encode_windows, _decode_windows),
+}
+
+
+class FeatureStore:
+    # Značilke so shranjene pod (zgoščena vrednost vsebine, vrsta, parametri,
+    # različica), zato se ob spremembi datoteke ali izračuna samodejno
+    # izračunajo na novo. V pomnilniku LRU, po želji še v SQLite datoteki.
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[Key, object]" = OrderedDict()
+        # pot -> (velikost, mtime, zgoščena vrednost), da se vsebina ne zgošča ob vsakem klicu
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS features ("
+                "digest TEXT NOT NULL, kind TEXT NOT NULL, params TEXT NOT NULL, version INTEGER NOT NULL, "
+                "data BLOB NOT NULL, PRIMARY KEY (digest, kind, params, version))")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL)")
+            self._db.commit()
+
+    def _remember(self, key: Key, value: object) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: Key) -> Optional[object]:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            return value
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT data FROM features WHERE digest=? AND kind=? AND params=? AND version=?",
+                               key).fetchone()
+        if row is None:
+            return None
+        value = CODECS[key[1]][1](row[0])
+        self._remember(key, value)
+        return value
+
+    def put(self, key: Key, value: object) -> None:
+        self._remember(key, value)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?)",
+                             key + (CODECS[key[1]][0](value),))
+            self._db.commit()
+
+    def digest(self, file_path: str) -> str:
+        # Vsebino ponovno zgostimo le, če se je spremenila velikost ali mtime;
+        # velja za vse oblike (.json, .csv, .npz, .vra), ne le za predpomnjene
+        if is_store(file_path):
+            return store_digest(file_path)
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        known = self._digests.get(path)
+        if known is None and self._db is not None:
+            known = self._db.execute("SELECT size, mtime_ns, digest FROM digests WHERE path=?", (path,)).fetchone()
+        if known is not None and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            self._digests[path] = tuple(known)
+            return known[2]
+        digest = file_digest(path)
+        self._digests[path] = (st.st_size, st.st_mtime_ns, digest)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)",
+                             (path, st.st_size, st.st_mtime_ns, digest))
+            self._db.commit()
+        return digest
+
+    def memoize(self, file_path: str, kind: str, params: str, compute: Callable[[], object],
+                digest: Optional[str] = None) -> object:
+        key = (digest or self.digest(file_path), kind, params, FEATURE_SET_VERSION)
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def session_features(self, file_path: str, digest: Optional[str] = None) -> FeatureAccumulator:
+        # Kopija: klicatelj lahko akumulator združi ali dopolni, ne da bi pokvaril predpomnilnik
+        compute = lambda: extract_features(load_session(file_path))
+        return self.memoize(file_path, "session", "", compute, digest).copy()
+
+    def window_features(self, file_path: str, window_s: float = DEFAULT_WINDOW_S, hop_s: float = DEFAULT_HOP_S,
+                        digest: Optional[str] = None) -> WindowArrays:
+        compute = lambda: _readonly(*window_features(load_session(file_path), window_s, hop_s))
+        return self.memoize(file_path, "windows", f"{window_s:g}/{hop_s:g}", compute, digest)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM features")
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+_stores: Dict[Tuple[int, str], FeatureStore] = {}
+
+
+def store_for(file_path: str, persist: bool = True) -> FeatureStore:
+    # Ena shramba na mapo in proces; SQLite datoteka je v isti mapi kot
+    # predpomnilnik sej. Če mapa ni zapisljiva, ostane le pomnilniški LRU.
+    directory = os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+    db_path = os.path.join(directory, FEATURE_DB_NAME) if persist else ""
+    # Povezave SQLite ne smejo preiti v otroški proces (fork), zato ključ vsebuje pid
+    key = (os.getpid(), db_path)
+    store = _stores.get(key)
+    if store is None:
+        try:
+            store = FeatureStore(db_path or None)
+        except (OSError, sqlite3.Error):
+            store = FeatureStore()
+        _stores[key] = store
+    return store
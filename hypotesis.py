@@ -1,109 +1,131 @@
 import os
-import json
-import math
-from math import sqrt
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional, Union
 
-THRESHOLDS = {
-    "Straight": {"std_z": 0.20, "avg_gyro": 0.03},
-    "Up": {"std_z": 0.30, "avg_gyro": 0.045},
-    "Down": {"std_z": 0.22, "avg_gyro": 0.035}
-}
+from classifier import THRESHOLDS, classify, classify_chunks
+from features import FeatureAccumulator, extract_features
+from featurestore import store_for
+import archive
+import csvstream
+import jsonstream
+from loaders import load_session
+from metrics import ConfusionMatrix, confusion_from_pairs, print_class_report
+from plots import plot_confusion_matrix, plot_hypothesis
+from profiling import enable_from_env, instrumented
+from windows import DEFAULT_HOP_S, DEFAULT_WINDOW_S, Segment, classify_windows, segments_from_windows
+from spectral import cadence_hz, session_spectral_features, spectral_label
+from session import Session, SensorSeries, SessionLike, as_session, as_series
 
 
-def load_data(file_path: str) -> List[Dict]:
-    with open(file_path, "r") as f:
-        return json.load(f)
+def _result_samples(result, *args, **kwargs) -> int:
+    return len(result)
 
 
-def filter_sensor_data(session: List[Dict], sensor_type: str) -> List[Dict]:
-    return [s for s in session if s["sensorType"] == sensor_type]
+def _input_samples(result, *args, **kwargs) -> int:
+    # Seja je lahko podana pozicijsko ali kot session=...
+    data = args[0] if args else kwargs.get("session")
+    return len(data) if data is not None else 0
 
 
-def calculate_std_dev(values: List[float]) -> float:
-    avg = sum(values) / len(values)
-    return sqrt(sum((x - avg) ** 2 for x in values) / len(values))
+@instrumented("load_data", samples=_result_samples)
+def load_data(file_path: str, use_cache: bool = True) -> Session:
+    return load_session(file_path, use_cache)
 
 
-def calculate_gyro_magnitudes(gyro_data: List[Dict]) -> List[float]:
-    return [sqrt(s["x"] ** 2 + s["y"] ** 2 + s["z"] ** 2) for s in gyro_data]
+@instrumented("filter_sensor_data", samples=_result_samples)
+def filter_sensor_data(session: SessionLike, sensor_type: str) -> SensorSeries:
+    return as_session(session).sensor_series(sensor_type)
 
 
-def analyze_session(session: List[Dict], verbose: bool = False) -> str:
-    accel_data = filter_sensor_data(session, "accelerometer")
-    gyro_data = filter_sensor_data(session, "gyroscope")
+def calculate_std_dev(values: Union[np.ndarray, List[float]]) -> float:
+    return float(np.std(np.asarray(values, dtype=np.float64)))
 
-    z_values = [s["z"] for s in accel_data]
-    std_dev_z = calculate_std_dev(z_values)
 
-    gyro_magnitudes = calculate_gyro_magnitudes(gyro_data)
-    avg_gyro = sum(gyro_magnitudes) / len(gyro_magnitudes)
+def calculate_gyro_magnitudes(gyro_data: Union[SensorSeries, List[Dict]]) -> np.ndarray:
+    return as_series(gyro_data, "gyroscope").magnitude()
+
+
+@instrumented("analyze_session", samples=_input_samples)
+def analyze_session(session: Optional[SessionLike], verbose: bool = False, spectral: bool = False,
+                    features: Optional[FeatureAccumulator] = None) -> str:
+    # Že izračunane značilke (npr. iz shrambe značilk) preskočijo obdelavo signala
+    if features is None:
+        features = extract_features(session)
+    std_dev_z = features.std_z
+    avg_gyro = features.avg_gyro
 
     if verbose:
         print(f"STD Z: {std_dev_z:.3f}, AVG GYRO: {avg_gyro:.3f}")
 
-    if std_dev_z > THRESHOLDS["Up"]["std_z"] and avg_gyro > THRESHOLDS["Up"]["avg_gyro"]:
-        return "Up"
-    elif std_dev_z > THRESHOLDS["Down"]["std_z"] and avg_gyro > THRESHOLDS["Down"]["avg_gyro"]:
-        return "Down"
-    return "Straight"
+    predicted = classify(std_dev_z, avg_gyro)
+    if spectral and predicted == "Straight":
+        # Šibek signal: kadenca v spektru žiroskopa lahko še vedno kaže na stopnice
+        spectrum = session_spectral_features(session)
+        stairs = spectral_label(spectrum)
+        if verbose:
+            print(f"KADENCA: {cadence_hz(spectrum, 'gyro_y'):.2f} Hz, SPEKTER: {stairs or '-'}")
+        predicted = stairs or predicted
 
+    return predicted
 
-def process_file(file_path: str, true_label: str, verbose: bool = False) -> List[Tuple[str, str]]:
-    session = load_data(file_path)
-    predicted = analyze_session(session, verbose)
-    return [(true_label, predicted)]
 
+def analyze_session_windows(session: SessionLike, window_s: float = DEFAULT_WINDOW_S,
+                            hop_s: float = DEFAULT_HOP_S, verbose: bool = False) -> List[Segment]:
+    segments = segments_from_windows(classify_windows(session, window_s, hop_s))
 
-def compute_session_metrics(session: List[Dict]) -> Tuple[float, float, List[float], List[float]]:
-    accel_data = filter_sensor_data(session, "accelerometer")
-    gyro_data = filter_sensor_data(session, "gyroscope")
+    if verbose:
+        for segment in segments:
+            print(f"{segment.start}–{segment.end}: {segment.label}")
 
-    z_values = [s["z"] for s in accel_data]
-    std_dev_z = calculate_std_dev(z_values)
+    return segments
 
-    gyro_magnitudes = calculate_gyro_magnitudes(gyro_data)
-    avg_gyro = sum(gyro_magnitudes) / len(gyro_magnitudes)
 
-    return std_dev_z, avg_gyro, z_values, gyro_magnitudes
+def analyze_file_streaming(file_path: str, chunk_size: int = 65536, verbose: bool = False) -> str:
+    if file_path.lower().endswith(archive.ARCHIVE_EXTENSION):
+        chunks = archive.iter_chunks(file_path)
+    else:
+        stream = csvstream if file_path.lower().endswith(".csv") else jsonstream
+        chunks = stream.iter_chunks(file_path, chunk_size)
+    predicted, features = classify_chunks(chunks)
 
+    if verbose:
+        print(f"STD Z: {features.std_z:.3f}, AVG GYRO: {features.avg_gyro:.3f}")
 
-def get_min_max_values(data: List[Dict], axes: List[str] = ["x", "y", "z"]) -> Dict[str, Dict[str, float]]:
-    return {
-        "min": {axis: min(s[axis] for s in data) for axis in axes},
-        "max": {axis: max(s[axis] for s in data) for axis in axes}
-    }
+    return predicted
 
 
-def plot_hypothesis(z_values: List[float], gyro_mags: List[float], std_z: float,
-                    avg_gyro: float, label: str) -> None:
-    fig, axs = plt.subplots(2, 1, figsize=(12, 6), sharex=True)
-    fig.suptitle(f"Hipotetična analiza – {label}", fontsize=14)
+def process_file(file_path: str, true_label: str, verbose: bool = False,
+                 streaming: bool = False) -> List[Tuple[str, str]]:
+    if streaming:
+        return [(true_label, analyze_file_streaming(file_path, verbose=verbose))]
+    session = load_data(file_path)
+    predicted = analyze_session(session, verbose)
+    return [(true_label, predicted)]
+
+
+@instrumented("features", samples=_input_samples)
+def compute_session_metrics(session: SessionLike) -> Tuple[float, float, np.ndarray, np.ndarray]:
+    session = as_session(session)
+    features = extract_features(session)
 
-    axs[0].plot(z_values, label="Accelerometer Z")
-    threshold = THRESHOLDS[label]["std_z"]
-    axs[0].axhline(threshold, color='red', linestyle='--', label=f"Meja STD Z = {threshold}")
-    axs[0].set_ylabel("Z-pospešek [m/s²]")
-    axs[0].legend()
-    axs[0].grid(True)
+    z_values = filter_sensor_data(session, "accelerometer").z
+    gyro_magnitudes = calculate_gyro_magnitudes(filter_sensor_data(session, "gyroscope"))
 
-    axs[1].plot(gyro_mags, label="Gyro Magnituda")
-    gyro_th = THRESHOLDS[label]["avg_gyro"]
-    axs[1].axhline(gyro_th, color='purple', linestyle='--', label=f"Meja GYRO = {gyro_th}")
-    axs[1].set_ylabel("Kotna hitrost [rad/s]")
-    axs[1].set_xlabel("Vzorec")
-    axs[1].legend()
-    axs[1].grid(True)
+    return features.std_z, features.avg_gyro, z_values, gyro_magnitudes
 
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.show()
+
+def get_min_max_values(data: Union[SensorSeries, List[Dict]],
+                       axes: List[str] = ["x", "y", "z"]) -> Dict[str, Dict[str, float]]:
+    data = as_series(data)
+    return {
+        "min": {axis: float(np.min(data.axis(axis))) for axis in axes},
+        "max": {axis: float(np.max(data.axis(axis))) for axis in axes}
+    }
 
 
 def test_hypothesis(label: str, std_z: float, avg_gyro: float,
-                    z_values: List[float], gyro_mags: List[float]) -> None:
+                    z_values: Union[np.ndarray, List[float]], gyro_mags: Union[np.ndarray, List[float]],
+                    plot: bool = True) -> None:
     print(f"\n--- {label.upper()} ---")
     print(f"STD Z = {std_z:.3f}, AVG GYRO = {avg_gyro:.3f}")
 
@@ -112,57 +134,52 @@ def test_hypothesis(label: str, std_z: float, avg_gyro: float,
     print(f"H{['1', '2', '3'][['Straight', 'Up', 'Down'].index(label)]}:",
           "potrjena" if hypothesis_result else "zavrnjena")
 
-    plot_hypothesis(z_values, gyro_mags, std_z, avg_gyro, label)
-
+    if plot:
+        plot_hypothesis(z_values, gyro_mags, std_z, avg_gyro, label)
 
-def calculate_metrics(results: List[Tuple[str, str]]) -> None:
-    labels = sorted({t for t, _ in results} | {p for _, p in results})
-    label_to_index = {label: i for i, label in enumerate(labels)}
 
-    matrix = np.zeros((len(labels), len(labels)), dtype=int)
-    for true, pred in results:
-        matrix[label_to_index[true]][label_to_index[pred]] += 1
+@instrumented("calculate_metrics", samples=lambda matrix, *a, **k: matrix.total)
+def calculate_metrics(results: Union[Iterable[Tuple[str, str]], ConfusionMatrix], plot: bool = True) -> ConfusionMatrix:
+    # results so lahko pari (prava, napovedana) ali že zbrana ConfusionMatrix
+    if not isinstance(results, ConfusionMatrix):
+        results = confusion_from_pairs(results)
+    cm = results.observed()
+    labels, matrix = cm.labels, cm.counts
 
     print("\n--- Konfuzijska matrika ---")
     for i, true_label in enumerate(labels):
         row = "\t".join(str(matrix[i][j]) for j in range(len(labels)))
         print(f"{true_label:>7}: {row}")
 
-    plt.figure(figsize=(6, 5))
-    sns.heatmap(matrix, annot=True, fmt="d", cmap="Blues",
-                xticklabels=labels, yticklabels=labels)
-    plt.xlabel("Napovedana oznaka")
-    plt.ylabel("Prava oznaka")
-    plt.title("Konfuzijska matrika")
-    plt.tight_layout()
-    plt.show()
+    if plot:
+        plot_confusion_matrix(matrix, labels)
 
-    correct = np.trace(matrix)
-    total = np.sum(matrix)
-    accuracy = correct / total * 100
-    print(f"\nSkupna točnost: {accuracy:.2f}% ({correct}/{total})")
+    if cm.total == 0:
+        return cm
+    print(f"\nSkupna točnost: {cm.accuracy * 100:.2f}% ({cm.correct}/{cm.total})")
 
     print("\n--- Preciznost po razredih ---")
-    for i, label in enumerate(labels):
-        tp = matrix[i][i]
-        fp = sum(matrix[j][i] for j in range(len(labels)) if j != i)
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+    for label, precision in zip(labels, cm.precision()):
         print(f"{label:>7}: {precision:.2f}")
 
+    print_class_report(cm)
+    return cm
+
 
-def duration_in_seconds(session: List[Dict]) -> float:
-    timestamps = [s["timestamp"] for s in session]
-    return (max(timestamps) - min(timestamps)) / 1000 if timestamps else 0
+def duration_in_seconds(session: SessionLike) -> float:
+    timestamps = as_session(session).timestamp
+    return (int(timestamps.max()) - int(timestamps.min())) / 1000 if len(timestamps) else 0
 
 
-def estimate_sampling_frequency(session: List[Dict], sensor_type: str = "accelerometer") -> float:
-    timestamps = [s["timestamp"] for s in session if s["sensorType"] == sensor_type]
+def estimate_sampling_frequency(session: SessionLike, sensor_type: str = "accelerometer") -> float:
+    timestamps = filter_sensor_data(session, sensor_type).timestamp
     if len(timestamps) < 2:
         return 0
-    return len(timestamps) / ((timestamps[-1] - timestamps[0]) / 1000)
+    return len(timestamps) / ((int(timestamps[-1]) - int(timestamps[0])) / 1000)
 
 
-def main():
+def main(plot: bool = True, spectral: bool = False):
+    enable_from_env()
     base_dir = os.path.dirname(__file__)
     files = {
         "Straight": os.path.join(base_dir, "ex1_andrea_Straight_20250516_232111.json"),
@@ -177,28 +194,36 @@ def main():
             print(f"Manjka datoteka za: {label}")
             continue
 
-        results = process_file(path, label, verbose=True)
-        all_results.extend(results)
+        # Značilke iz shrambe; signal naložimo le za grafe in spektralno pravilo
+        features = store_for(path).session_features(path)
+        session = load_data(path) if plot or spectral else None
+        all_results.append((label, analyze_session(session, verbose=True, spectral=spectral, features=features)))
 
-        session = load_data(path)
-        std_z, avg_gyro, z_values, gyro_mags = compute_session_metrics(session)
-        test_hypothesis(label, std_z, avg_gyro, z_values, gyro_mags)
+        if session is not None:
+            z_values = filter_sensor_data(session, "accelerometer").z
+            gyro_mags = calculate_gyro_magnitudes(filter_sensor_data(session, "gyroscope"))
+        else:
+            z_values = gyro_mags = np.empty(0)
+        test_hypothesis(label, features.std_z, features.avg_gyro, z_values, gyro_mags, plot)
 
-        accel_data = filter_sensor_data(session, "accelerometer")
-        gyro_data = filter_sensor_data(session, "gyroscope")
-
-        print("Pospeskometer MIN:", get_min_max_values(accel_data)["min"])
-        print("Pospeskometer MAX:", get_min_max_values(accel_data)["max"])
-        print("Ziroskop MIN:", get_min_max_values(gyro_data)["min"])
-        print("Ziroskop MAX:", get_min_max_values(gyro_data)["max"])
+        print("Pospeskometer MIN:", features.min_values("accelerometer"))
+        print("Pospeskometer MAX:", features.max_values("accelerometer"))
+        print("Ziroskop MIN:", features.min_values("gyroscope"))
+        print("Ziroskop MAX:", features.max_values("gyroscope"))
 
     print("\n--- Rezultati klasifikacije ---")
     for true_label, predicted_label in all_results:
         print(f"True: {true_label}, Predicted: {predicted_label}")
 
     if all_results:
-        calculate_metrics(all_results)
+        calculate_metrics(all_results, plot)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Preverjanje hipotez za posnetke ex1")
+    parser.add_argument("--no-plot", action="store_true", help="brez grafov (samo klasifikacija in metrike)")
+    parser.add_argument("--spectral", action="store_true", help="dodatno pravilo na podlagi spektra (kadenca)")
+    args = parser.parse_args()
+    main(plot=not args.no_plot, spectral=args.spectral)
\ No newline at end of file
@@ -0,0 +1,346 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from classifier import LABELS, classify_batch
+from live_service import ServiceStats
+from loaders import load_session
+from profiling import enable_from_env, instrumented
+from session import Session
+from windows import DEFAULT_WINDOW_S
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Najdaljši čas, ko prva zahteva v paketu čaka na druge
+DEFAULT_BUDGET_MS = 5.0
+DEFAULT_MAX_BATCH = 256
+DEFAULT_QUEUE_SIZE = 10000
+# Zahteva, ki v tem času ne dobi ocene, vrne 503 (npr. če zanka paketov zaostaja)
+DEFAULT_TIMEOUT_S = 10.0
+MAX_BODY_BYTES = 16 << 20
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+Pending = Tuple[float, Session, asyncio.Future]
+
+
+def decode_request(body: bytes) -> Session:
+    # Seznam vzorcev v obliki SensorData ali {"samples": [...]}
+    data = json.loads(body)
+    records = data.get("samples") if isinstance(data, dict) else data
+    if not isinstance(records, list):
+        raise ValueError("Pričakovan seznam vzorcev")
+    session = Session.from_records(records)
+    # Brez žiroskopa odloča le STD Z, enako kot v živi storitvi (classify_accel)
+    if session.count("accelerometer") == 0:
+        raise ValueError("Zahteva mora vsebovati vzorce pospeškometra")
+    return session
+
+
+def batch_features(sessions: List[Session]) -> Tuple[np.ndarray, np.ndarray]:
+    # STD Z in AVG GYRO za vse seje hkrati: vzorce zložimo v en stolpec in
+    # seštevamo po seji z np.bincount (populacijski std kot extract_features).
+    # Seja brez žiroskopa ima avg_gyro NaN.
+    n = len(sessions)
+    accel = [s.accelerometer for s in sessions]
+    gyro = [s.gyroscope for s in sessions]
+    n_accel = np.fromiter((len(a) for a in accel), dtype=np.int64, count=n)
+    n_gyro = np.fromiter((len(g) for g in gyro), dtype=np.int64, count=n)
+
+    owner = np.repeat(np.arange(n), n_accel)
+    z = np.concatenate([a.z for a in accel]).astype(np.float64)
+    mean = np.bincount(owner, z, minlength=n) / n_accel
+    dz = z - mean[owner]
+    std_z = np.sqrt(np.bincount(owner, dz * dz, minlength=n) / n_accel)
+
+    owner = np.repeat(np.arange(n), n_gyro)
+    magnitude = np.concatenate([g.magnitude() for g in gyro])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_gyro = np.bincount(owner, magnitude, minlength=n) / n_gyro
+    return std_z, avg_gyro
+
+
+def _response(status: int, payload: Dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+class InferenceServer:
+    # Zahteve iz vseh povezav gredo v eno vrsto; zanka paketov jih zbira do
+    # budget_ms od prve (ali do max_batch) in jih oceni skupaj.
+    def __init__(self, budget_ms: float = DEFAULT_BUDGET_MS, max_batch: int = DEFAULT_MAX_BATCH,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, timeout_s: float = DEFAULT_TIMEOUT_S):
+        self.budget_s = budget_ms / 1000
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+        self.timeout_s = timeout_s
+        self.stats = ServiceStats()
+        self.batches = 0
+        self.batched_requests = 0
+        self.max_batch_seen = 0
+        # Predal i šteje pakete velikosti [2**i, 2**(i+1))
+        self._batch_sizes = np.zeros(max(1, max_batch.bit_length()), dtype=np.int64)
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> int:
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+
+    async def classify(self, session: Session) -> Dict:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((time.perf_counter(), session, future))
+        return await asyncio.wait_for(future, self.timeout_s)
+
+    async def _batch_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = batch[0][0] + self.budget_s
+            while len(batch) < self.max_batch:
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                remaining = deadline - time.perf_counter()
+                if len(batch) >= self.max_batch or remaining <= 0:
+                    break
+                # Čakamo na naslednjo zahtevo do roka prve v paketu
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                self._score(batch)
+            except Exception as e:
+                # Napaka v enem paketu ne sme ustaviti zanke, sicer bi vse
+                # nadaljnje zahteve čakale v nedogled
+                self.stats.errors += len(batch)
+                print(f"Napaka pri oceni paketa ({len(batch)} zahtev): {e!r}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    @instrumented("inference_batch", samples=lambda result, self, batch: sum(len(p[1]) for p in batch))
+    def _score(self, batch: List[Pending]) -> None:
+        std_z, avg_gyro = batch_features([session for _, session, _ in batch])
+        no_gyro = np.isnan(avg_gyro)
+        codes = classify_batch(std_z, np.where(no_gyro, np.inf, avg_gyro))
+        done = time.perf_counter()
+        for i, (received_at, session, future) in enumerate(batch):
+            if future.cancelled():
+                continue
+            future.set_result({"label": LABELS[codes[i]], "std_z": float(std_z[i]),
+                               "avg_gyro": None if no_gyro[i] else float(avg_gyro[i]), "samples": len(session),
+                               "batch_size": len(batch)})
+            self.stats.record_latency(done - received_at)
+        self.stats.processed += len(batch)
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self._batch_sizes[min(len(batch).bit_length() - 1, len(self._batch_sizes) - 1)] += 1
+
+    def metrics(self) -> Dict:
+        report = self.stats.report()
+        report.update({
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "batch_size_histogram": {f"{1 << i}-{(1 << (i + 1)) - 1}": int(c)
+                                     for i, c in enumerate(self._batch_sizes) if c},
+            "latency_budget_ms": self.budget_s * 1000,
+        })
+        return report
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if path == "/classify" and method == "POST":
+            self.stats.received += 1
+            try:
+                session = decode_request(body)
+            except (ValueError, KeyError, TypeError, OverflowError) as e:
+                # OverflowError: timestamp ne gre v int64 (npr. 1e30)
+                self.stats.errors += 1
+                return 400, {"error": str(e)}
+            try:
+                return 200, await self.classify(session)
+            except asyncio.QueueFull:
+                self.stats.dropped += 1
+                return 503, {"error": "Vrsta zahtev je polna"}
+            except asyncio.TimeoutError:
+                self.stats.errors += 1
+                return 503, {"error": "Ocena ni bila končana pravočasno"}
+            except Exception as e:
+                # Napako je že štela zanka paketov
+                return 500, {"error": str(e)}
+        if path == "/metrics" and method == "GET":
+            return 200, self.metrics()
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok"}
+        return 404, {"error": f"{method} {path} ne obstaja"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Minimalni HTTP/1.1 s trajnimi povezavami; dovolj za lokalne odjemalce
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                method, path, version = request_line.split(" ", 2)
+                headers = {name.strip().lower(): value.strip()
+                           for name, _, value in (line.partition(":") for line in header_lines)}
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    writer.write(_response(413, {"error": "Zahteva je prevelika"}, False))
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, path, body)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                   body: bytes = b"") -> Tuple[int, Dict]:
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    status = int(head.split(" ", 2)[1])
+    length = next(int(line.split(":", 1)[1]) for line in head.split("\r\n")
+                  if line.lower().startswith("content-length:"))
+    return status, json.loads(await reader.readexactly(length))
+
+
+def window_payloads(files: List[str], window_s: float = DEFAULT_WINDOW_S) -> List[bytes]:
+    # Posnetke razreže na okna in vsako okno pripravi kot telo zahteve
+    payloads = []
+    window_ms = int(window_s * 1000)
+    for file_path in files:
+        records = load_session(file_path).to_records()
+        if not records:
+            continue
+        t0 = records[0]["timestamp"]
+        windows: Dict[int, List[Dict]] = {}
+        for r in records:
+            windows.setdefault((r["timestamp"] - t0) // window_ms, []).append(r)
+        payloads.extend(json.dumps(w).encode("utf-8") for w in windows.values())
+    return payloads
+
+
+async def load_test(host: str, port: int, payloads: List[bytes], clients: int = 32,
+                    requests_per_client: int = 50) -> Dict:
+    latencies: List[float] = []
+    failures = 0
+
+    async def client(index: int) -> None:
+        nonlocal failures
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in range(requests_per_client):
+                body = payloads[(index * requests_per_client + i) % len(payloads)]
+                start = time.perf_counter()
+                status, _ = await _request(reader, writer, "POST", "/classify", body)
+                latencies.append(time.perf_counter() - start)
+                failures += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_metrics = await _request(reader, writer, "GET", "/metrics")
+    writer.close()
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99]) if latencies else (0.0, 0.0)
+    return {
+        "requests": len(latencies),
+        "errors": failures,
+        "elapsed_s": elapsed,
+        "throughput_req_s": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "client_latency_p50_ms": float(p50),
+        "client_latency_p99_ms": float(p99),
+        "server": server_metrics,
+    }
+
+
+async def _serve(host: str, port: int, budget_ms: float, max_batch: int) -> None:
+    server = InferenceServer(budget_ms, max_batch)
+    port = await server.start(host, port)
+    print(f"Strežnik posluša na http://{host}:{port} (POST /classify, GET /metrics)")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(json.dumps(server.metrics()))
+    finally:
+        await server.stop()
+
+
+async def _load_test(files: List[str], host: str, port: int, budget_ms: float, max_batch: int,
+                     clients: int, requests_per_client: int, in_process: bool) -> None:
+    server = None
+    if in_process:
+        server = InferenceServer(budget_ms, max_batch)
+        port = await server.start(host, 0)
+    try:
+        report = await load_test(host, port, window_payloads(files), clients, requests_per_client)
+    finally:
+        if server is not None:
+            await server.stop()
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalni HTTP strežnik za klasifikacijo z združevanjem zahtev")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="največje čakanje na zapolnitev paketa")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--load-test", nargs="*", metavar="FILE",
+                        help="obremenilni test z okni iz podanih posnetkov")
+    parser.add_argument("--in-process", action="store_true",
+                        help="pri obremenilnem testu zaženi strežnik v istem procesu")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="število zahtev na odjemalca")
+    args = parser.parse_args()
+    enable_from_env()
+
+    if args.load_test is not None:
+        files = args.load_test or ["ex1_andrea_Straight_20250516_232111.json",
+                                   "ex1_andrea_Up_20250516_231912.json",
+                                   "ex1_andrea_Down_20250516_232014.json"]
+        asyncio.run(_load_test(files, args.host, args.port, args.budget_ms, args.max_batch,
+                               args.clients, args.requests, args.in_process))
+    else:
+        asyncio.run(_serve(args.host, args.port, args.budget_ms, args.max_batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import json
+from typing import Dict, Iterator
+
+from session import SENSOR_CODES, Session
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_samples(file_path: str, buffer_size: int = 1 << 16) -> Iterator[Dict]:
+    # Bere JSON tabelo, ki jo zapiše saveToJson, objekt za objektom, tako da
+    # je v pomnilniku naenkrat le en medpomnilnik datoteke.
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        started = False
+        eof = False
+
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+
+            if pos >= len(buf):
+                if eof:
+                    break
+                buf = f.read(buffer_size)
+                pos = 0
+                eof = not buf
+                continue
+
+            ch = buf[pos]
+            if not started:
+                if ch != "[":
+                    raise ValueError(f"{file_path}: pričakovana JSON tabela")
+                started = True
+                pos += 1
+                continue
+            if ch == ",":
+                pos += 1
+                continue
+            if ch == "]":
+                return
+
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(buffer_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield obj
+            pos = end
+
+    if started:
+        raise ValueError(f"{file_path}: nepopolna JSON tabela")
+    raise ValueError(f"{file_path}: prazna datoteka")
+
+
+def iter_chunks(file_path: str, chunk_size: int = 65536, buffer_size: int = 1 << 16) -> Iterator[Session]:
+    timestamp, sensor, x, y, z = [], [], [], [], []
+
+    for s in iter_samples(file_path, buffer_size):
+        try:
+            sensor.append(SENSOR_CODES[s["sensorType"]])
+        except KeyError:
+            raise ValueError(f"Neznan tip senzorja: {s['sensorType']}") from None
+        timestamp.append(s["timestamp"])
+        x.append(s["x"])
+        y.append(s["y"])
+        z.append(s["z"])
+        if len(timestamp) == chunk_size:
+            yield Session(timestamp, sensor, x, y, z)
+            timestamp, sensor, x, y, z = [], [], [], [], []
+
+    if timestamp:
+        yield Session(timestamp, sensor, x, y, z)
@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+import zlib
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from loaders import load_session
+from segstore import STORE_EXTENSION, SegmentWriter
+from windows import DEFAULT_HOP_S, DEFAULT_WINDOW_S, SlidingWindowClassifier
+
+SENSOR_TOPIC = "sensors/#"
+RESULTS_TOPIC = "results"
+TOPIC_SENSORS = {"accel": "accelerometer", "gyro": "gyroscope",
+                 "accelerometer": "accelerometer", "gyroscope": "gyroscope"}
+
+Sample = Tuple[str, int, float, float, float]
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    pattern_parts = pattern.split("/")
+    topic_parts = topic.split("/")
+    for i, part in enumerate(pattern_parts):
+        if part == "#":
+            return True
+        if i >= len(topic_parts) or (part != "+" and part != topic_parts[i]):
+            return False
+    return len(pattern_parts) == len(topic_parts)
+
+
+def decode_payload(topic: str, payload: bytes) -> Tuple[str, List[Sample]]:
+    # Telefon objavi {"x","y","z","timestamp","movement","user"} na sensors/accel;
+    # sprejmemo tudi seznam vzorcev v obliki SensorData in naprave v temi
+    # (sensors/<naprava>/<senzor>).
+    data = json.loads(payload)
+    records = data if isinstance(data, list) else [data]
+    parts = topic.split("/")
+    topic_sensor = TOPIC_SENSORS.get(parts[-1])
+    topic_device = parts[1] if len(parts) > 2 else None
+
+    device = None
+    samples = []
+    for r in records:
+        sensor_type = r.get("sensorType") or topic_sensor
+        if sensor_type not in ("accelerometer", "gyroscope"):
+            raise ValueError(f"Neznan tip senzorja v temi {topic}")
+        device = device or r.get("device") or r.get("user") or topic_device
+        samples.append((sensor_type, int(r["timestamp"]), float(r["x"]), float(r["y"]), float(r["z"])))
+    return device or "default", samples
+
+
+class InProcessBroker:
+    # Nadomestek za mosquitto pri testiranju: sporočila gredo neposredno v
+    # asyncio vrste naročnikov.
+    def __init__(self):
+        self._subscriptions: List[Tuple[str, asyncio.Queue]] = []
+
+    async def subscribe(self, pattern: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscriptions.append((pattern, queue))
+        return queue
+
+    async def publish(self, topic: str, payload: bytes) -> None:
+        for pattern, queue in self._subscriptions:
+            if topic_matches(pattern, topic):
+                queue.put_nowait((topic, payload))
+
+    async def close(self) -> None:
+        self._subscriptions.clear()
+
+
+class PahoBroker:
+    def __init__(self, host: str, port: int = 1883):
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError as e:
+            raise RuntimeError("Za povezavo na MQTT strežnik je potreben paket paho-mqtt") from e
+        self._mqtt = mqtt
+        self.host = host
+        self.port = port
+        self._client = None
+        self._loop = None
+        self._subscriptions: List[Tuple[str, asyncio.Queue]] = []
+
+    async def connect(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._client = self._mqtt.Client()
+        self._client.on_message = self._on_message
+        self._client.connect(self.host, self.port)
+        self._client.loop_start()
+
+    def _on_message(self, client, userdata, message) -> None:
+        for pattern, queue in self._subscriptions:
+            if topic_matches(pattern, message.topic):
+                self._loop.call_soon_threadsafe(queue.put_nowait, (message.topic, message.payload))
+
+    async def subscribe(self, pattern: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscriptions.append((pattern, queue))
+        self._client.subscribe(pattern)
+        return queue
+
+    async def publish(self, topic: str, payload: bytes) -> None:
+        self._client.publish(topic, payload)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            self._client.loop_stop()
+            self._client.disconnect()
+
+
+class ServiceStats:
+    def __init__(self, latency_samples: int = 10000):
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.published = 0
+        self.resets = 0
+        self.started = time.perf_counter()
+        self._latencies = deque(maxlen=latency_samples)
+
+    def record_latency(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+
+    def report(self) -> Dict[str, float]:
+        elapsed = time.perf_counter() - self.started
+        latencies = np.array(self._latencies, dtype=np.float64) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "published": self.published,
+            "resets": self.resets,
+            "throughput_msg_s": self.processed / elapsed if elapsed > 0 else 0.0,
+            "latency_p50_ms": float(p50),
+            "latency_p99_ms": float(p99),
+            "latency_max_ms": float(latencies.max()) if len(latencies) else 0.0,
+        }
+
+
+class LiveClassificationService:
+    def __init__(self, broker, workers: int = 4, queue_size: int = 10000,
+                 window_s: float = DEFAULT_WINDOW_S, hop_s: float = DEFAULT_HOP_S,
+                 sensor_topic: str = SENSOR_TOPIC, results_topic: str = RESULTS_TOPIC,
+                 drop_when_full: bool = True, record_dir: Optional[str] = None,
+                 max_jump_s: Optional[float] = None):
+        self.broker = broker
+        self.window_s = window_s
+        self.hop_s = hop_s
+        # Skok časa naprave (naprej ali nazaj), po katerem se njeno okno začne znova
+        self.max_jump_ms = int(round((max_jump_s if max_jump_s is not None else 10 * window_s) * 1000))
+        self.sensor_topic = sensor_topic
+        self.results_topic = results_topic
+        self.drop_when_full = drop_when_full
+        self.stats = ServiceStats()
+        # Vsaka naprava je vedno na istem delavcu, zato ostane vrstni red vzorcev
+        self._queues = [asyncio.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._classifiers: Dict[str, SlidingWindowClassifier] = {}
+        self._last_timestamp: Dict[str, int] = {}
+        # Z record_dir se vsaka naprava sproti dopolnjuje v <naprava>.vrs
+        self.record_dir = record_dir
+        self._recorders: Dict[str, SegmentWriter] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._inbox: Optional[asyncio.Queue] = None
+
+    def _queue_for(self, device: str) -> asyncio.Queue:
+        return self._queues[zlib.crc32(device.encode("utf-8")) % len(self._queues)]
+
+    async def start(self) -> None:
+        self._inbox = await self.broker.subscribe(self.sensor_topic)
+        self._tasks.append(asyncio.create_task(self._receive(self._inbox)))
+        self._tasks.extend(asyncio.create_task(self._work(q)) for q in self._queues)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        loop = asyncio.get_running_loop()
+        for recorder in self._recorders.values():
+            await loop.run_in_executor(None, recorder.close)
+        self._recorders.clear()
+
+    def _record(self, device: str, samples: List[Sample]) -> None:
+        recorder = self._recorders.get(device)
+        if recorder is None:
+            name = device.replace(os.sep, "_") + STORE_EXTENSION
+            recorder = SegmentWriter(os.path.join(self.record_dir, name))
+            self._recorders[device] = recorder
+        recorder.append_samples(samples)
+
+    async def drain(self) -> None:
+        if self._inbox is not None:
+            await self._inbox.join()
+        for queue in self._queues:
+            await queue.join()
+
+    async def _receive(self, inbox: asyncio.Queue) -> None:
+        while True:
+            topic, payload = await inbox.get()
+            received_at = time.perf_counter()
+            self.stats.received += 1
+            try:
+                device, samples = decode_payload(topic, payload)
+            except (ValueError, KeyError, TypeError):
+                self.stats.errors += 1
+                inbox.task_done()
+                continue
+
+            queue = self._queue_for(device)
+            if queue.full() and self.drop_when_full:
+                # Pri živih podatkih je najnovejši vzorec pomembnejši od najstarejšega
+                queue.get_nowait()
+                queue.task_done()
+                self.stats.dropped += 1
+            await queue.put((received_at, device, samples))
+            inbox.task_done()
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            received_at, device, samples = await queue.get()
+            try:
+                classifier = self._classifiers.get(device)
+                if classifier is None:
+                    classifier = SlidingWindowClassifier(self.window_s, self.hop_s)
+                    self._classifiers[device] = classifier
+                if self.record_dir:
+                    # Pisanje in fsync ne smeta ustaviti zanke dogodkov; naprava je
+                    # vedno na tem delavcu, zato vrstni red zapisov ostane enak.
+                    await loop.run_in_executor(None, self._record, device, samples)
+                for sample in samples:
+                    last = self._last_timestamp.get(device)
+                    if last is not None and abs(sample[1] - last) > self.max_jump_ms:
+                        # Npr. ponovna povezava po ponastavitvi ure: preskočenih
+                        # korakov ne obdelujemo, okno naprave začnemo znova
+                        self.stats.resets += 1
+                        print(f"Naprava {device}: skok časa {sample[1] - last} ms, okno ponastavljeno")
+                        classifier = SlidingWindowClassifier(self.window_s, self.hop_s)
+                        self._classifiers[device] = classifier
+                    self._last_timestamp[device] = sample[1]
+                    for window in classifier.push(*sample):
+                        await self._publish(device, window)
+                self.stats.processed += 1
+                self.stats.record_latency(time.perf_counter() - received_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Napaka pri enem sporočilu ne sme ustaviti delavca, sicer se
+                # njegova vrsta napolni in drain() nikoli ne konča.
+                self.stats.errors += 1
+                print(f"Napaka pri obdelavi sporočila naprave {device}: {e!r}")
+            finally:
+                queue.task_done()
+
+    async def _publish(self, device: str, window) -> None:
+        payload = json.dumps({
+            "device": device,
+            "start": window.start,
+            "end": window.end,
+            "label": window.label,
+            "std_z": round(window.std_z, 5),
+            # Brez žiroskopa v oknu (telefon objavlja le sensors/accel) je null
+            "avg_gyro": None if math.isnan(window.avg_gyro) else round(window.avg_gyro, 5),
+        }).encode("utf-8")
+        await self.broker.publish(f"{self.results_topic}/{device}", payload)
+        self.stats.published += 1
+
+
+async def replay_session(broker, file_path: str, device: str, speed: Optional[float] = None) -> int:
+    records = load_session(file_path).to_records()
+    previous = None
+    for r in records:
+        if speed and previous is not None:
+            await asyncio.sleep((r["timestamp"] - previous) / 1000 / speed)
+        previous = r["timestamp"]
+        topic = f"sensors/{device}/{'accel' if r['sensorType'] == 'accelerometer' else 'gyro'}"
+        await broker.publish(topic, json.dumps(r).encode("utf-8"))
+    return len(records)
+
+
+async def _demo(files: List[str], devices: int, workers: int, record_dir: Optional[str] = None) -> None:
+    broker = InProcessBroker()
+    # Posnetki se predvajajo hitreje od realnega časa, zato raje čakamo kot zavržemo
+    service = LiveClassificationService(broker, workers=workers, drop_when_full=False, record_dir=record_dir)
+    results = await broker.subscribe(f"{RESULTS_TOPIC}/#")
+    await service.start()
+
+    await asyncio.gather(*(replay_session(broker, files[i % len(files)], f"device{i}")
+                           for i in range(devices)))
+    await service.drain()
+    await service.stop()
+
+    labels: Dict[str, List[str]] = {}
+    while not results.empty():
+        topic, payload = results.get_nowait()
+        message = json.loads(payload)
+        labels.setdefault(message["device"], []).append(message["label"])
+    for device in sorted(labels)[:10]:
+        print(f"{device}: {labels[device][-1]} ({len(labels[device])} oken)")
+    print(json.dumps(service.stats.report(), indent=2))
+
+
+async def _serve(host: str, port: int, workers: int, record_dir: Optional[str] = None) -> None:
+    broker = PahoBroker(host, port)
+    await broker.connect()
+    service = LiveClassificationService(broker, workers=workers, record_dir=record_dir)
+    await service.start()
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(json.dumps(service.stats.report()))
+    finally:
+        await service.stop()
+        await broker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sprotna klasifikacija hoje iz MQTT podatkov")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--demo", nargs="*", metavar="FILE",
+                        help="brez strežnika: predvajaj posnetke prek lokalnega posrednika")
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--record", default=None, metavar="DIR",
+                        help="sproti shranjuj prejete vzorce v segmentno shrambo (<naprava>.vrs)")
+    args = parser.parse_args()
+
+    if args.demo is not None:
+        files = args.demo or ["ex1_andrea_Straight_20250516_232111.json",
+                              "ex1_andrea_Up_20250516_231912.json",
+                              "ex1_andrea_Down_20250516_232014.json"]
+        asyncio.run(_demo(files, args.devices, args.workers, args.record))
+    else:
+        asyncio.run(_serve(args.host, args.port, args.workers, args.record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import json
+import os
+
+import numpy as np
+
+from archive import ARCHIVE_EXTENSION, read_archive
+from cache import cache_for
+from csvstream import parse_csv
+from segstore import STORE_EXTENSION, load_store
+from session import Session
+
+
+def parse_json(file_path: str) -> Session:
+    with open(file_path, "r") as f:
+        return Session.from_records(json.load(f))
+
+
+def load_npz(file_path: str) -> Session:
+    with np.load(file_path) as data:
+        return Session(data["timestamp"], data["sensor"], data["x"], data["y"], data["z"])
+
+
+# Besedilni zapisi gredo skozi predpomnilnik; oblika se izbere po končnici
+PARSERS = {".json": parse_json, ".csv": parse_csv}
+
+
+def parser_for(file_path: str):
+    return PARSERS.get(os.path.splitext(file_path)[1].lower(), parse_json)
+
+
+def load_session(file_path: str, use_cache: bool = True) -> Session:
+    extension = os.path.splitext(file_path.rstrip(os.sep))[1].lower()
+    if extension == ".npz":
+        # Že stolpčna oblika, predpomnilnik ni potreben
+        return load_npz(file_path)
+    if extension == STORE_EXTENSION:
+        return load_store(file_path)
+    if extension == ARCHIVE_EXTENSION:
+        return read_archive(file_path)
+    parse = parser_for(file_path)
+    if not use_cache:
+        return parse(file_path)
+    try:
+        return cache_for(file_path).load(file_path, parse)
+    except OSError:
+        # Npr. mapa z datoteko ni zapisljiva: beremo brez predpomnilnika
+        return parse(file_path)
@@ -0,0 +1,161 @@
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from classifier import LABELS
+
+LabelArray = Union[np.ndarray, Sequence[str], Sequence[int]]
+
+
+class ConfusionMatrix:
+    # Vrstice so prave oznake, stolpci napovedane. Posodablja se s paketi
+    # oznak (np.bincount), zato seznam parov ni nikoli v celoti v pomnilniku;
+    # delne matrike iz več procesov se združijo z merge().
+    __slots__ = ("labels", "counts", "_index")
+
+    def __init__(self, labels: Sequence[str] = LABELS):
+        self.labels: List[str] = list(labels)
+        self._index = {label: i for i, label in enumerate(self.labels)}
+        self.counts = np.zeros((len(self.labels), len(self.labels)), dtype=np.int64)
+
+    def _add_labels(self, labels: Iterable[str]) -> None:
+        new = [label for label in labels if label not in self._index]
+        if not new:
+            return
+        for label in new:
+            self._index[label] = len(self.labels)
+            self.labels.append(label)
+        k = len(self.labels)
+        counts = np.zeros((k, k), dtype=np.int64)
+        n = len(self.counts)
+        counts[:n, :n] = self.counts
+        self.counts = counts
+
+    def _codes(self, labels: LabelArray) -> np.ndarray:
+        labels = np.asarray(labels)
+        if labels.dtype.kind in "iu":
+            return labels.astype(np.intp, copy=False)
+        # Nizi: znanih oznak je malo, zato je primerjava po oznakah hitrejša od
+        # urejanja (np.unique); neznane oznake se dodajo sproti.
+        labels = labels.reshape(-1)
+        codes = np.full(len(labels), -1, dtype=np.intp)
+        for label, code in self._index.items():
+            codes[labels == label] = code
+        unknown = codes < 0
+        if unknown.any():
+            unique, inverse = np.unique(labels[unknown], return_inverse=True)
+            self._add_labels(unique.tolist())
+            lookup = np.fromiter((self._index[label] for label in unique.tolist()), dtype=np.intp, count=len(unique))
+            codes[unknown] = lookup[inverse.reshape(-1)]
+        return codes
+
+    def update(self, true: LabelArray, predicted: LabelArray) -> "ConfusionMatrix":
+        # Sprejme oznake (nize) ali kode (indekse v self.labels)
+        true_codes = self._codes(true)
+        pred_codes = self._codes(predicted)
+        if len(true_codes) != len(pred_codes):
+            raise ValueError("Prave in napovedane oznake morajo biti enako dolge")
+        if len(true_codes) == 0:
+            return self
+        k = len(self.labels)
+        if true_codes.min() < 0 or pred_codes.min() < 0 or max(true_codes.max(), pred_codes.max()) >= k:
+            raise ValueError("Koda oznake je izven obsega")
+        self.counts += np.bincount(true_codes * k + pred_codes, minlength=k * k).reshape(k, k)
+        return self
+
+    def update_pairs(self, pairs: Iterable[Tuple[str, str]], chunk_size: int = 65536) -> "ConfusionMatrix":
+        pairs = iter(pairs)
+        while True:
+            chunk = list(islice(pairs, chunk_size))
+            if not chunk:
+                return self
+            true, predicted = zip(*chunk)
+            self.update(true, predicted)
+
+    def merge(self, other: "ConfusionMatrix") -> "ConfusionMatrix":
+        self._add_labels(other.labels)
+        idx = np.fromiter((self._index[label] for label in other.labels), dtype=np.intp, count=len(other.labels))
+        self.counts[np.ix_(idx, idx)] += other.counts
+        return self
+
+    def observed(self) -> "ConfusionMatrix":
+        # Le oznake, ki se pojavijo med pravimi ali napovedanimi, po abecedi
+        seen = (self.counts.sum(axis=0) + self.counts.sum(axis=1)) > 0
+        labels = sorted(label for label, s in zip(self.labels, seen) if s)
+        result = ConfusionMatrix(labels)
+        idx = [self._index[label] for label in labels]
+        result.counts = self.counts[np.ix_(idx, idx)].copy()
+        return result
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def correct(self) -> int:
+        return int(np.trace(self.counts))
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.total if self.total else 0.0
+
+    def support(self) -> np.ndarray:
+        return self.counts.sum(axis=1)
+
+    def precision(self) -> np.ndarray:
+        return _safe_divide(np.diag(self.counts), self.counts.sum(axis=0))
+
+    def recall(self) -> np.ndarray:
+        return _safe_divide(np.diag(self.counts), self.counts.sum(axis=1))
+
+    def f1(self) -> np.ndarray:
+        precision, recall = self.precision(), self.recall()
+        return _safe_divide(2 * precision * recall, precision + recall)
+
+    def macro(self) -> Dict[str, float]:
+        return {"precision": float(self.precision().mean()) if self.labels else 0.0,
+                "recall": float(self.recall().mean()) if self.labels else 0.0,
+                "f1": float(self.f1().mean()) if self.labels else 0.0}
+
+    def micro(self) -> Dict[str, float]:
+        # Pri eni oznaki na vzorec so mikro preciznost, priklic in F1 enaki točnosti
+        return {"precision": self.accuracy, "recall": self.accuracy, "f1": self.accuracy}
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        precision, recall, f1, support = self.precision(), self.recall(), self.f1(), self.support()
+        report = {
+            label: {"precision": float(precision[i]), "recall": float(recall[i]),
+                    "f1": float(f1[i]), "support": int(support[i])}
+            for i, label in enumerate(self.labels)
+        }
+        report["macro avg"] = dict(self.macro(), support=self.total)
+        report["micro avg"] = dict(self.micro(), support=self.total)
+        return report
+
+    def to_dict(self) -> Dict:
+        return {"labels": list(self.labels), "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ConfusionMatrix":
+        matrix = cls(data["labels"])
+        matrix.counts = np.asarray(data["counts"], dtype=np.int64).reshape(len(matrix.labels), len(matrix.labels))
+        return matrix
+
+
+def _safe_divide(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+
+
+def confusion_from_pairs(pairs: Iterable[Tuple[str, str]], labels: Optional[Sequence[str]] = None,
+                         chunk_size: int = 65536) -> ConfusionMatrix:
+    return ConfusionMatrix(labels if labels is not None else LABELS).update_pairs(pairs, chunk_size)
+
+
+def print_class_report(matrix: ConfusionMatrix) -> None:
+    print("\n--- Metrike po razredih ---")
+    print(f"{'':>9} {'precision':>9} {'recall':>9} {'f1':>9} {'support':>9}")
+    for label, row in matrix.report().items():
+        print(f"{label:>9} {row['precision']:9.2f} {row['recall']:9.2f} {row['f1']:9.2f} {row['support']:9d}")
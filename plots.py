@@ -0,0 +1,294 @@
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from classifier import THRESHOLDS
+from profiling import instrumented
+from session import SessionLike, as_session
+
+# Matplotlib in seaborn uvozimo šele ob prvem risanju, da klasifikacija in
+# metrike ne plačajo časa uvoza knjižnic za risanje.
+PLOT_DIR_ENV = "VR_PLOT_DIR"
+# Z VR_PLOT_DECIMATE=minmax|lttb se vsaka krivulja skrči na širino osi v pikslih
+DECIMATE_ENV = "VR_PLOT_DECIMATE"
+PLOT_FORMATS = ("png", "svg")
+
+_pyplot = None
+# V paketnem načinu (use_headless) se tight_layout izračuna le za prvo sliko
+# vsake vrste; naslednje dobijo iste robove, kar prihrani velik del časa risanja.
+_batch_mode = False
+_layouts = {}
+
+
+def _has_display() -> bool:
+    if sys.platform in ("win32", "darwin"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def pyplot():
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib
+        # Brez zaslona (strežnik, CI) rišemo z Agg namesto interaktivnega okna
+        if not os.environ.get("MPLBACKEND") and not _has_display():
+            matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        _pyplot = plt
+    return _pyplot
+
+
+def use_headless() -> None:
+    # Za paketno risanje v datoteke (tudi v otroških procesih)
+    global _batch_mode
+    _batch_mode = True
+    os.environ["MPLBACKEND"] = "Agg"
+    if _pyplot is not None:
+        _pyplot.switch_backend("Agg")
+
+
+def is_headless() -> bool:
+    return pyplot().get_backend().lower() == "agg"
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Najmanjša in največja vrednost vsakega vedra v prvotnem vrstnem redu:
+    # ovojnica signala (in vsi vrhovi) ostane enaka kot pri risanju vseh vzorcev.
+    n = len(y)
+    if buckets <= 0 or n <= 2 * buckets:
+        return x, y
+    size = n // buckets
+    full = buckets * size
+    blocks = np.asarray(y[:full]).reshape(buckets, size)
+    start = np.arange(buckets) * size
+    pair = np.sort(np.column_stack((blocks.argmin(axis=1), blocks.argmax(axis=1))), axis=1) + start[:, None]
+    index = pair.ravel()
+    if full < n:
+        tail = np.asarray(y[full:])
+        index = np.concatenate((index, np.unique([full + tail.argmin(), full + tail.argmax()])))
+    index = np.unique(np.concatenate(([0], index, [n - 1])))
+    return x[index], y[index]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Largest-Triangle-Three-Buckets: iz vsakega vedra izbere točko, ki s
+    # prejšnjo izbrano točko in povprečjem naslednjega vedra tvori največji trikotnik.
+    n = len(y)
+    if points < 3 or n <= points:
+        return x, y
+    xf = np.asarray(x, dtype=np.float64)
+    yf = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp)
+    # Povprečja veder prek prefiksnih vsot; za zadnje vedro je "naslednje" zadnja točka
+    cx = np.concatenate(([0.0], np.cumsum(xf)))
+    cy = np.concatenate(([0.0], np.cumsum(yf)))
+    lo, hi = edges[:-1], edges[1:]
+    next_lo = np.append(hi[:-1], n - 1)
+    next_hi = np.append(hi[1:], n)
+    count = next_hi - next_lo
+    avg_x = (cx[next_hi] - cx[next_lo]) / count
+    avg_y = (cy[next_hi] - cy[next_lo]) / count
+
+    index = np.empty(points, dtype=np.intp)
+    index[0], index[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        bx = xf[lo[i]:hi[i]]
+        by = yf[lo[i]:hi[i]]
+        area = np.abs((xf[a] - avg_x[i]) * (by - yf[a]) - (xf[a] - bx) * (avg_y[i] - yf[a]))
+        a = lo[i] + int(area.argmax())
+        index[i + 1] = a
+    return x[index], y[index]
+
+
+DECIMATORS = {"minmax": lambda x, y, width: minmax_decimate(x, y, width),
+              "lttb": lambda x, y, width: lttb(x, y, 2 * width)}
+
+
+def _decimator(decimate: Optional[str]):
+    decimate = decimate if decimate is not None else os.environ.get(DECIMATE_ENV)
+    if not decimate or decimate == "none":
+        return None
+    if decimate not in DECIMATORS:
+        raise ValueError(f"Neznana metoda decimacije: {decimate}")
+    return DECIMATORS[decimate]
+
+
+def _trace(ax, x: np.ndarray, y: np.ndarray, decimate: Optional[str], **kwargs) -> None:
+    # Krivulja na osi; pri decimaciji ostaneta največ ~2 točki na piksel širine osi
+    decimator = _decimator(decimate)
+    if decimator is not None:
+        x, y = decimator(np.asarray(x), np.asarray(y), max(1, int(ax.get_window_extent().width)))
+    ax.plot(x, y, **kwargs)
+
+
+def _layout(fig, kind: str, **kwargs) -> None:
+    params = _layouts.get(kind) if _batch_mode else None
+    if params is not None:
+        fig.subplots_adjust(**params)
+        return
+    fig.tight_layout(**kwargs)
+    if _batch_mode:
+        p = fig.subplotpars
+        _layouts[kind] = {"left": p.left, "right": p.right, "bottom": p.bottom, "top": p.top,
+                          "wspace": p.wspace, "hspace": p.hspace}
+
+
+def show(fig, name: str, output_dir: Optional[str] = None, fmt: str = "png") -> Optional[str]:
+    # Z VR_PLOT_DIR (ali output_dir) se slika shrani v PNG/SVG; okno se odpre
+    # le pri interaktivnem zaledju.
+    plt = pyplot()
+    output_dir = output_dir or os.environ.get(PLOT_DIR_ENV)
+    path = None
+    if output_dir:
+        if fmt not in PLOT_FORMATS:
+            raise ValueError(f"Nepodprta oblika slike: {fmt}")
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, re.sub(r"[^\w.-]+", "_", name).strip("_") + "." + fmt)
+        fig.savefig(path, dpi=100)
+    if not is_headless():
+        plt.show()
+    plt.close(fig)
+    return path
+
+
+@instrumented("plot_hypothesis", samples=lambda result, z_values, *a, **k: len(z_values))
+def plot_hypothesis(z_values: Union[np.ndarray, List[float]], gyro_mags: Union[np.ndarray, List[float]], std_z: float,
+                    avg_gyro: float, label: str, output_dir: Optional[str] = None,
+                    decimate: Optional[str] = None, fmt: str = "png") -> Optional[str]:
+    plt = pyplot()
+    fig, axs = plt.subplots(2, 1, figsize=(12, 6), sharex=True)
+    fig.suptitle(f"Hipotetična analiza – {label}", fontsize=14)
+
+    _trace(axs[0], np.arange(len(z_values)), z_values, decimate, label="Accelerometer Z")
+    threshold = THRESHOLDS[label]["std_z"]
+    axs[0].axhline(threshold, color='red', linestyle='--', label=f"Meja STD Z = {threshold}")
+    axs[0].set_ylabel("Z-pospešek [m/s²]")
+    axs[0].legend()
+    axs[0].grid(True)
+
+    _trace(axs[1], np.arange(len(gyro_mags)), gyro_mags, decimate, label="Gyro Magnituda")
+    gyro_th = THRESHOLDS[label]["avg_gyro"]
+    axs[1].axhline(gyro_th, color='purple', linestyle='--', label=f"Meja GYRO = {gyro_th}")
+    axs[1].set_ylabel("Kotna hitrost [rad/s]")
+    axs[1].set_xlabel("Vzorec")
+    axs[1].legend()
+    axs[1].grid(True)
+
+    _layout(fig, "hypothesis", rect=[0, 0, 1, 0.95])
+    return show(fig, f"hypothesis_{label}", output_dir, fmt)
+
+
+@instrumented("plot_sensor_data", samples=lambda result, session, *a, **k: len(session))
+def plot_sensor_data(session: SessionLike, title: str = "Sensor Data",
+                     output_dir: Optional[str] = None, decimate: Optional[str] = None,
+                     fmt: str = "png") -> Optional[str]:
+    session = as_session(session)
+    accel_data = session.accelerometer
+    gyro_data = session.gyroscope
+
+    # Časovni nizi v sekundah (timestamp je v ms)
+    accel_time = (accel_data.timestamp - accel_data.timestamp[0]) / 1000
+    gyro_time = (gyro_data.timestamp - gyro_data.timestamp[0]) / 1000
+
+    plt = pyplot()
+    fig, axs = plt.subplots(2, 1, figsize=(12, 8), sharex=False)
+    fig.suptitle(title)
+
+    _trace(axs[0], accel_time, accel_data.x, decimate, label="Accel X")
+    _trace(axs[0], accel_time, accel_data.y, decimate, label="Accel Y")
+    _trace(axs[0], accel_time, accel_data.z, decimate, label="Accel Z")
+    axs[0].set_title("Akcelerometer")
+    axs[0].set_ylabel("Pospešek [m/s²]")
+    axs[0].set_xlabel("Čas [s]")
+    axs[0].legend()
+    axs[0].grid(True)
+
+    # Meje za Z-os akcelerometra in magnitudo žiroskopa
+    axs[0].axhline(THRESHOLDS["Down"]["std_z"], color='orange', linestyle='--', label='Z threshold (Down)')
+    axs[0].axhline(THRESHOLDS["Up"]["std_z"], color='red', linestyle='--', label='Z threshold (Up)')
+    axs[1].axhline(THRESHOLDS["Down"]["avg_gyro"], color='orange', linestyle='--', label='Gyro threshold (Down)')
+    axs[1].axhline(THRESHOLDS["Up"]["avg_gyro"], color='red', linestyle='--', label='Gyro threshold (Up)')
+
+    _trace(axs[1], gyro_time, gyro_data.x, decimate, label="Gyro X")
+    _trace(axs[1], gyro_time, gyro_data.y, decimate, label="Gyro Y")
+    _trace(axs[1], gyro_time, gyro_data.z, decimate, label="Gyro Z")
+    axs[1].set_title("Žiroskop")
+    axs[1].set_xlabel("Čas [s]")
+    axs[1].set_ylabel("Kotna hitrost [rad/s]")
+    axs[1].legend()
+    axs[1].grid(True)
+
+    _layout(fig, "sensors", rect=[0, 0, 1, 0.95])
+    return show(fig, f"sensors_{title}", output_dir, fmt)
+
+
+@instrumented("plot_confusion_matrix", samples=lambda result, matrix, *a, **k: int(np.sum(matrix)))
+def plot_confusion_matrix(matrix: np.ndarray, labels: Sequence[str],
+                          output_dir: Optional[str] = None, fmt: str = "png") -> Optional[str]:
+    plt = pyplot()
+    import seaborn as sns
+
+    fig = plt.figure(figsize=(6, 5))
+    sns.heatmap(matrix, annot=True, fmt="d", cmap="Blues",
+                xticklabels=labels, yticklabels=labels)
+    plt.xlabel("Napovedana oznaka")
+    plt.ylabel("Prava oznaka")
+    plt.title("Konfuzijska matrika")
+    _layout(fig, "confusion_matrix")
+    return show(fig, "confusion_matrix", output_dir, fmt)
+
+
+def _render_chunk(args: Tuple[List[Tuple[str, str]], str, Optional[str], str]) -> List[str]:
+    from loaders import load_session
+
+    items, output_dir, decimate, fmt = args
+    use_headless()
+    return [plot_sensor_data(load_session(path), title, output_dir, decimate, fmt) for path, title in items]
+
+
+def render_recordings(items: Sequence[Tuple[str, str]], output_dir: str, workers: Optional[int] = None,
+                      decimate: Optional[str] = "minmax", fmt: str = "png", files_per_task: int = 4) -> List[str]:
+    # items: (pot, naslov); vsak proces nariše svoj del posnetkov v datoteke
+    items = list(items)
+    tasks = [(items[i:i + files_per_task], output_dir, decimate, fmt) for i in range(0, len(items), files_per_task)]
+    if workers == 1 or len(tasks) <= 1:
+        return [path for task in tasks for path in _render_chunk(task)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [path for part in pool.map(_render_chunk, tasks) for path in part]
+
+
+def main():
+    from batch import classify_directory, scan_recordings
+    from metrics import confusion_from_pairs
+
+    parser = argparse.ArgumentParser(description="Paketno risanje posnetkov in konfuzijske matrike v datoteke")
+    parser.add_argument("directory")
+    parser.add_argument("output", help="mapa za slike")
+    parser.add_argument("--format", choices=PLOT_FORMATS, default="png")
+    parser.add_argument("--decimate", choices=sorted(DECIMATORS) + ["none"], default="minmax")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-metrics", action="store_true", help="brez konfuzijske matrike")
+    args = parser.parse_args()
+    use_headless()
+
+    recordings = list(scan_recordings(args.directory))
+    start = time.perf_counter()
+    items = [(info.path, os.path.splitext(os.path.basename(info.path.rstrip(os.sep)))[0]) for info in recordings]
+    paths = render_recordings(items, args.output, args.workers, args.decimate, args.format)
+    if not args.no_metrics and recordings:
+        results = classify_directory(args.directory, args.workers, recordings=recordings)
+        matrix = confusion_from_pairs((r.true_label, r.predicted) for r in results).observed()
+        paths.append(plot_confusion_matrix(matrix.counts, matrix.labels, args.output, args.format))
+    elapsed = time.perf_counter() - start
+    print(f"Narisanih slik: {len(paths)} v {elapsed:.2f} s ({len(paths) / elapsed if elapsed else 0:.1f} slik/s)")
+
+
+if __name__ == "__main__":
+    main()
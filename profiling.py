@@ -0,0 +1,177 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+PROFILE_ENV = "VR_PROFILE"
+
+_enabled = False
+_track_allocations = False
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+_events: List[Dict] = []
+_origin_ns = time.perf_counter_ns()
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_samples(self, n: int) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "samples", "_wall", "_cpu", "_mem")
+
+    def __init__(self, name: str, samples: int = 0):
+        self.name = name
+        self.samples = samples
+
+    def add_samples(self, n: int) -> None:
+        self.samples += n
+
+    def __enter__(self):
+        self._mem = tracemalloc.get_traced_memory()[0] if _track_allocations else 0
+        self._cpu = time.thread_time_ns()
+        self._wall = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter_ns() - self._wall
+        cpu = time.thread_time_ns() - self._cpu
+        alloc = tracemalloc.get_traced_memory()[0] - self._mem if _track_allocations else 0
+        _record(self.name, self._wall, wall, cpu, self.samples, alloc)
+        return False
+
+
+def _record(name: str, start_ns: int, wall_ns: int, cpu_ns: int, samples: int, alloc: int) -> None:
+    with _lock:
+        s = _stats.get(name)
+        if s is None:
+            s = _stats[name] = {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "max_wall_ms": 0.0,
+                                "samples": 0, "alloc_bytes": 0}
+        s["calls"] += 1
+        s["wall_ms"] += wall_ns / 1e6
+        s["cpu_ms"] += cpu_ns / 1e6
+        s["max_wall_ms"] = max(s["max_wall_ms"], wall_ns / 1e6)
+        s["samples"] += samples
+        s["alloc_bytes"] += alloc
+        _events.append({
+            "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+            "ts": (start_ns - _origin_ns) / 1000, "dur": wall_ns / 1000,
+            "args": {"samples": samples, "cpu_ms": round(cpu_ns / 1e6, 3), "alloc_bytes": alloc},
+        })
+
+
+def enable(track_allocations: bool = False) -> None:
+    global _enabled, _track_allocations
+    _enabled = True
+    _track_allocations = track_allocations
+    if track_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    global _enabled, _track_allocations
+    _enabled = False
+    if _track_allocations and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _track_allocations = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+        _events.clear()
+
+
+def stage(name: str, samples: int = 0):
+    # Ko je merjenje izklopljeno, vrne en sam prazen kontekst (brez alokacij)
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, samples)
+
+
+def instrumented(name: Optional[str] = None, samples: Optional[Callable] = None):
+    # samples(result, *args, **kwargs) vrne število obdelanih vzorcev
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(stage_name) as st:
+                result = fn(*args, **kwargs)
+                if samples is not None:
+                    st.samples = samples(result, *args, **kwargs)
+            return result
+        return wrapper
+    return decorator
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        out = {}
+        for name, s in _stats.items():
+            row = dict(s)
+            row["samples_per_s"] = s["samples"] / (s["wall_ms"] / 1000) if s["wall_ms"] > 0 else 0.0
+            out[name] = row
+        return out
+
+
+def export_json(file_path: str) -> None:
+    with open(file_path, "w") as f:
+        json.dump(summary(), f, indent=2)
+
+
+def export_chrome_trace(file_path: str) -> None:
+    # Datoteko odpremo v chrome://tracing ali ui.perfetto.dev
+    with _lock:
+        events = list(_events)
+    with open(file_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def print_summary() -> None:
+    rows = sorted(summary().items(), key=lambda item: -item[1]["wall_ms"])
+    if not rows:
+        return
+    print("\n--- Profil po stopnjah ---")
+    for name, s in rows:
+        print(f"{name:>28}: {s['calls']:6d}x  wall {s['wall_ms']:10.2f} ms  cpu {s['cpu_ms']:10.2f} ms  "
+              f"{s['samples']:10d} vzorcev  {s['alloc_bytes'] / 1e6:8.2f} MB")
+
+
+def enable_from_env() -> bool:
+    # VR_PROFILE=pot/profil vklopi merjenje; ob izhodu se zapišeta
+    # pot/profil.json (povzetek) in pot/profil.trace.json (Chrome trace).
+    prefix = os.environ.get(PROFILE_ENV)
+    if not prefix:
+        return False
+    enable(track_allocations=os.environ.get(f"{PROFILE_ENV}_ALLOC") == "1")
+
+    def _export():
+        print_summary()
+        export_json(f"{prefix}.json")
+        export_chrome_trace(f"{prefix}.trace.json")
+
+    atexit.register(_export)
+    return True
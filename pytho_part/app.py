@@ -104,24 +104,30 @@
 
 
 
-import json
 import os
-from math import sqrt
+import sys
 
-def load_session(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+import numpy as np
+
+# Skupni moduli (session, ...) so v korenski mapi projekta
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import loaders
+from profiling import instrumented
+from session import as_session
 
-def analyze_session(session, verbose=False):
-    accel_data = [s for s in session if s["sensorType"] == "accelerometer"]
-    gyro_data = [s for s in session if s["sensorType"] == "gyroscope"]
 
-    z_values = [s["z"] for s in accel_data]
-    avg_z = sum(z_values) / len(z_values)
-    std_dev_z = sqrt(sum((z - avg_z) ** 2 for z in z_values) / len(z_values))
+def load_session(file_path, use_cache=True):
+    return loaders.load_session(file_path, use_cache)
+
+@instrumented("analyze_session", samples=lambda result, session, *a, **k: len(session))
+def analyze_session(session, verbose=False):
+    session = as_session(session)
+    accel_data = session.accelerometer
+    gyro_data = session.gyroscope
 
-    gyro_magnitudes = [sqrt(s["x"]**2 + s["y"]**2 + s["z"]**2) for s in gyro_data]
-    avg_gyro = sum(gyro_magnitudes) / len(gyro_magnitudes)
+    std_dev_z = float(np.std(accel_data.z, dtype=np.float64))
+    avg_gyro = float(np.mean(gyro_data.magnitude()))
 
     if verbose:
         print(f"STD Z: {std_dev_z:.3f}, AVG GYRO: {avg_gyro:.3f}")
@@ -1,54 +1,32 @@
 import os
-import json
-import math
-from collections import defaultdict
-import matplotlib.pyplot as plt
-import numpy as np
-import seaborn as sns
+import sys
 
-from app import process_file
+from app import analyze_session, load_session
+from features import extract_features
+from metrics import ConfusionMatrix, confusion_from_pairs, print_class_report
+from plots import PLOT_DIR_ENV, is_headless, plot_confusion_matrix, plot_sensor_data, render_recordings
+from profiling import enable_from_env, instrumented
 
 
-def load_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+@instrumented("load_data", samples=lambda result, *a, **k: len(result))
+def load_data(file_path, use_cache=True):
+    return load_session(file_path, use_cache)
 
+@instrumented("features", samples=lambda result, session, *a, **k: len(session))
 def compute_features(session):
-    accel = [s for s in session if s["sensorType"] == "accelerometer"]
-    gyro = [s for s in session if s["sensorType"] == "gyroscope"]
+    # En prehod čez sejo: povprečje, varianca, min in max za vse osi obeh senzorjev
+    features = extract_features(session)
 
     # Akcelerometer: Z vrednosti
-    z_vals = [s["z"] for s in accel]
-    avg_z = sum(z_vals) / len(z_vals)
-    std_dev_z = math.sqrt(sum((z - avg_z) ** 2 for z in z_vals) / len(z_vals))
+    std_dev_z = features.std_z
 
     # Žiroskop: magnituda
-    gyro_mags = [math.sqrt(s["x"]**2 + s["y"]**2 + s["z"]**2) for s in gyro]
-    avg_gyro = sum(gyro_mags) / len(gyro_mags)
-
-    # Min/max za accelerometer
-    accel_min = {
-        "x": min(s["x"] for s in accel),
-        "y": min(s["y"] for s in accel),
-        "z": min(s["z"] for s in accel),
-    }
-    accel_max = {
-        "x": max(s["x"] for s in accel),
-        "y": max(s["y"] for s in accel),
-        "z": max(s["z"] for s in accel),
-    }
+    avg_gyro = features.avg_gyro
 
-    # Min/max za gyroscope
-    gyro_min = {
-        "x": min(s["x"] for s in gyro),
-        "y": min(s["y"] for s in gyro),
-        "z": min(s["z"] for s in gyro),
-    }
-    gyro_max = {
-        "x": max(s["x"] for s in gyro),
-        "y": max(s["y"] for s in gyro),
-        "z": max(s["z"] for s in gyro),
-    }
+    accel_min = features.min_values("accelerometer")
+    accel_max = features.max_values("accelerometer")
+    gyro_min = features.min_values("gyroscope")
+    gyro_max = features.max_values("gyroscope")
 
     return std_dev_z, avg_gyro, accel_min, accel_max, gyro_min, gyro_max
 
@@ -82,17 +60,13 @@ def test_hypotheses(label, std_z, avg_gyro, accel_min, accel_max, gyro_min, gyro
 
 
 
-def calculate_metrics(results):
-    labels = sorted(list(set(t for t, _ in results) | set(p for _, p in results)))
-    label_to_index = {label: i for i, label in enumerate(labels)}
-
-    # Ustvari prazno matriko
-    matrix = np.zeros((len(labels), len(labels)), dtype=int)
-
-    for true, pred in results:
-        i = label_to_index[true]
-        j = label_to_index[pred]
-        matrix[i][j] += 1
+@instrumented("calculate_metrics", samples=lambda matrix, *a, **k: matrix.total)
+def calculate_metrics(results, plot=True):
+    # Konfuzijska matrika se polni s paketi oznak (np.bincount)
+    if not isinstance(results, ConfusionMatrix):
+        results = confusion_from_pairs(results)
+    cm = results.observed()
+    labels, matrix = cm.labels, cm.counts
 
     # Tekstovni prikaz
     print("\n--- Konfuzijska matrika ---")
@@ -100,78 +74,28 @@ def calculate_metrics(results):
         row = "\t".join(str(matrix[i][j]) for j in range(len(labels)))
         print(f"{true_label:>7}: {row}")
 
-    # Prikaz grafično
-    plt.figure(figsize=(6, 5))
-    sns.heatmap(matrix, annot=True, fmt="d", cmap="Blues",
-                xticklabels=labels, yticklabels=labels)
-    plt.xlabel("Napovedana oznaka")
-    plt.ylabel("Prava oznaka")
-    plt.title("Konfuzijska matrika")
-    plt.tight_layout()
-    plt.show()
+    # Prikaz grafično (matplotlib se naloži šele tukaj)
+    if plot:
+        plot_confusion_matrix(matrix, labels)
+
+    if cm.total == 0:
+        return cm
 
     # Izračun točnosti
-    correct = np.trace(matrix)
-    total = np.sum(matrix)
-    accuracy = correct / total * 100
-    print(f"\n✅ Skupna točnost: {accuracy:.2f}% ({correct}/{total})")
+    print(f"\n✅ Skupna točnost: {cm.accuracy * 100:.2f}% ({cm.correct}/{cm.total})")
 
     # Preciznost po razredih
     print("\n--- Preciznost po razredih ---")
-    for i, label in enumerate(labels):
-        tp = matrix[i][i]
-        fp = sum(matrix[j][i] for j in range(len(labels)) if j != i)
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+    for label, precision in zip(labels, cm.precision()):
         print(f"{label:>7}: {precision:.2f}")
 
+    # Priklic, F1, podpora ter makro/mikro povprečja
+    print_class_report(cm)
+    return cm
 
-def plot_sensor_data(session, title="Sensor Data"):
-    # Filtriraj podatke za akcelerometer in žiroskop
-    accel_data = [s for s in session if s["sensorType"] == "accelerometer"]
-    gyro_data = [s for s in session if s["sensorType"] == "gyroscope"]
-
-    # Pripravi časovne nize v sekundah (predpostavka: timestamp v ms)
-    accel_time = [(s["timestamp"] - accel_data[0]["timestamp"]) / 1000 for s in accel_data]
-    gyro_time = [(s["timestamp"] - gyro_data[0]["timestamp"]) / 1000 for s in gyro_data]
-
-    import matplotlib.pyplot as plt  # preveri, da je matplotlib importan tukaj
-
-    fig, axs = plt.subplots(2, 1, figsize=(12, 8), sharex=False)
-    fig.suptitle(title)  # nastavi naslov na celotnem figure
 
-    # Akcelerometer
-    axs[0].plot(accel_time, [s["x"] for s in accel_data], label="Accel X")
-    axs[0].plot(accel_time, [s["y"] for s in accel_data], label="Accel Y")
-    axs[0].plot(accel_time, [s["z"] for s in accel_data], label="Accel Z")
-    axs[0].set_title("Akcelerometer")
-    axs[0].set_ylabel("Pospešek [m/s²]")
-    axs[0].set_xlabel("Čas [s]")  # dodaj, če želiš x-os tudi zgoraj
-    axs[0].legend()
-    axs[0].grid(True)
-
-    # Za Z-os akcelerometra
-    axs[0].axhline(0.22, color='orange', linestyle='--', label='Z threshold (Down)')
-    axs[0].axhline(0.30, color='red', linestyle='--', label='Z threshold (Up)')
-
-    # Za žiroskop magnitudo
-    axs[1].axhline(0.035, color='orange', linestyle='--', label='Gyro threshold (Down)')
-    axs[1].axhline(0.045, color='red', linestyle='--', label='Gyro threshold (Up)')
-
-    # Žiroskop
-    axs[1].plot(gyro_time, [s["x"] for s in gyro_data], label="Gyro X")
-    axs[1].plot(gyro_time, [s["y"] for s in gyro_data], label="Gyro Y")
-    axs[1].plot(gyro_time, [s["z"] for s in gyro_data], label="Gyro Z")
-    axs[1].set_title("Žiroskop")
-    axs[1].set_xlabel("Čas [s]")
-    axs[1].set_ylabel("Kotna hitrost [rad/s]")
-    axs[1].legend()
-    axs[1].grid(True)
-
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.show()
-
-
-def main(show_metrics=True):
+def main(show_metrics=True, plot=True):
+    enable_from_env()
     base_dir = os.path.dirname(__file__)
     files = {
         "Straight": os.path.join(base_dir, "ex1_andrea_Straight_20250516_232111.json"),
@@ -181,10 +105,9 @@ def main(show_metrics=True):
 
     all_results = []
     for label, path in files.items():
-        results = process_file(path, label, verbose=True)
-        all_results.extend(results)
-
         session = load_data(path)
+        all_results.append((label, analyze_session(session, verbose=True)))
+
         std_z, avg_gyro, accel_min, accel_max, gyro_min, gyro_max = compute_features(session)
         test_hypotheses(label, std_z, avg_gyro, accel_min, accel_max, gyro_min, gyro_max)
 
@@ -193,17 +116,21 @@ def main(show_metrics=True):
         print(f"True: {true_label}, Predicted: {predicted_label}")
 
     if show_metrics:
-        calculate_metrics(all_results)
+        calculate_metrics(all_results, plot)
 
 def plot_all_files(files):
+    # Brez zaslona in z VR_PLOT_DIR se grafi narišejo vzporedno v datoteke
+    output_dir = os.environ.get(PLOT_DIR_ENV)
+    if output_dir and is_headless():
+        render_recordings([(path, f"Tip hoje: {label}") for label, path in files.items()], output_dir)
+        return
     for label, path in files.items():
-        with open(path, "r") as f:
-            data = json.load(f)
-        plot_sensor_data(data, title=f"Tip hoje: {label}")
+        plot_sensor_data(load_data(path), title=f"Tip hoje: {label}")
 
 
 if __name__ == "__main__":
-    main()
+    plot = "--no-plot" not in sys.argv[1:]
+    main(plot=plot)
     base_dir = os.path.dirname(__file__)
     files = {
         "Straight": os.path.join(base_dir, "ex1_andrea_Straight_20250516_232111.json"),
@@ -211,7 +138,8 @@ if __name__ == "__main__":
         "Down": os.path.join(base_dir, "ex1_andrea_Down_20250516_232014.json"),
     }
 
-    plot_all_files(files)
+    if plot:
+        plot_all_files(files)
 
 
 
@@ -0,0 +1,256 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import archive
+import csvstream
+import jsonstream
+from loaders import load_session
+from profiling import enable_from_env, instrumented
+from resample import DEFAULT_RATE_HZ
+from session import SENSOR_TYPES, Session, SessionLike, as_session
+
+# Odmik intervala od nominalnega (ms); skrajna predala sta odprta
+JITTER_EDGES_MS = (-10.0, -5.0, -2.0, -1.0, 1.0, 2.0, 5.0, 10.0)
+# Interval, daljši od GAP_FACTOR nominalnih, šteje kot vrzel
+GAP_FACTOR = 2.0
+
+# Meje za zavrnitev seje; hipoteze predpostavljajo ~50 Hz na obeh senzorjih
+QUALITY_LIMITS = {
+    "min_rate_hz": 40.0,
+    "max_rate_mismatch": 0.1,
+    "max_gap_ms": 1000.0,
+    "max_gap_fraction": 0.05,
+    "max_duplicate_fraction": 0.01,
+    "max_out_of_order": 0,
+}
+QUALITY_POLICIES = ("off", "report", "reject", "repair")
+
+
+class SensorQuality(NamedTuple):
+    sensor: str
+    samples: int
+    span_ms: int
+    effective_hz: float
+    mean_dt_ms: float
+    jitter_ms: float              # standardni odklon intervalov brez vrzeli
+    jitter_histogram: np.ndarray  # len(JITTER_EDGES_MS) + 1 predalov
+    duplicates: int
+    out_of_order: int
+    gaps: int
+    gap_ms_total: int
+    max_gap_ms: int
+
+
+class QualityReport(NamedTuple):
+    path: str
+    sensors: Dict[str, SensorQuality]
+
+    @property
+    def samples(self) -> int:
+        return sum(q.samples for q in self.sensors.values())
+
+    @property
+    def rate_mismatch(self) -> float:
+        # Relativna razlika efektivnih frekvenc pospeškometra in žiroskopa
+        rates = [q.effective_hz for q in self.sensors.values()]
+        if min(rates) <= 0:
+            return 1.0
+        return max(rates) / min(rates) - 1.0
+
+    def problems(self, limits: Optional[dict] = None) -> List[str]:
+        limits = limits or QUALITY_LIMITS
+        found = []
+        for name, q in self.sensors.items():
+            if q.effective_hz < limits["min_rate_hz"]:
+                found.append(f"{name}: frekvenca {q.effective_hz:.1f} Hz")
+            if q.max_gap_ms > limits["max_gap_ms"]:
+                found.append(f"{name}: vrzel {q.max_gap_ms} ms")
+            if q.span_ms and q.gap_ms_total / q.span_ms > limits["max_gap_fraction"]:
+                found.append(f"{name}: {q.gaps} vrzeli ({q.gap_ms_total} ms)")
+            if q.samples and q.duplicates / q.samples > limits["max_duplicate_fraction"]:
+                found.append(f"{name}: {q.duplicates} podvojenih časov")
+            if q.out_of_order > limits["max_out_of_order"]:
+                found.append(f"{name}: {q.out_of_order} vzorcev v napačnem vrstnem redu")
+        if self.rate_mismatch > limits["max_rate_mismatch"]:
+            found.append(f"neujemanje frekvenc senzorjev {self.rate_mismatch * 100:.0f} %")
+        return found
+
+
+class TimingAccumulator:
+    # Statistika časovnih žigov enega senzorja po kosih; zadnji žig prejšnjega
+    # kosa se upošteva, zato je rezultat enak kot za celoten posnetek naenkrat.
+    def __init__(self, sensor: str, rate_hz: float = DEFAULT_RATE_HZ):
+        self.sensor = sensor
+        self.nominal_ms = 1000.0 / rate_hz
+        self.count = 0
+        self.first: Optional[int] = None
+        self.last: Optional[int] = None
+        self.min = np.iinfo(np.int64).max
+        self.max = np.iinfo(np.int64).min
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.gaps = 0
+        self.gap_ms_total = 0
+        self.max_gap_ms = 0
+        self.dt_n = 0
+        self.dt_sum = 0.0
+        self.dt_sumsq = 0.0
+        self.histogram = np.zeros(len(JITTER_EDGES_MS) + 1, dtype=np.int64)
+
+    def update(self, timestamps: np.ndarray) -> "TimingAccumulator":
+        ts = np.asarray(timestamps, dtype=np.int64)
+        if len(ts) == 0:
+            return self
+        if self.first is None:
+            self.first = int(ts[0])
+            dt = np.diff(ts)
+        else:
+            dt = np.diff(ts, prepend=self.last)
+        self.count += len(ts)
+        self.last = int(ts[-1])
+        self.min = min(self.min, int(ts.min()))
+        self.max = max(self.max, int(ts.max()))
+
+        self.duplicates += int(np.count_nonzero(dt == 0))
+        self.out_of_order += int(np.count_nonzero(dt < 0))
+        gap = dt > GAP_FACTOR * self.nominal_ms
+        if gap.any():
+            gap_dt = dt[gap]
+            self.gaps += len(gap_dt)
+            self.gap_ms_total += int(gap_dt.sum())
+            self.max_gap_ms = max(self.max_gap_ms, int(gap_dt.max()))
+
+        regular = dt[(dt > 0) & ~gap].astype(np.float64)
+        self.dt_n += len(regular)
+        self.dt_sum += float(regular.sum())
+        self.dt_sumsq += float(np.dot(regular, regular))
+        bins = np.searchsorted(JITTER_EDGES_MS, regular - self.nominal_ms, side="right")
+        self.histogram += np.bincount(bins, minlength=len(self.histogram))
+        return self
+
+    def result(self) -> SensorQuality:
+        span = self.max - self.min if self.count > 1 else 0
+        rate = (self.count - 1) * 1000.0 / span if span > 0 else 0.0
+        mean = self.dt_sum / self.dt_n if self.dt_n else 0.0
+        var = self.dt_sumsq / self.dt_n - mean * mean if self.dt_n else 0.0
+        return SensorQuality(self.sensor, self.count, span, rate, mean, float(np.sqrt(max(var, 0.0))),
+                             self.histogram.copy(), self.duplicates, self.out_of_order,
+                             self.gaps, self.gap_ms_total, self.max_gap_ms)
+
+
+def _accumulators(rate_hz: float) -> Dict[str, TimingAccumulator]:
+    return {name: TimingAccumulator(name, rate_hz) for name in SENSOR_TYPES}
+
+
+def _update(accumulators: Dict[str, TimingAccumulator], session: Session) -> None:
+    for name, acc in accumulators.items():
+        acc.update(session.sensor_series(name).timestamp)
+
+
+def check_session(session: SessionLike, path: str = "", rate_hz: float = DEFAULT_RATE_HZ) -> QualityReport:
+    accumulators = _accumulators(rate_hz)
+    _update(accumulators, as_session(session))
+    return QualityReport(path, {name: acc.result() for name, acc in accumulators.items()})
+
+
+def _iter_chunks(file_path: str, chunk_size: int) -> Iterator[Session]:
+    extension = os.path.splitext(file_path.rstrip(os.sep))[1].lower()
+    if extension == ".csv":
+        return csvstream.iter_chunks(file_path, chunk_size)
+    if extension == ".json":
+        return jsonstream.iter_chunks(file_path, chunk_size)
+    if extension == archive.ARCHIVE_EXTENSION:
+        return archive.iter_chunks(file_path)
+    # Stolpčne oblike (.npz, .vrs) se naložijo brez razčlenjevanja
+    return iter([load_session(file_path)])
+
+
+@instrumented("quality", samples=lambda report, *a, **k: report.samples)
+def check_file(file_path: str, chunk_size: int = 65536, rate_hz: float = DEFAULT_RATE_HZ) -> QualityReport:
+    # Pretočno: v pomnilniku je hkrati le en kos datoteke
+    accumulators = _accumulators(rate_hz)
+    for chunk in _iter_chunks(file_path, chunk_size):
+        _update(accumulators, chunk)
+    return QualityReport(file_path, {name: acc.result() for name, acc in accumulators.items()})
+
+
+def repair_session(session: SessionLike) -> Session:
+    # Uredi vzorce vsakega senzorja po času in odstrani podvojene časovne žige
+    # (ohrani prvega); vrzeli ostanejo, te obravnava resample.align_session.
+    session = as_session(session)
+    order = np.lexsort((session.timestamp, session.sensor))
+    ts = session.timestamp[order]
+    sensor = session.sensor[order]
+    keep = np.ones(len(ts), dtype=bool)
+    keep[1:] = (ts[1:] != ts[:-1]) | (sensor[1:] != sensor[:-1])
+    order = order[keep]
+    return Session(ts[keep], sensor[keep], session.x[order], session.y[order], session.z[order])
+
+
+def _check_chunk(args: Tuple[List[str], int, float]) -> List[QualityReport]:
+    paths, chunk_size, rate_hz = args
+    return [check_file(path, chunk_size, rate_hz) for path in paths]
+
+
+def check_files(paths: List[str], workers: Optional[int] = None, files_per_task: int = 16,
+                chunk_size: int = 65536, rate_hz: float = DEFAULT_RATE_HZ) -> List[QualityReport]:
+    if workers == 1 or len(paths) <= files_per_task:
+        return [check_file(path, chunk_size, rate_hz) for path in paths]
+    tasks = [(paths[i:i + files_per_task], chunk_size, rate_hz) for i in range(0, len(paths), files_per_task)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [report for part in pool.map(_check_chunk, tasks) for report in part]
+
+
+def format_report(report: QualityReport) -> str:
+    lines = [os.path.basename(report.path.rstrip(os.sep))]
+    for q in report.sensors.values():
+        lines.append(f"  {q.sensor}: {q.samples} vzorcev, {q.effective_hz:.1f} Hz, "
+                     f"interval {q.mean_dt_ms:.1f} ± {q.jitter_ms:.1f} ms, vrzeli {q.gaps} "
+                     f"(skupaj {q.gap_ms_total} ms, največja {q.max_gap_ms} ms), "
+                     f"podvojeni {q.duplicates}, nazaj {q.out_of_order}")
+        lines.append(f"    odmik [ms] {list(JITTER_EDGES_MS)}: {q.jitter_histogram.tolist()}")
+    problems = report.problems()
+    lines.append("  ✅ v redu" if not problems else "  ❌ " + "; ".join(problems))
+    return "\n".join(lines)
+
+
+def main():
+    from batch import scan_recordings
+
+    parser = argparse.ArgumentParser(description="Preverjanje kakovosti in časovne enakomernosti posnetkov")
+    parser.add_argument("paths", nargs="*", help="datoteke ali mape (privzeto mapa skripte)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_HZ, help="nominalna frekvenca (Hz)")
+    parser.add_argument("--problems-only", action="store_true", help="izpiši le posnetke s težavami")
+    args = parser.parse_args()
+    enable_from_env()
+
+    paths = []
+    for path in args.paths or [os.path.dirname(os.path.abspath(__file__))]:
+        if os.path.isdir(path) and not path.rstrip(os.sep).endswith(".vrs"):
+            paths.extend(info.path for info in scan_recordings(path))
+        else:
+            paths.append(path)
+
+    start = time.perf_counter()
+    reports = check_files(paths, args.workers, rate_hz=args.rate)
+    elapsed = time.perf_counter() - start
+
+    bad = 0
+    for report in reports:
+        problems = report.problems()
+        bad += bool(problems)
+        if problems or not args.problems_only:
+            print(format_report(report))
+    samples = sum(r.samples for r in reports)
+    print(f"\nPreverjenih posnetkov: {len(reports)} ({bad} s težavami) v {elapsed:.2f} s "
+          f"({samples / elapsed if elapsed else 0:.0f} vzorcev/s)")
+
+
+if __name__ == "__main__":
+    main()
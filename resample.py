@@ -0,0 +1,90 @@
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from session import SensorSeries, SessionLike, as_session
+
+DEFAULT_RATE_HZ = 50.0
+CHANNELS = ("accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z")
+GAP_POLICIES = ("interpolate", "hold", "nan")
+
+
+class AlignedSignal(NamedTuple):
+    timestamp: np.ndarray
+    data: np.ndarray
+    valid: np.ndarray
+    rate_hz: float
+
+
+def uniform_grid(start_ms: float, end_ms: float, rate_hz: float = DEFAULT_RATE_HZ) -> np.ndarray:
+    step = 1000.0 / rate_hz
+    n = int(np.floor((end_ms - start_ms) / step)) + 1 if end_ms >= start_ms else 0
+    return start_ms + step * np.arange(n, dtype=np.float64)
+
+
+def resample_series(series: SensorSeries, grid: np.ndarray, max_gap_ms: Optional[float] = None,
+                    gap_policy: str = "interpolate") -> Tuple[np.ndarray, np.ndarray]:
+    if gap_policy not in GAP_POLICIES:
+        raise ValueError(f"Neznana politika za vrzeli: {gap_policy}")
+    ts = series.timestamp
+    values = series.xyz()
+    if len(ts) > 1 and np.any(ts[1:] < ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+        ts, values = ts[order], values[order]
+    n = len(ts)
+    if n == 0:
+        return np.full((len(grid), 3), np.nan, dtype=np.float32), np.zeros(len(grid), dtype=bool)
+    if n == 1:
+        return np.repeat(values, len(grid), axis=0), np.ones(len(grid), dtype=bool)
+
+    # Za vsako točko mreže poiščemo sosednja vzorca levo in desno
+    ts = ts.astype(np.float64)
+    left = np.clip(np.searchsorted(ts, grid, side="right") - 1, 0, n - 2)
+    t0 = ts[left]
+    t1 = ts[left + 1]
+    span = t1 - t0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w = np.where(span > 0, (grid - t0) / span, 0.0)
+    w = np.clip(w, 0.0, 1.0)[:, None]
+    v0 = values[left].astype(np.float64)
+    v1 = values[left + 1].astype(np.float64)
+    out = v0 + w * (v1 - v0)
+
+    valid = np.ones(len(grid), dtype=bool)
+    if max_gap_ms is not None:
+        # Točka mreže, ki pade točno na vzorec, ni v vrzeli
+        gap = (span > max_gap_ms) & (w[:, 0] > 0.0) & (w[:, 0] < 1.0)
+        if gap_policy == "hold":
+            out[gap] = v0[gap]
+        elif gap_policy == "nan":
+            out[gap] = np.nan
+            valid &= ~gap
+    return out.astype(np.float32), valid
+
+
+def align_session(session: SessionLike, rate_hz: float = DEFAULT_RATE_HZ, max_gap_ms: Optional[float] = None,
+                  gap_policy: str = "interpolate") -> AlignedSignal:
+    # Oba senzorja na skupno enakomerno mrežo; mreža pokriva le čas, ko sta
+    # na voljo oba, zato ni ekstrapolacije na robovih.
+    session = as_session(session)
+    accel = session.accelerometer
+    gyro = session.gyroscope
+    if len(accel) == 0 or len(gyro) == 0:
+        return AlignedSignal(np.empty(0), np.empty((0, 6), np.float32), np.empty(0, bool), rate_hz)
+
+    start = max(int(accel.timestamp.min()), int(gyro.timestamp.min()))
+    end = min(int(accel.timestamp.max()), int(gyro.timestamp.max()))
+    grid = uniform_grid(start, end, rate_hz)
+
+    data = np.empty((len(grid), 6), dtype=np.float32)
+    data[:, :3], accel_valid = resample_series(accel, grid, max_gap_ms, gap_policy)
+    data[:, 3:], gyro_valid = resample_series(gyro, grid, max_gap_ms, gap_policy)
+    return AlignedSignal(grid, data, accel_valid & gyro_valid, rate_hz)
+
+
+def frame_windows(signal: AlignedSignal, window_len: int, hop: int) -> np.ndarray:
+    # Pogled (n_oken, window_len, 6) brez kopiranja podatkov
+    if len(signal.data) < window_len:
+        return np.empty((0, window_len, signal.data.shape[1]), dtype=signal.data.dtype)
+    view = np.lib.stride_tricks.sliding_window_view(signal.data, window_len, axis=0)
+    return view[::hop].transpose(0, 2, 1)
@@ -0,0 +1,362 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from session import SENSOR_CODES, SENSOR_TYPES, Session
+
+# Posnetek je mapa <ime>.vrs:
+#   meta.json                      oblika in velikosti segmentov
+#   <senzor>/<nnnnnnnn>.seg        zapisi fiksne dolžine (timestamp, x, y, z)
+#   <senzor>/index.bin             (min, max) timestamp za vsak poln blok
+# Segment ima segment_samples vzorcev, blok block_samples; položaj vzorca
+# določa, v katerem segmentu in bloku je, zato indeks ne hrani odmikov.
+STORE_EXTENSION = ".vrs"
+STORE_FORMAT = 1
+DEFAULT_SEGMENT_SAMPLES = 1 << 16
+DEFAULT_BLOCK_SAMPLES = 1024
+DEFAULT_SYNC_INTERVAL_S = 1.0
+
+RECORD_DTYPE = np.dtype([("timestamp", "<i8"), ("x", "<f4"), ("y", "<f4"), ("z", "<f4")])
+INDEX_DTYPE = np.dtype([("min", "<i8"), ("max", "<i8")])
+
+
+def _segment_path(directory: str, segment: int) -> str:
+    return os.path.join(directory, f"{segment:08d}.seg")
+
+
+def _read_meta(path: str) -> Dict:
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        meta = json.load(f)
+    if meta.get("format") != STORE_FORMAT:
+        raise ValueError(f"{path}: nepodprta oblika shrambe")
+    return meta
+
+
+class _SensorWriter:
+    def __init__(self, directory: str, segment_samples: int, block_samples: int):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_samples = segment_samples
+        self.block_samples = block_samples
+        self.count = _stored_count(directory, segment_samples)
+        # Indeks lahko zaostaja za podatki (npr. po prekinitvi); manjkajoče
+        # bloke dopolnimo iz podatkov.
+        index_path = os.path.join(directory, "index.bin")
+        indexed = os.path.getsize(index_path) // INDEX_DTYPE.itemsize if os.path.exists(index_path) else 0
+        indexed = min(indexed, self.count // block_samples)
+        self.index = open(index_path, "ab")
+        self.index.truncate(indexed * INDEX_DTYPE.itemsize)
+        self.block_min = np.iinfo(np.int64).max
+        self.block_max = np.iinfo(np.int64).min
+        start = indexed * block_samples
+        if start < self.count:
+            records = _read_positions(directory, segment_samples, start, self.count)
+            self._index_records(records["timestamp"], start)
+        self.segment = None
+        self._open_segment()
+
+    def _open_segment(self) -> None:
+        if self.segment is not None:
+            self.segment.close()
+        number = self.count // self.segment_samples
+        self.segment = open(_segment_path(self.directory, number), "ab")
+        # Morebitni nepopoln zapis na koncu (prekinitev med pisanjem) zavržemo
+        self.segment.truncate((self.count - number * self.segment_samples) * RECORD_DTYPE.itemsize)
+
+    def _index_records(self, timestamps: np.ndarray, position: int) -> None:
+        # Posodobi min/max trenutnega bloka in zapiše vse zaključene bloke
+        offset = 0
+        while offset < len(timestamps):
+            in_block = position % self.block_samples
+            take = min(self.block_samples - in_block, len(timestamps) - offset)
+            part = timestamps[offset:offset + take]
+            self.block_min = min(self.block_min, int(part.min()))
+            self.block_max = max(self.block_max, int(part.max()))
+            offset += take
+            position += take
+            if position % self.block_samples == 0:
+                self.index.write(np.array([(self.block_min, self.block_max)], dtype=INDEX_DTYPE).tobytes())
+                self.block_min = np.iinfo(np.int64).max
+                self.block_max = np.iinfo(np.int64).min
+
+    def append(self, records: np.ndarray) -> None:
+        offset = 0
+        while offset < len(records):
+            room = self.segment_samples - self.count % self.segment_samples
+            part = records[offset:offset + room]
+            self.segment.write(part.tobytes())
+            self._index_records(part["timestamp"], self.count)
+            self.count += len(part)
+            offset += len(part)
+            if self.count % self.segment_samples == 0:
+                self._open_segment()
+
+    def sync(self) -> None:
+        # Najprej podatki, nato indeks: indeks nikoli ne kaže na nezapisane vzorce
+        self.segment.flush()
+        os.fsync(self.segment.fileno())
+        self.index.flush()
+        os.fsync(self.index.fileno())
+
+    def close(self) -> None:
+        self.sync()
+        self.segment.close()
+        self.index.close()
+
+
+class SegmentWriter:
+    # Dodajanje na konec; fsync se izvede paketno (najpogosteje na
+    # sync_interval_s sekund) ali ob sync()/close().
+    def __init__(self, path: str, segment_samples: int = DEFAULT_SEGMENT_SAMPLES,
+                 block_samples: int = DEFAULT_BLOCK_SAMPLES, sync_interval_s: float = DEFAULT_SYNC_INTERVAL_S):
+        if segment_samples % block_samples:
+            raise ValueError("Velikost segmenta mora biti večkratnik velikosti bloka")
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            meta = _read_meta(path)
+            segment_samples, block_samples = meta["segment_samples"], meta["block_samples"]
+        else:
+            # Prek začasne datoteke: prekinjen zapis ne pusti nepopolnega meta.json
+            tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"format": STORE_FORMAT, "segment_samples": segment_samples,
+                           "block_samples": block_samples}, f)
+            os.replace(tmp_path, meta_path)
+        self.path = path
+        self.sync_interval_s = sync_interval_s
+        self._last_sync = time.monotonic()
+        self._sensors = {name: _SensorWriter(os.path.join(path, name), segment_samples, block_samples)
+                         for name in SENSOR_TYPES}
+
+    def append_series(self, sensor_type: str, timestamp: np.ndarray, x: np.ndarray, y: np.ndarray,
+                      z: np.ndarray) -> None:
+        if sensor_type not in SENSOR_CODES:
+            raise ValueError(f"Neznan tip senzorja: {sensor_type}")
+        records = np.empty(len(timestamp), dtype=RECORD_DTYPE)
+        records["timestamp"], records["x"], records["y"], records["z"] = timestamp, x, y, z
+        self._sensors[sensor_type].append(records)
+        self._maybe_sync()
+
+    def append(self, session: Session) -> None:
+        for name in SENSOR_TYPES:
+            series = session.sensor_series(name)
+            if len(series):
+                self.append_series(name, series.timestamp, series.x, series.y, series.z)
+
+    def append_samples(self, samples: List[Tuple[str, int, float, float, float]]) -> None:
+        # Vzorci v obliki (senzor, timestamp, x, y, z), npr. iz MQTT sporočila
+        for name in SENSOR_TYPES:
+            rows = [s[1:] for s in samples if s[0] == name]
+            if rows:
+                t, x, y, z = zip(*rows)
+                self.append_series(name, np.asarray(t), np.asarray(x), np.asarray(y), np.asarray(z))
+
+    def _maybe_sync(self) -> None:
+        if time.monotonic() - self._last_sync >= self.sync_interval_s:
+            self.sync()
+
+    def sync(self) -> None:
+        for writer in self._sensors.values():
+            writer.sync()
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        for writer in self._sensors.values():
+            writer.close()
+
+    def __enter__(self) -> "SegmentWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _stored_count(directory: str, segment_samples: int) -> int:
+    segments = sorted(name for name in os.listdir(directory) if name.endswith(".seg")) \
+        if os.path.isdir(directory) else []
+    if not segments:
+        return 0
+    last = int(segments[-1][:-4])
+    size = os.path.getsize(os.path.join(directory, segments[-1])) // RECORD_DTYPE.itemsize
+    return last * segment_samples + min(size, segment_samples)
+
+
+def _read_positions(directory: str, segment_samples: int, start: int, stop: int) -> np.ndarray:
+    # Prebere vzorce [start, stop) in bere le segmente, ki jih obseg pokriva
+    parts = []
+    position = start
+    while position < stop:
+        segment, offset = divmod(position, segment_samples)
+        count = min(stop - position, segment_samples - offset)
+        with open(_segment_path(directory, segment), "rb") as f:
+            f.seek(offset * RECORD_DTYPE.itemsize)
+            parts.append(np.fromfile(f, dtype=RECORD_DTYPE, count=count))
+        position += count
+    if not parts:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+class SegmentStore:
+    def __init__(self, path: str):
+        meta = _read_meta(path)
+        self.path = path
+        self.segment_samples = meta["segment_samples"]
+        self.block_samples = meta["block_samples"]
+
+    def _directory(self, sensor_type: str) -> str:
+        return os.path.join(self.path, sensor_type)
+
+    def count(self, sensor_type: str) -> int:
+        return _stored_count(self._directory(sensor_type), self.segment_samples)
+
+    def __len__(self) -> int:
+        return sum(self.count(name) for name in SENSOR_TYPES)
+
+    def _index(self, sensor_type: str, count: int) -> np.ndarray:
+        path = os.path.join(self._directory(sensor_type), "index.bin")
+        if not os.path.exists(path):
+            return np.empty(0, dtype=INDEX_DTYPE)
+        index = np.fromfile(path, dtype=INDEX_DTYPE)
+        # Upoštevamo le bloke, katerih podatki so v celoti zapisani
+        return index[:count // self.block_samples]
+
+    def read_sensor(self, sensor_type: str, start_ms: Optional[int] = None,
+                    end_ms: Optional[int] = None) -> np.ndarray:
+        directory = self._directory(sensor_type)
+        count = self.count(sensor_type)
+        index = self._index(sensor_type, count)
+        lo = np.iinfo(np.int64).min if start_ms is None else start_ms
+        hi = np.iinfo(np.int64).max if end_ms is None else end_ms
+
+        indexed_end = len(index) * self.block_samples
+        hits = np.flatnonzero((index["max"] >= lo) & (index["min"] <= hi))
+        parts = []
+        if len(hits):
+            parts.append(_read_positions(directory, self.segment_samples,
+                                         int(hits[0]) * self.block_samples,
+                                         (int(hits[-1]) + 1) * self.block_samples))
+        # Zadnji, še nepoln blok nima vnosa v indeksu
+        if indexed_end < count:
+            parts.append(_read_positions(directory, self.segment_samples, indexed_end, count))
+        records = np.concatenate(parts) if parts else np.empty(0, dtype=RECORD_DTYPE)
+        ts = records["timestamp"]
+        return records[(ts >= lo) & (ts <= hi)]
+
+    def read(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Session:
+        # Vzorci s časom v [start_ms, end_ms] (oba vključena)
+        columns = [self.read_sensor(name, start_ms, end_ms) for name in SENSOR_TYPES]
+        return Session(
+            np.concatenate([c["timestamp"] for c in columns]),
+            np.repeat(np.arange(len(SENSOR_TYPES), dtype=np.int8), [len(c) for c in columns]),
+            np.concatenate([c["x"] for c in columns]),
+            np.concatenate([c["y"] for c in columns]),
+            np.concatenate([c["z"] for c in columns]),
+        )
+
+    def time_range(self) -> Tuple[Optional[int], Optional[int]]:
+        # Iz indeksa in nepolnega zadnjega bloka, brez branja vseh podatkov
+        lo, hi = None, None
+        for name in SENSOR_TYPES:
+            count = self.count(name)
+            index = self._index(name, count)
+            values = [index["min"], index["max"]]
+            indexed_end = len(index) * self.block_samples
+            if indexed_end < count:
+                values.append(_read_positions(self._directory(name), self.segment_samples,
+                                              indexed_end, count)["timestamp"])
+            values = np.concatenate(values)
+            if len(values):
+                lo = int(values.min()) if lo is None else min(lo, int(values.min()))
+                hi = int(values.max()) if hi is None else max(hi, int(values.max()))
+        return lo, hi
+
+
+def store_digest(path: str) -> str:
+    # Shramba se le dopolnjuje, zato vsebino povzamejo meta, indeks polnih
+    # blokov in nepoln zadnji blok (brez branja vseh segmentov).
+    store = SegmentStore(path)
+    h = hashlib.blake2b(digest_size=16)
+    with open(os.path.join(path, "meta.json"), "rb") as f:
+        h.update(f.read())
+    for name in SENSOR_TYPES:
+        count = store.count(name)
+        index = store._index(name, count)
+        h.update(np.int64(count).tobytes())
+        h.update(index.tobytes())
+        indexed_end = len(index) * store.block_samples
+        h.update(_read_positions(store._directory(name), store.segment_samples, indexed_end, count).tobytes())
+    return h.hexdigest()
+
+
+def is_store(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "meta.json"))
+
+
+def load_store(path: str) -> Session:
+    return SegmentStore(path).read()
+
+
+def convert_to_store(source: str, path: str, chunk_size: int = 65536, overwrite: bool = False,
+                     **writer_args) -> int:
+    # Iz saveToJson/CSV posnetka; bere po kosih, zato je pomnilnik omejen.
+    # Pretvorba ne dopolnjuje obstoječe shrambe (podatki bi bili dvakrat):
+    # piše v začasno mapo, ki na koncu nadomesti cilj.
+    if os.path.exists(path) and not overwrite:
+        raise FileExistsError(f"{path} že obstaja")
+    if source.lower().endswith(".csv"):
+        from csvstream import iter_chunks
+    else:
+        from jsonstream import iter_chunks
+    tmp_path = f"{path.rstrip(os.sep)}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    samples = 0
+    try:
+        with SegmentWriter(tmp_path, **writer_args) as writer:
+            for chunk in iter_chunks(source, chunk_size):
+                writer.append(chunk)
+                samples += len(chunk)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return samples
+
+
+def convert_to_json(path: str, target: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> int:
+    from synth import write_json
+
+    session = SegmentStore(path).read(start_ms, end_ms)
+    write_json(session, target)
+    return len(session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pretvorba med saveToJson posnetki in segmentno shrambo (.vrs)")
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--start", type=int, default=None, help="začetni timestamp (ms) pri izvozu v JSON")
+    parser.add_argument("--end", type=int, default=None, help="končni timestamp (ms) pri izvozu v JSON")
+    parser.add_argument("--force", action="store_true", help="nadomesti obstoječo shrambo")
+    args = parser.parse_args()
+
+    if is_store(args.source):
+        n = convert_to_json(args.source, args.target, args.start, args.end)
+    else:
+        n = convert_to_store(args.source, args.target, overwrite=args.force)
+    print(f"Zapisanih vzorcev: {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+SENSOR_TYPES = ("accelerometer", "gyroscope")
+SENSOR_CODES = {name: code for code, name in enumerate(SENSOR_TYPES)}
+AXES = ("x", "y", "z")
+
+
+class SensorSeries:
+    __slots__ = ("sensor_type", "timestamp", "x", "y", "z")
+
+    def __init__(self, sensor_type: str, timestamp: np.ndarray,
+                 x: np.ndarray, y: np.ndarray, z: np.ndarray):
+        self.sensor_type = sensor_type
+        self.timestamp = timestamp
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def axis(self, name: str) -> np.ndarray:
+        if name not in AXES:
+            raise ValueError(f"Neznana os: {name}")
+        return getattr(self, name)
+
+    def magnitude(self) -> np.ndarray:
+        x = self.x.astype(np.float64)
+        y = self.y.astype(np.float64)
+        z = self.z.astype(np.float64)
+        return np.sqrt(x * x + y * y + z * z)
+
+    def xyz(self) -> np.ndarray:
+        return np.column_stack((self.x, self.y, self.z))
+
+
+class Session:
+    # Vzorci so shranjeni stolpčno in urejeni po tipu senzorja, tako da je
+    # vsak senzor strnjen odsek (pogled brez kopiranja).
+    __slots__ = ("timestamp", "sensor", "x", "y", "z", "_offsets")
+
+    def __init__(self, timestamp: np.ndarray, sensor: np.ndarray,
+                 x: np.ndarray, y: np.ndarray, z: np.ndarray):
+        timestamp = np.asarray(timestamp, dtype=np.int64)
+        sensor = np.asarray(sensor, dtype=np.int8)
+        x = np.asarray(x, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        z = np.asarray(z, dtype=np.float32)
+
+        if not (len(timestamp) == len(sensor) == len(x) == len(y) == len(z)):
+            raise ValueError("Stolpci seje morajo biti enako dolgi")
+
+        if len(sensor) > 1 and np.any(sensor[1:] < sensor[:-1]):
+            order = np.argsort(sensor, kind="stable")
+            timestamp, sensor = timestamp[order], sensor[order]
+            x, y, z = x[order], y[order], z[order]
+
+        self.timestamp = timestamp
+        self.sensor = sensor
+        self.x = x
+        self.y = y
+        self.z = z
+        self._offsets = np.searchsorted(sensor, np.arange(len(SENSOR_TYPES) + 1), side="left")
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "Session":
+        records = records if isinstance(records, list) else list(records)
+        n = len(records)
+        timestamp = np.fromiter(map(itemgetter("timestamp"), records), dtype=np.int64, count=n)
+        try:
+            sensor = np.fromiter(map(SENSOR_CODES.__getitem__, map(itemgetter("sensorType"), records)),
+                                 dtype=np.int8, count=n)
+        except KeyError as e:
+            raise ValueError(f"Neznan tip senzorja: {e.args[0]}") from None
+        x = np.fromiter(map(itemgetter("x"), records), dtype=np.float32, count=n)
+        y = np.fromiter(map(itemgetter("y"), records), dtype=np.float32, count=n)
+        z = np.fromiter(map(itemgetter("z"), records), dtype=np.float32, count=n)
+        return cls(timestamp, sensor, x, y, z)
+
+    @classmethod
+    def empty(cls) -> "Session":
+        return cls(np.empty(0, np.int64), np.empty(0, np.int8),
+                   np.empty(0, np.float32), np.empty(0, np.float32), np.empty(0, np.float32))
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def count(self, sensor_type: str) -> int:
+        code = SENSOR_CODES[sensor_type]
+        return int(self._offsets[code + 1] - self._offsets[code])
+
+    def sensor_series(self, sensor_type: str) -> SensorSeries:
+        if sensor_type not in SENSOR_CODES:
+            raise ValueError(f"Neznan tip senzorja: {sensor_type}")
+        code = SENSOR_CODES[sensor_type]
+        sl = slice(self._offsets[code], self._offsets[code + 1])
+        return SensorSeries(sensor_type, self.timestamp[sl], self.x[sl], self.y[sl], self.z[sl])
+
+    @property
+    def accelerometer(self) -> SensorSeries:
+        return self.sensor_series("accelerometer")
+
+    @property
+    def gyroscope(self) -> SensorSeries:
+        return self.sensor_series("gyroscope")
+
+    def to_records(self) -> List[Dict]:
+        # Vrne vzorce v časovnem vrstnem redu, kot jih zapiše saveToJson.
+        order = np.argsort(self.timestamp, kind="stable")
+        names = np.array(SENSOR_TYPES, dtype=object)[self.sensor[order]]
+        return [
+            {"sensorType": name, "timestamp": int(t), "x": float(x), "y": float(y), "z": float(z)}
+            for name, t, x, y, z in zip(names, self.timestamp[order].tolist(), self.x[order].tolist(),
+                                        self.y[order].tolist(), self.z[order].tolist())
+        ]
+
+
+SessionLike = Union[Session, List[Dict]]
+
+
+def as_session(data: SessionLike) -> Session:
+    if isinstance(data, Session):
+        return data
+    return Session.from_records(data)
+
+
+def as_series(data: Union[SensorSeries, List[Dict]], sensor_type: Optional[str] = None) -> SensorSeries:
+    if isinstance(data, SensorSeries):
+        return data
+    n = len(data)
+    return SensorSeries(
+        sensor_type or (data[0]["sensorType"] if n else ""),
+        np.fromiter((s["timestamp"] for s in data), dtype=np.int64, count=n),
+        np.fromiter((s["x"] for s in data), dtype=np.float32, count=n),
+        np.fromiter((s["y"] for s in data), dtype=np.float32, count=n),
+        np.fromiter((s["z"] for s in data), dtype=np.float32, count=n),
+    )
@@ -0,0 +1,130 @@
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from classifier import THRESHOLDS
+from resample import CHANNELS, DEFAULT_RATE_HZ, align_session, frame_windows
+from session import SessionLike
+
+# 256 vzorcev pri 50 Hz (5,12 s) da ločljivost ~0,2 Hz, dovolj za kadenco korakov
+DEFAULT_WINDOW_LEN = 256
+DEFAULT_HOP = 64
+# Kadenca hoje je med ~0,5 in ~3,5 koraka na sekundo
+STEP_BAND_HZ = (0.5, 3.5)
+ENERGY_BANDS_HZ = ((0.0, 0.5), (0.5, 1.5), (1.5, 3.0), (3.0, 6.0), (6.0, 25.0))
+
+# Pravilo na podlagi spektra (umerjeno na posnetkih ex1): hoja po stopnicah
+# ima večino energije žiroskopa v pasu 1,5–3 Hz, hoja po ravnem pod 1,5 Hz.
+# Razmerje energij ni odvisno od amplitude, zato pravilo ujame tudi posnetke
+# s šibkim signalom, ki jih pragova STD Z / AVG GYRO označita kot Straight.
+# Pod spodnjo mejo amplitude žiroskopa (polovica praga AVG GYRO za Down) je
+# razmerje le šum mirujočega telefona in pravilo ne da oznake. Pragovi so
+# umerjeni le na štirih posnetkih.
+SPECTRAL_RULE = {"stairs_band_hz": (1.5, 3.0), "min_stairs_energy": 0.5, "up_cadence_hz": 2.0,
+                 "min_gyro_rms": THRESHOLDS["Down"]["avg_gyro"] / 2}
+GYRO_CHANNELS = tuple(i for i, channel in enumerate(CHANNELS) if channel.startswith("gyro"))
+
+
+class SpectralFeatures(NamedTuple):
+    dominant_hz: np.ndarray   # (okna, kanali)
+    band_energy: np.ndarray   # (okna, kanali, pasovi), delež energije
+    entropy: np.ndarray       # (okna, kanali), normirana na [0, 1]
+    step_energy: np.ndarray   # (okna, kanali), delež energije v STEP_BAND_HZ
+    rms: np.ndarray           # (okna, kanali), efektivna vrednost brez srednje vrednosti
+
+
+def _band_masks(freqs: np.ndarray, bands: Tuple[Tuple[float, float], ...]) -> np.ndarray:
+    return np.stack([(freqs >= lo) & (freqs < hi) for lo, hi in bands]).astype(np.float64)
+
+
+def spectral_features(frames: np.ndarray, rate_hz: float = DEFAULT_RATE_HZ,
+                      bands: Tuple[Tuple[float, float], ...] = ENERGY_BANDS_HZ) -> SpectralFeatures:
+    # frames: (okna, dolžina, kanali); en rfft čez vsa okna in kanale hkrati
+    frames = np.asarray(frames, dtype=np.float32)
+    if frames.ndim != 3:
+        raise ValueError("Pričakovana tabela oblike (okna, dolžina, kanali)")
+    n, length, channels = frames.shape
+    freqs = np.fft.rfftfreq(length, 1.0 / rate_hz)
+    if n == 0:
+        empty = np.empty((0, channels))
+        return SpectralFeatures(empty, np.empty((0, channels, len(bands))), empty, empty, empty)
+
+    centered = frames - frames.mean(axis=1, keepdims=True)
+    rms = np.sqrt(np.mean(centered.astype(np.float64) ** 2, axis=1))
+    centered *= np.hanning(length).astype(np.float32)[None, :, None]
+    spectrum = np.fft.rfft(centered, axis=1)
+    power = spectrum.real ** 2 + spectrum.imag ** 2
+    power[:, 0, :] = 0.0
+
+    total = power.sum(axis=1)
+    safe_total = np.where(total > 0, total, 1.0)
+
+    step = (freqs >= STEP_BAND_HZ[0]) & (freqs <= STEP_BAND_HZ[1])
+    if step.any():
+        step_power = power[:, step, :]
+        dominant = freqs[step][np.argmax(step_power, axis=1)]
+        step_energy = step_power.sum(axis=1) / safe_total
+    else:
+        # Kratko okno (pod ~15 vzorcev pri 50 Hz) nima frekvenc v pasu korakov
+        dominant = np.zeros((n, channels))
+        step_energy = np.zeros((n, channels))
+
+    # (okna, f, kanali) x (pasovi, f) -> (okna, kanali, pasovi)
+    band_energy = np.einsum("nfc,bf->ncb", power, _band_masks(freqs, bands)) / safe_total[:, :, None]
+
+    # Entropija je normirana z log(len(freqs) - 1), kar je smiselno šele od treh frekvenc
+    flat = (total <= 0) | (len(freqs) < 3)
+    p = power / safe_total[:, None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.sum(np.where(p > 0, p * np.log(p), 0.0), axis=1) / np.log(max(len(freqs) - 1, 2))
+
+    dominant = np.where(flat, 0.0, dominant)
+    entropy = np.where(flat, 1.0, entropy)
+    return SpectralFeatures(dominant, band_energy, entropy, np.where(flat, 0.0, step_energy), rms)
+
+
+def session_spectral_features(session: SessionLike, rate_hz: float = DEFAULT_RATE_HZ,
+                              window_len: int = DEFAULT_WINDOW_LEN, hop: int = DEFAULT_HOP) -> SpectralFeatures:
+    signal = align_session(session, rate_hz)
+    if 0 < len(signal.data) < window_len:
+        # Kratek posnetek: eno okno čez celoten posnetek
+        window_len = hop = len(signal.data)
+    return spectral_features(frame_windows(signal, window_len, hop), rate_hz)
+
+
+def summarize(features: SpectralFeatures) -> Dict[str, Dict[str, float]]:
+    # Mediana po oknih za vsak kanal
+    if len(features.dominant_hz) == 0:
+        return {}
+    dominant = np.median(features.dominant_hz, axis=0)
+    entropy = np.median(features.entropy, axis=0)
+    step_energy = np.median(features.step_energy, axis=0)
+    return {
+        channel: {"dominant_hz": float(dominant[i]), "entropy": float(entropy[i]),
+                  "step_energy": float(step_energy[i])}
+        for i, channel in enumerate(CHANNELS)
+    }
+
+
+def cadence_hz(features: SpectralFeatures, channel: str = "accel_z") -> float:
+    if len(features.dominant_hz) == 0:
+        return 0.0
+    return float(np.median(features.dominant_hz[:, CHANNELS.index(channel)]))
+
+
+def spectral_label(features: SpectralFeatures, rule: Optional[dict] = None) -> Optional[str]:
+    # Vrne "Up"/"Down", če spekter žiroskopa kaže kadenco hoje po stopnicah, sicer None
+    rule = rule or SPECTRAL_RULE
+    if len(features.dominant_hz) == 0:
+        return None
+    bands = list(ENERGY_BANDS_HZ)
+    band = bands.index(rule["stairs_band_hz"])
+    gyro = list(GYRO_CHANNELS)
+    gyro_rms = float(np.median(np.sqrt((features.rms[:, gyro] ** 2).sum(axis=1))))
+    if gyro_rms < rule["min_gyro_rms"]:
+        return None
+    stairs_energy = float(np.median(features.band_energy[:, gyro, band], axis=0).mean())
+    if stairs_energy < rule["min_stairs_energy"]:
+        return None
+    cadence = float(np.median(features.dominant_hz[:, gyro], axis=0).mean())
+    return "Up" if cadence >= rule["up_cadence_hz"] else "Down"
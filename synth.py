@@ -0,0 +1,138 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from classifier import LABELS
+from session import SENSOR_CODES, SENSOR_TYPES, Session
+
+DEFAULT_RATE_HZ = 50.0
+DEFAULT_GRAVITY = 9.80665
+
+# Amplitude so izbrane tako, da generirani signali dajo približno enake
+# značilke (STD Z, AVG GYRO) kot posnetki ex1_andrea_*.
+MOVEMENT_PROFILES = {
+    "Straight": {"cadence_hz": 1.2, "z_amp": 0.20, "xy_amp": (0.116, 0.116), "gyro_amp": (0.021, 0.021, 0.021)},
+    "Up": {"cadence_hz": 2.0, "z_amp": 0.48, "xy_amp": (0.24, 0.17), "gyro_amp": (0.052, 0.045, 0.061)},
+    "Down": {"cadence_hz": 1.9, "z_amp": 0.34, "xy_amp": (0.17, 0.12), "gyro_amp": (0.037, 0.032, 0.049)},
+}
+
+
+def generate_session(movement: str, duration_s: float = 10.0, rate_hz: float = DEFAULT_RATE_HZ,
+                     noise: float = 0.01, cadence_hz: Optional[float] = None,
+                     gravity: float = DEFAULT_GRAVITY, start_ms: int = 0, jitter_ms: float = 0.0,
+                     seed: Optional[int] = None) -> Session:
+    # noise je standardni odklon šuma kot delež amplitude posameznega kanala (0.01 = 1 %)
+    if movement not in MOVEMENT_PROFILES:
+        raise ValueError(f"Neznan tip hoje: {movement}")
+    profile = MOVEMENT_PROFILES[movement]
+    rng = np.random.default_rng(seed)
+    f = cadence_hz or profile["cadence_hz"]
+    n = int(round(duration_s * rate_hz))
+
+    t = np.arange(n, dtype=np.float64) / rate_hz
+    timestamp = start_ms + np.round(t * 1000).astype(np.int64)
+    if jitter_ms:
+        timestamp += np.round(rng.normal(0.0, jitter_ms, n)).astype(np.int64)
+        timestamp.sort()
+
+    phase = 2 * np.pi * f * t
+    z_amp = profile["z_amp"]
+    z = gravity + z_amp * (np.sin(phase) + 0.3 * np.sin(2 * phase + 0.7))
+    x = profile["xy_amp"][0] * np.sin(phase + 1.1)
+    y = profile["xy_amp"][1] * np.sin(phase + 2.3)
+    accel = np.stack((x, y, z))
+    accel_amp = np.array([profile["xy_amp"][0], profile["xy_amp"][1], z_amp])[:, None]
+    accel += rng.normal(0.0, 1.0, accel.shape) * noise * accel_amp
+
+    gyro_amp = np.array(profile["gyro_amp"])[:, None]
+    gyro = gyro_amp * np.sin(phase[None, :] + np.array([[0.0], [2.1], [4.2]]))
+    gyro += rng.normal(0.0, 1.0, gyro.shape) * noise * gyro_amp
+
+    return Session(
+        np.concatenate((timestamp, timestamp)),
+        np.repeat(np.array([SENSOR_CODES["accelerometer"], SENSOR_CODES["gyroscope"]], dtype=np.int8), n),
+        np.concatenate((accel[0], gyro[0])),
+        np.concatenate((accel[1], gyro[1])),
+        np.concatenate((accel[2], gyro[2])),
+    )
+
+
+def write_json(session: Session, file_path: str) -> None:
+    # Enaka oblika kot Gson setPrettyPrinting v saveToJson
+    template = ('  {\n    "sensorType": "%s",\n    "timestamp": %d,\n'
+                '    "x": %r,\n    "y": %r,\n    "z": %r\n  }')
+    records = session.to_records()
+    with open(file_path, "w") as f:
+        f.write("[\n")
+        f.write(",\n".join(template % (r["sensorType"], r["timestamp"], r["x"], r["y"], r["z"]) for r in records))
+        f.write("\n]")
+
+
+def write_csv(session: Session, file_path: str) -> None:
+    # Enaka oblika kot saveToCsv (Float.toString zapiše najkrajši float32 zapis)
+    order = np.argsort(session.timestamp, kind="stable")
+    names = np.array(SENSOR_TYPES)[session.sensor[order]]
+    columns = (session.timestamp[order].astype(str), names, session.x[order].astype(str),
+               session.y[order].astype(str), session.z[order].astype(str))
+    with open(file_path, "w") as f:
+        f.write("timestamp,sensorType,x,y,z\n")
+        f.writelines(f"{t},{name},{x},{y},{z}\n" for t, name, x, y, z in zip(*columns))
+
+
+def write_npz(session: Session, file_path: str) -> None:
+    np.savez(file_path, timestamp=session.timestamp, sensor=session.sensor, x=session.x, y=session.y, z=session.z)
+
+
+def recording_filename(name: str, user: str, movement: str, recorded_at: datetime, extension: str = ".json") -> str:
+    return f"{name}_{user}_{movement}_{recorded_at.strftime('%Y%m%d_%H%M%S')}{extension}"
+
+
+WRITERS = {"json": (write_json, ".json"), "csv": (write_csv, ".csv"), "npz": (write_npz, ".npz")}
+
+
+def _generate_one(args: Tuple[str, str, str, float, float, str, int]) -> str:
+    directory, user, movement, duration_s, noise, fmt, index = args
+    writer, extension = WRITERS[fmt]
+    recorded_at = datetime(2025, 5, 16) + timedelta(seconds=index)
+    path = os.path.join(directory, recording_filename(f"synth{index}", user, movement, recorded_at, extension))
+    rng = np.random.default_rng(index)
+    # Rahla razpršenost kadence med sejami, da korpus ni sestavljen iz kopij
+    cadence = MOVEMENT_PROFILES[movement]["cadence_hz"] * rng.uniform(0.9, 1.1)
+    writer(generate_session(movement, duration_s, noise=noise, cadence_hz=cadence, seed=index), path)
+    return path
+
+
+def generate_corpus(directory: str, count: int, duration_s: float = 10.0, noise: float = 0.01,
+                    fmt: str = "json", users: int = 5, workers: Optional[int] = None) -> List[str]:
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(directory, f"user{i % users}", LABELS[i % len(LABELS)], duration_s, noise, fmt, i)
+             for i in range(count)]
+    if workers == 1 or count < 16:
+        return [_generate_one(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_generate_one, tasks, chunksize=32))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator sintetičnih signalov hoje (50 Hz)")
+    parser.add_argument("output", help="izhodna mapa")
+    parser.add_argument("--count", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=10.0, help="dolžina seje v sekundah")
+    parser.add_argument("--noise", type=float, default=0.01, help="delež šuma (0.01 = 1 %%)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="json")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = generate_corpus(args.output, args.count, args.duration, args.noise, args.format, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Ustvarjenih {len(paths)} posnetkov v {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
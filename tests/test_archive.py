@@ -0,0 +1,79 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from archive import ArchiveWriter, _CHUNK_HEADER, MAGIC, convert_corpus, iter_chunks, read_archive, write_archive
+from session import Session
+from synth import generate_session, write_json
+
+
+def _assert_same(a: Session, b: Session) -> None:
+    assert len(a) == len(b)
+    for name in ("timestamp", "sensor", "x", "y", "z"):
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_round_trip(tmp_path, codec):
+    session = generate_session("Up", 30.0, jitter_ms=3.0, seed=1)
+    path = str(tmp_path / "rec.vra")
+    write_archive(session, path, chunk_samples=500, codec=codec)
+
+    _assert_same(read_archive(path), session)
+    chunks = list(iter_chunks(path))
+    assert len(chunks) > 2 and all(len(chunk) <= 500 for chunk in chunks)
+    streamed = Session(*(np.concatenate([getattr(c, name) for c in chunks])
+                         for name in ("timestamp", "sensor", "x", "y", "z")))
+    order = np.lexsort((streamed.timestamp, streamed.sensor))
+    _assert_same(Session(*(getattr(streamed, name)[order] for name in ("timestamp", "sensor", "x", "y", "z"))),
+                 session)
+    assert os.listdir(tmp_path) == ["rec.vra"]
+
+
+def test_corrupted_crc_raises(tmp_path):
+    path = str(tmp_path / "rec.vra")
+    write_archive(generate_session("Down", 5.0, seed=2), path)
+    with open(path, "r+b") as f:
+        # crc32 je zadnje polje glave prvega kosa
+        f.seek(len(MAGIC) + _CHUNK_HEADER.size - 1)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(ValueError, match="kontrolna vsota"):
+        read_archive(path)
+
+
+def test_concurrent_writers_use_distinct_temp_files(tmp_path):
+    path = str(tmp_path / "rec.vra")
+    first, second = ArchiveWriter(path), ArchiveWriter(path)
+    assert first._tmp_path != second._tmp_path
+    first.append(generate_session("Up", 2.0, seed=3))
+    second.append(generate_session("Down", 2.0, seed=4))
+    first.close()
+    second.close()
+    assert len(read_archive(path)) == len(generate_session("Down", 2.0, seed=4))
+    assert os.listdir(tmp_path) == ["rec.vra"]
+
+
+def test_convert_corpus_reports_skipped_files(tmp_path, capsys):
+    source = tmp_path / "src"
+    source.mkdir()
+    write_json(generate_session("Up", 2.0, seed=5), str(source / "ex1_ana_Up_20250101_120000.json"))
+    shutil.copy(source / "ex1_ana_Up_20250101_120000.json", source / "ex1_ana_Up_20250101_120000_zavrnjen.json")
+    files, _, _, _ = convert_corpus(str(source), str(tmp_path / "dst"), workers=1)
+    assert files == 1
+    assert "ex1_ana_Up_20250101_120000_zavrnjen.json" in capsys.readouterr().out
+
+
+def test_oversized_chunk_is_rejected(tmp_path):
+    import zlib
+
+    # Glava obljublja en vzorec, podatki pa se razširijo v 100 MB
+    bomb = zlib.compress(b"\0" * 100_000_000)
+    path = str(tmp_path / "bomb.vra")
+    with open(path, "wb") as f:
+        f.write(MAGIC + _CHUNK_HEADER.pack(0, 1, 1, len(bomb), 0) + bomb)
+    with pytest.raises(ValueError):
+        read_archive(path)
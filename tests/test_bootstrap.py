@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from bootstrap import (MIN_TEST_UNITS, binomial_p_value, bootstrap_confusion, clopper_pearson_lower,
+                       summarize, unit_counts)
+from classifier import LABELS
+
+
+def _summary(true: np.ndarray, predicted: np.ndarray, groups=None, resamples: int = 200):
+    k = len(LABELS)
+    observed = np.bincount(true * k + predicted, minlength=k * k).reshape(k, k)
+    rows = unit_counts(true, predicted, groups)
+    samples = bootstrap_confusion(rows, resamples, seed=1, workers=1)
+    return summarize(observed, samples, rows)
+
+
+def test_exact_binomial_matches_closed_form():
+    # Vse pravilno: P(X >= n) = p0 ** n
+    assert binomial_p_value(32, 32, 0.90) == pytest.approx(0.9 ** 32)
+    assert binomial_p_value(32, 32, 0.85) == pytest.approx(0.85 ** 32)
+    assert clopper_pearson_lower(32, 32, 0.05) == pytest.approx(0.05 ** (1 / 32))
+    assert binomial_p_value(0, 10, 0.9) == 1.0
+
+
+def test_all_correct_gives_verdict():
+    true = np.repeat(np.arange(len(LABELS)), 32)
+    result = _summary(true, true.copy())
+    for c in result.classes:
+        assert c.correct_units == c.units == 32
+        assert c.accuracy_ci == (1.0, 1.0)
+        assert c.p_value == pytest.approx(c.claim ** 32)
+        assert c.no_verdict is None
+        assert c.p_value < 0.05
+
+
+def test_one_recording_per_class_gives_no_verdict():
+    true = np.repeat(np.arange(len(LABELS)), 20)
+    predicted = true.copy()
+    predicted[:3] = 1
+    groups = np.repeat(np.arange(len(LABELS)), 20)
+    result = _summary(true, predicted, groups)
+    for c in result.classes:
+        assert c.units == 1
+        assert c.p_value == pytest.approx(c.claim)
+        assert "premalo" in c.no_verdict
+
+
+def test_regular_case_gives_verdict():
+    rng = np.random.default_rng(0)
+    n = 400
+    true = np.repeat(np.arange(len(LABELS)), n)
+    predicted = np.where(rng.random(len(true)) < 0.97, true, (true + 1) % len(LABELS))
+    result = _summary(true, predicted)
+    for c in result.classes:
+        assert c.units >= MIN_TEST_UNITS
+        assert c.no_verdict is None
+        assert c.p_value < 0.05
+        assert c.lower_bound > c.claim
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+
+import cache
+from cache import SessionCache
+from loaders import parser_for
+from synth import generate_session, write_json
+
+
+class CountingParser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        return parser_for(file_path)(file_path)
+
+
+def _recording(tmp_path, name, seed):
+    path = str(tmp_path / name)
+    write_json(generate_session("Up", 2.0, seed=seed), path)
+    return path
+
+
+def test_unchanged_file_is_not_rehashed(tmp_path, monkeypatch):
+    path = _recording(tmp_path, "a.json", 1)
+    store, parse = SessionCache(str(tmp_path / "cache")), CountingParser()
+    store.load(path, parse)
+
+    hashed = []
+    monkeypatch.setattr(cache, "file_digest", lambda p: hashed.append(p) or "x")
+    store.load(path, parse)
+    assert parse.calls == 1 and hashed == []
+
+
+def test_changed_mtime_rehashes_but_reuses_entry(tmp_path):
+    path = _recording(tmp_path, "a.json", 1)
+    store, parse = SessionCache(str(tmp_path / "cache")), CountingParser()
+    first = store.load(path, parse)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    # Vsebina je enaka, zato zgoščena vrednost vodi do istega .bin
+    np.testing.assert_array_equal(store.load(path, parse).x, first.x)
+    assert parse.calls == 1
+
+
+def test_changed_content_forces_rebuild(tmp_path):
+    path = _recording(tmp_path, "a.json", 1)
+    store, parse = SessionCache(str(tmp_path / "cache")), CountingParser()
+    store.load(path, parse)
+
+    # Enaka velikost, drugačna vsebina: velikost ne zadošča, odloči zgoščena vrednost
+    old_digest = store.digest(path)
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    index = data.index(b'"x":') + len(b'"x":')
+    while not chr(data[index]).isdigit():
+        index += 1
+    data[index] = ord("7") if data[index] != ord("7") else ord("3")
+    with open(path, "wb") as f:
+        f.write(bytes(data))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    session = store.load(path, parse)
+    assert parse.calls == 2
+    assert store.digest(path) != old_digest
+    np.testing.assert_array_equal(session.x, parser_for(path)(path).x)
+
+
+def test_changed_size_forces_rebuild(tmp_path):
+    path = _recording(tmp_path, "a.json", 1)
+    store, parse = SessionCache(str(tmp_path / "cache")), CountingParser()
+    store.load(path, parse)
+    write_json(generate_session("Up", 3.0, seed=1), path)
+    assert len(store.load(path, parse)) == len(generate_session("Up", 3.0, seed=1))
+    assert parse.calls == 2
+
+
+def test_lru_evicts_oldest_entry(tmp_path):
+    paths = [_recording(tmp_path, f"{name}.json", seed) for seed, name in enumerate("abc")]
+    store, parse = SessionCache(str(tmp_path / "cache")), CountingParser()
+    for i, path in enumerate(paths[:2]):
+        store.load(path, parse)
+        os.utime(store._bin_path(store.digest(path)), ns=(i * 10 ** 9, i * 10 ** 9))
+    entry_size = store.size() // 2
+
+    # Prostor za dva vnosa: tretji izrine najdlje neuporabljenega (a)
+    store.max_bytes = int(entry_size * 2.5)
+    store.load(paths[2], parse)
+    assert not os.path.exists(store._bin_path(store.digest(paths[0])))
+    assert os.path.exists(store._bin_path(store.digest(paths[1])))
+    assert os.path.exists(store._bin_path(store.digest(paths[2])))
+    assert not os.path.exists(store._source_path(paths[0]))
@@ -0,0 +1,60 @@
+import itertools
+
+import numpy as np
+
+from calibration import (DOWN, STRAIGHT, UP, WindowDataset, calibrate, candidate_grid, correct_counts,
+                         suffix_counts)
+from classifier import LABELS
+
+
+def _dataset(seed: int, n: int = 60) -> WindowDataset:
+    rng = np.random.default_rng(seed)
+    # Diskretne vrednosti, da se veliko oken ujema s kandidati (meje > so stroge)
+    std_z = rng.choice(np.array([0.0, 0.1, 0.2, 0.2, 0.3, 0.5]), n)
+    avg_gyro = rng.choice(np.array([0.0, 0.02, 0.04, 0.04, 0.06]), n)
+    labels = rng.choice(np.array([STRAIGHT, UP, DOWN], dtype=np.int8), n)
+    return WindowDataset(std_z, avg_gyro, labels, np.arange(n, dtype=np.int32))
+
+
+def _brute_force(dataset: WindowDataset, std_candidates: np.ndarray, gyro_candidates: np.ndarray):
+    s, g, labels = dataset.std_z, dataset.avg_gyro, dataset.labels
+    best, best_index = -1, None
+    counts = {}
+    for a, b, c, d in itertools.product(range(len(std_candidates)), range(len(gyro_candidates)),
+                                        range(len(std_candidates)), range(len(gyro_candidates))):
+        up = (s > std_candidates[a]) & (g > gyro_candidates[b])
+        down = ~up & (s > std_candidates[c]) & (g > gyro_candidates[d])
+        predicted = np.where(up, UP, np.where(down, DOWN, STRAIGHT))
+        correct = int(np.count_nonzero(predicted == labels))
+        counts[a, b, c, d] = correct
+        if correct > best:
+            best, best_index = correct, (a, b, c, d)
+    return counts, best, best_index
+
+
+def test_threshold_search_matches_brute_force():
+    for seed in range(3):
+        dataset = _dataset(seed)
+        std_candidates = candidate_grid(dataset.std_z, 5)
+        gyro_candidates = candidate_grid(dataset.avg_gyro, 5)
+        # Robovi mreže so najmanjša in največja vrednost, ki ju okna dosežejo
+        assert std_candidates[0] == dataset.std_z.min() and std_candidates[-1] == dataset.std_z.max()
+
+        counts, best, (a, b, c, d) = _brute_force(dataset, std_candidates, gyro_candidates)
+        n_straight = int(np.count_nonzero(dataset.labels == STRAIGHT))
+        correct = correct_counts(suffix_counts(dataset.std_z, dataset.avg_gyro, dataset.labels,
+                                               std_candidates, gyro_candidates)) + n_straight
+        for index, value in counts.items():
+            assert correct[index] == value, index
+
+        result = calibrate(dataset, grid_size=5)
+        assert result.accuracy == best / len(dataset.labels)
+        assert result.thresholds["Up"] == {"std_z": std_candidates[a], "avg_gyro": gyro_candidates[b]}
+        assert result.thresholds["Down"] == {"std_z": std_candidates[c], "avg_gyro": gyro_candidates[d]}
+
+
+def test_single_class_corpus():
+    # Samo Straight: najboljši pragovi so na zgornjem robu, kjer nobeno okno ni stopnice
+    dataset = WindowDataset(np.array([0.1, 0.2, 0.2]), np.array([0.01, 0.03, 0.03]),
+                            np.full(3, LABELS.index("Straight"), dtype=np.int8), np.arange(3, dtype=np.int32))
+    assert calibrate(dataset, grid_size=4).accuracy == 1.0
@@ -0,0 +1,69 @@
+import numpy as np
+
+from classifier import (LABELS, classify, classify_accel, classify_batch, classify_features, classify_frames,
+                        decode_labels, frame_features)
+from features import extract_features
+from resample import CHANNELS
+from session import Session
+from synth import generate_session
+from windows import MIN_ACCEL_SAMPLES, classify_windows
+
+
+def _subset(session: Session, mask: np.ndarray) -> Session:
+    return Session(session.timestamp[mask], session.sensor[mask], session.x[mask], session.y[mask],
+                   session.z[mask])
+
+
+def _sessions():
+    sessions = [generate_session(movement, 6.0, noise=noise, seed=seed)
+                for movement in LABELS for seed, noise in enumerate((0.005, 0.05, 0.2))]
+    up = generate_session("Up", 6.0, seed=7)
+    accel = up.sensor == 0
+    sessions.append(_subset(up, accel))                               # brez žiroskopa
+    sessions.append(_subset(up, np.flatnonzero(accel)[:1]))           # en vzorec
+    sessions.append(_subset(up, np.flatnonzero(accel)[:1].tolist() + np.flatnonzero(~accel)[:1].tolist()))
+    sessions.append(Session.empty())
+    return sessions
+
+
+def test_batch_matches_scalar_per_session():
+    features = [extract_features(session) for session in _sessions()]
+    std_z = np.array([f.std_z for f in features])
+    avg_gyro = np.array([f.avg_gyro for f in features])
+    expected = [classify_features(f) for f in features]
+    assert list(decode_labels(classify_batch(std_z, avg_gyro))) == expected
+    assert set(expected) == set(LABELS)
+
+
+def test_batch_matches_scalar_on_threshold_grid():
+    values = np.array([np.nan, -np.inf, 0.0, 0.03, 0.035, 0.045, 0.2, 0.22, 0.3, 0.31, np.inf])
+    std_z, avg_gyro = (a.ravel() for a in np.meshgrid(values, values))
+    expected = [classify(s, g) for s, g in zip(std_z, avg_gyro)]
+    assert list(decode_labels(classify_batch(std_z, avg_gyro))) == expected
+
+
+def test_windows_match_scalar_per_window():
+    for session in _sessions():
+        windows = classify_windows(session)
+        for start, end, label in zip(windows.start, windows.end, windows.labels):
+            window = _subset(session, (session.timestamp >= start) & (session.timestamp < end))
+            features = extract_features(window)
+            accel = window.sensor_series("accelerometer")
+            assert len(accel) >= MIN_ACCEL_SAMPLES
+            if len(window.sensor_series("gyroscope")):
+                assert label == classify_features(features)
+            else:
+                assert label == classify_accel(features.std_z)
+
+
+def test_frames_match_scalar_per_frame():
+    rng = np.random.default_rng(0)
+    frames = rng.normal(0.0, 0.2, size=(200, 50, len(CHANNELS)))
+    frames *= rng.uniform(0.0, 2.0, size=(200, 1, 1))
+    expected = []
+    for frame in frames:
+        z = frame[:, CHANNELS.index("accel_z")]
+        gyro = frame[:, [CHANNELS.index(c) for c in ("gyro_x", "gyro_y", "gyro_z")]]
+        expected.append(classify(float(np.std(z)), float(np.mean(np.linalg.norm(gyro, axis=1)))))
+    assert list(decode_labels(classify_frames(frames))) == expected
+    assert frame_features(frames)[0].shape == (200,)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from csvstream import iter_chunks, parse_block, parse_csv
+
+
+def test_blank_lines_are_ignored(tmp_path):
+    path = tmp_path / "rec.csv"
+    path.write_bytes(b"timestamp,sensorType,x,y,z\n"
+                     b"1,accelerometer,0.1,0.2,9.8\n"
+                     b"\n"
+                     b"2,gyroscope,0.01,0.02,0.03\r\n"
+                     b"\r\n"
+                     b"3,accelerometer,0.1,0.2,9.7\n\n")
+    session = parse_csv(str(path))
+    assert sorted(session.timestamp.tolist()) == [1, 2, 3]
+    assert session.count("accelerometer") == 2
+    assert sum(len(c) for c in iter_chunks(str(path), chunk_size=2)) == 3
+
+
+def test_missing_column_is_rejected():
+    with pytest.raises(ValueError):
+        parse_block(b"1,accelerometer,0.1,0.2,9.8\n2,gyroscope,0.1,0.2\n")
+
+
+def test_block_shape():
+    rows = parse_block(b"1,accelerometer,0.1,0.2,9.8\n2,gyroscope,0.1,0.2,0.3")
+    assert rows.shape == (2, 5)
+    assert np.array_equal(rows[:, 1], [0, 1])
@@ -0,0 +1,45 @@
+import numpy as np
+
+import featurestore
+from featurestore import FeatureStore
+from session import Session
+
+
+def _write_npz(path, n: int = 100, offset: float = 0.0):
+    t = np.arange(n, dtype=np.int64) * 20
+    np.savez(path, timestamp=np.concatenate((t, t)), sensor=np.repeat(np.array([0, 1], np.int8), n),
+             x=np.zeros(2 * n, np.float32), y=np.zeros(2 * n, np.float32),
+             z=(np.sin(np.arange(2 * n)) + offset).astype(np.float32))
+
+
+def test_session_features_are_not_shared(tmp_path):
+    path = str(tmp_path / "rec.npz")
+    _write_npz(path)
+    store = FeatureStore(str(tmp_path / "features.sqlite"))
+    first = store.session_features(path)
+    std_z = first.std_z
+    first.merge(store.session_features(path))
+    first.update(Session(np.array([0]), np.array([0], np.int8), np.zeros(1), np.zeros(1), np.array([50.0])))
+    assert store.session_features(path).std_z == std_z
+    assert store.hits == 2 and store.misses == 1
+
+
+def test_digest_is_memoized_for_uncached_formats(tmp_path, monkeypatch):
+    path = str(tmp_path / "rec.npz")
+    _write_npz(path)
+    calls = []
+    original = featurestore.file_digest
+    monkeypatch.setattr(featurestore, "file_digest", lambda p: calls.append(p) or original(p))
+
+    db = str(tmp_path / "features.sqlite")
+    store = FeatureStore(db)
+    digest = store.digest(path)
+    store.session_features(path)
+    store.session_features(path)
+    assert FeatureStore(db).digest(path) == digest
+    assert len(calls) == 1
+
+    # Sprememba vsebine (velikost/mtime) da novo zgoščeno vrednost
+    _write_npz(path, n=120, offset=1.0)
+    assert store.digest(path) != digest
+    assert len(calls) == 2
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import inference_server
+from inference_server import InferenceServer, _request
+from session import Session
+
+
+def _body(n: int = 50, z_step: float = 0.5) -> bytes:
+    records = []
+    for i in range(n):
+        z = 9.81 + (z_step if i % 2 else -z_step)
+        records.append({"sensorType": "accelerometer", "timestamp": 20 * i, "x": 0.0, "y": 0.0, "z": z})
+        records.append({"sensorType": "gyroscope", "timestamp": 20 * i + 5, "x": 0.1, "y": 0.0, "z": 0.0})
+    return json.dumps(records).encode("utf-8")
+
+
+async def _with_server(scenario, **server_args):
+    server = InferenceServer(**server_args)
+    port = await server.start("127.0.0.1", 0)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        return await scenario(server, reader, writer)
+    finally:
+        writer.close()
+        await server.stop()
+
+
+def test_classify_over_http():
+    async def scenario(server, reader, writer):
+        return await _request(reader, writer, "POST", "/classify", _body())
+
+    status, payload = asyncio.run(_with_server(scenario))
+    assert status == 200
+    assert payload["label"] == "Up"
+    assert payload["samples"] == 100
+
+
+def test_batcher_survives_scoring_error(monkeypatch):
+    original = inference_server.batch_features
+    calls = {"n": 0}
+
+    def flaky(sessions):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("pokvarjen paket")
+        return original(sessions)
+
+    monkeypatch.setattr(inference_server, "batch_features", flaky)
+
+    async def scenario(server, reader, writer):
+        failed = await _request(reader, writer, "POST", "/classify", _body())
+        recovered = await _request(reader, writer, "POST", "/classify", _body())
+        return failed, recovered, server.stats.errors
+
+    (status1, payload1), (status2, _), errors = asyncio.run(_with_server(scenario, timeout_s=2.0))
+    assert status1 == 500
+    assert "pokvarjen paket" in payload1["error"]
+    assert status2 == 200
+    assert errors == 1
+
+
+def test_classify_times_out_instead_of_hanging():
+    async def scenario(server, reader, writer):
+        # Brez zanke paketov zahteva nikoli ne dobi ocene
+        server._batcher.cancel()
+        return await _request(reader, writer, "POST", "/classify", _body())
+
+    status, _ = asyncio.run(_with_server(scenario, timeout_s=0.1))
+    assert status == 503
+
+
+def test_requests_within_budget_share_a_batch():
+    async def scenario(server, reader, writer):
+        session = Session.from_records(json.loads(_body()))
+
+        async def late(delay: float):
+            await asyncio.sleep(delay)
+            return await server.classify(session)
+
+        # Zahteve prihajajo z razmikom, a vse znotraj proračuna prve
+        return await asyncio.gather(*(late(0.01 * i) for i in range(4)))
+
+    results = asyncio.run(_with_server(scenario, budget_ms=200.0))
+    assert [r["batch_size"] for r in results] == [4] * 4
+
+
+def test_max_batch_closes_batch_before_budget():
+    async def scenario(server, reader, writer):
+        session = Session.from_records(json.loads(_body()))
+        return await asyncio.gather(*(server.classify(session) for _ in range(5)))
+
+    results = asyncio.run(_with_server(scenario, budget_ms=300.0, max_batch=2))
+    assert sorted(r["batch_size"] for r in results) == [1, 2, 2, 2, 2]
+
+
+def test_out_of_range_timestamp_is_bad_request():
+    records = json.loads(_body())
+    records[0]["timestamp"] = 1e30
+
+    async def scenario(server, reader, writer):
+        return await _request(reader, writer, "POST", "/classify", json.dumps(records).encode("utf-8"))
+
+    status, _ = asyncio.run(_with_server(scenario))
+    assert status == 400
+
+
+def test_accel_only_request_matches_live_rule():
+    from classifier import classify_accel
+    from features import extract_features
+    from inference_server import decode_request
+
+    records = [r for r in json.loads(_body()) if r["sensorType"] == "accelerometer"]
+    body = json.dumps(records).encode("utf-8")
+    gyro_only = json.dumps([r for r in json.loads(_body()) if r["sensorType"] == "gyroscope"]).encode("utf-8")
+
+    async def scenario(server, reader, writer):
+        accel = await _request(reader, writer, "POST", "/classify", body)
+        missing = await _request(reader, writer, "POST", "/classify", gyro_only)
+        return accel, missing
+
+    (status, payload), (missing_status, _) = asyncio.run(_with_server(scenario))
+    assert status == 200
+    assert payload["avg_gyro"] is None
+    assert payload["label"] == classify_accel(extract_features(decode_request(body)).std_z) == "Up"
+    assert missing_status == 400
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from live_service import RESULTS_TOPIC, InProcessBroker, LiveClassificationService
+
+
+def _samples(device: str, start: int, count: int, sensor: str = "accel"):
+    # 50 Hz vzorci v obliki, ki jo objavlja telefon
+    for i in range(count):
+        record = {"x": 0.0, "y": 0.0, "z": 9.81 + (0.5 if i % 2 else -0.5), "timestamp": start + 20 * i,
+                  "user": device}
+        yield f"sensors/{device}/{sensor}", json.dumps(record).encode("utf-8")
+
+
+async def _run(service: LiveClassificationService, broker: InProcessBroker, messages) -> list:
+    results = await broker.subscribe(f"{RESULTS_TOPIC}/#")
+    await service.start()
+    for topic, payload in messages:
+        await broker.publish(topic, payload)
+    await asyncio.wait_for(service.drain(), timeout=5)
+    await service.stop()
+    out = []
+    while not results.empty():
+        out.append(json.loads(results.get_nowait()[1]))
+    return out
+
+
+def test_round_trip_through_in_process_broker():
+    broker = InProcessBroker()
+    service = LiveClassificationService(broker, workers=2, drop_when_full=False)
+    messages = list(_samples("a", 0, 200)) + list(_samples("a", 0, 200, "gyro"))
+    results = asyncio.run(_run(service, broker, messages))
+    assert results
+    assert {r["device"] for r in results} == {"a"}
+    assert service.stats.errors == 0
+    assert service.stats.processed == len(messages)
+
+
+def test_worker_survives_processing_error(monkeypatch):
+    broker = InProcessBroker()
+    service = LiveClassificationService(broker, workers=1, queue_size=4, drop_when_full=False)
+    calls = {"n": 0}
+
+    async def failing_publish(device, window):
+        calls["n"] += 1
+        raise OSError("objava ni uspela")
+
+    monkeypatch.setattr(service, "_publish", failing_publish)
+    # Več sporočil, kot jih gre v vrsto: brez obravnave napake bi drain() obvisel
+    messages = list(_samples("b", 0, 200))
+    asyncio.run(_run(service, broker, messages))
+    assert calls["n"] > 0
+    assert service.stats.errors == calls["n"]
+    assert service.stats.errors + service.stats.processed == len(messages)
+
+
+def test_accelerometer_only_traffic_is_classified(tmp_path):
+    # Telefon (RecordDataWidget.kt) objavlja le sensors/accel
+    broker = InProcessBroker()
+    service = LiveClassificationService(broker, workers=1, drop_when_full=False, record_dir=str(tmp_path))
+    results = asyncio.run(_run(service, broker, list(_samples("phone", 0, 300))))
+    assert results
+    assert all(r["avg_gyro"] is None for r in results)
+    assert {r["label"] for r in results} == {"Up"}
+    assert (tmp_path / "phone.vrs").is_dir()
+
+
+def test_clock_jump_resets_device_window():
+    broker = InProcessBroker()
+    service = LiveClassificationService(broker, workers=1, drop_when_full=False)
+    # Relativni časi, nato epoch-ms, nato skok nazaj
+    messages = list(_samples("c", 0, 300)) + list(_samples("c", 1_700_000_000_000, 300)) \
+        + list(_samples("c", 0, 300))
+    results = asyncio.run(_run(service, broker, messages))
+    assert service.stats.resets == 2
+    assert service.stats.errors == 0
+    assert all(r["end"] - r["start"] == service.window_s * 1000 for r in results)
+    assert any(r["start"] >= 1_700_000_000_000 for r in results)
@@ -0,0 +1,18 @@
+import profiling
+from hypotesis import analyze_session, compute_session_metrics
+from synth import generate_session
+
+
+def test_instrumented_stages_accept_session_keyword(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path / "profil"))
+    assert profiling.enable_from_env()
+    session = generate_session("Up", 2.0, seed=1)
+    try:
+        assert analyze_session(session=session) == analyze_session(session)
+        assert compute_session_metrics(session=session)[0] == compute_session_metrics(session)[0]
+        stats = profiling.summary()
+    finally:
+        profiling.disable()
+        profiling.reset()
+    assert stats["analyze_session"]["samples"] == 2 * len(session)
+    assert stats["features"]["samples"] == 2 * len(session)
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from segstore import SegmentStore, convert_to_store
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "ex1_andrea_Up_20250516_231912.json")
+
+
+def test_convert_refuses_existing_store(tmp_path):
+    target = str(tmp_path / "rec.vrs")
+    n = convert_to_store(SOURCE, target)
+    assert len(SegmentStore(target)) == n
+    with pytest.raises(FileExistsError):
+        convert_to_store(SOURCE, target)
+    assert len(SegmentStore(target)) == n
+
+
+def test_convert_overwrite_replaces_data(tmp_path):
+    target = str(tmp_path / "rec.vrs")
+    n = convert_to_store(SOURCE, target)
+    assert convert_to_store(SOURCE, target, overwrite=True) == n
+    assert len(SegmentStore(target)) == n
+    assert sorted(os.listdir(tmp_path)) == ["rec.vrs"]
+    assert not any(name.endswith(".tmp") for name in os.listdir(target))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from resample import CHANNELS
+from spectral import ENERGY_BANDS_HZ, spectral_features
+
+
+@pytest.mark.parametrize("length", [1, 2, 3, 4, 8, 14, 15, 64])
+def test_short_windows(length):
+    rng = np.random.default_rng(length)
+    frames = rng.normal(size=(3, length, len(CHANNELS))).astype(np.float32)
+    features = spectral_features(frames)
+    assert features.dominant_hz.shape == (3, len(CHANNELS))
+    assert features.band_energy.shape == (3, len(CHANNELS), len(ENERGY_BANDS_HZ))
+    for values in (features.dominant_hz, features.entropy, features.step_energy):
+        assert np.all(np.isfinite(values))
+    assert np.all((features.entropy >= 0) & (features.entropy <= 1 + 1e-6))
+
+
+def test_dominant_frequency_of_sine():
+    t = np.arange(256) / 50.0
+    frames = np.repeat(np.sin(2 * np.pi * 2.0 * t)[None, :, None], len(CHANNELS), axis=2)
+    features = spectral_features(frames)
+    assert features.dominant_hz[0, 0] == pytest.approx(2.0, abs=0.2)
+    assert features.step_energy[0, 0] > 0.9
+
+
+@pytest.mark.parametrize("samples", [2, 8, 20])
+def test_short_recording_with_spectral_rule(samples):
+    from hypotesis import analyze_session
+    from session import Session
+
+    records = []
+    for i in range(samples):
+        records.append({"sensorType": "accelerometer", "timestamp": 20 * i, "x": 0.0, "y": 0.0, "z": 9.81})
+        records.append({"sensorType": "gyroscope", "timestamp": 20 * i, "x": 0.0, "y": 0.0, "z": 0.0})
+    assert analyze_session(Session.from_records(records), spectral=True) == "Straight"
+
+
+def test_near_motionless_input_is_not_stairs():
+    from spectral import spectral_label
+
+    # Šibek nihaj v pasu stopnic (2 Hz): razmerje energij kaže na stopnice,
+    # amplituda pa je na ravni šuma mirujočega telefona
+    t = np.arange(256) / 50.0
+    frames = np.repeat((0.005 * np.sin(2 * np.pi * 2.0 * t))[None, :, None], len(CHANNELS), axis=2)
+    assert spectral_label(spectral_features(frames)) is None
+    assert spectral_label(spectral_features(frames * 20)) in ("Up", "Down")
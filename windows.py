@@ -0,0 +1,187 @@
+from collections import deque
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from classifier import classify, classify_accel, classify_batch, decode_labels
+from session import SessionLike, as_session
+
+DEFAULT_WINDOW_S = 2.0
+DEFAULT_HOP_S = 0.5
+MIN_ACCEL_SAMPLES = 2
+MIN_GYRO_SAMPLES = 1
+
+
+class WindowLabels(NamedTuple):
+    start: np.ndarray
+    end: np.ndarray
+    std_z: np.ndarray
+    avg_gyro: np.ndarray
+    labels: np.ndarray
+
+
+class WindowLabel(NamedTuple):
+    start: int
+    end: int
+    std_z: float
+    avg_gyro: float
+    label: str
+
+
+class Segment(NamedTuple):
+    start: int
+    end: int
+    label: str
+
+
+def _prefix_sums(values: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+def window_features(session: SessionLike, window_s: float = DEFAULT_WINDOW_S,
+                    hop_s: float = DEFAULT_HOP_S) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Tekoče vsote (prefiksne vsote) dajo vsako okno v O(1), ne glede na dolžino okna
+    session = as_session(session)
+    accel = session.accelerometer
+    gyro = session.gyroscope
+    window_ms = int(round(window_s * 1000))
+    hop_ms = int(round(hop_s * 1000))
+    if window_ms <= 0 or hop_ms <= 0:
+        raise ValueError("Dolžina okna in korak morata biti pozitivna")
+    if len(accel) == 0:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty.astype(np.int64), empty, empty
+
+    # Brez žiroskopa (telefon objavlja le sensors/accel) je avg_gyro NaN
+    t0 = int(min(accel.timestamp[0], gyro.timestamp[0])) if len(gyro) else int(accel.timestamp[0])
+    t1 = int(max(accel.timestamp[-1], gyro.timestamp[-1])) if len(gyro) else int(accel.timestamp[-1])
+    n_windows = max(1, (t1 - t0 - window_ms) // hop_ms + 1)
+    start = t0 + hop_ms * np.arange(n_windows, dtype=np.int64)
+    end = start + window_ms
+
+    # Premik za prvo vrednost zmanjša izgubo natančnosti pri vsoti kvadratov
+    z = accel.z.astype(np.float64)
+    z -= z[0]
+    cs1 = _prefix_sums(z)
+    cs2 = _prefix_sums(z * z)
+    lo = np.searchsorted(accel.timestamp, start, side="left")
+    hi = np.searchsorted(accel.timestamp, end, side="left")
+    n = hi - lo
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (cs1[hi] - cs1[lo]) / n
+        var = np.maximum((cs2[hi] - cs2[lo]) / n - mean * mean, 0.0)
+    std_z = np.where(n >= MIN_ACCEL_SAMPLES, np.sqrt(var), np.nan)
+
+    cm = _prefix_sums(gyro.magnitude())
+    lo = np.searchsorted(gyro.timestamp, start, side="left")
+    hi = np.searchsorted(gyro.timestamp, end, side="left")
+    n = hi - lo
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_gyro = np.where(n >= MIN_GYRO_SAMPLES, (cm[hi] - cm[lo]) / n, np.nan)
+
+    return start, end, std_z, avg_gyro
+
+
+def classify_windows(session: SessionLike, window_s: float = DEFAULT_WINDOW_S,
+                     hop_s: float = DEFAULT_HOP_S) -> WindowLabels:
+    # Okna brez žiroskopa se razvrstijo le po STD Z (classifier.classify_accel)
+    start, end, std_z, avg_gyro = window_features(session, window_s, hop_s)
+    valid = ~np.isnan(std_z)
+    start, end, std_z, avg_gyro = start[valid], end[valid], std_z[valid], avg_gyro[valid]
+    labels = decode_labels(classify_batch(std_z, np.where(np.isnan(avg_gyro), np.inf, avg_gyro)))
+    return WindowLabels(start, end, std_z, avg_gyro, labels)
+
+
+def segments_from_windows(windows: WindowLabels) -> List[Segment]:
+    # Vsako okno "pokriva" svoj korak okoli središča; zaporedna okna z enako
+    # oznako združimo v en segment.
+    if len(windows.labels) == 0:
+        return []
+    centre = (windows.start + windows.end) // 2
+    half_hop = (centre[1] - centre[0]) // 2 if len(centre) > 1 else (windows.end[0] - windows.start[0]) // 2
+    change = np.flatnonzero(windows.labels[1:] != windows.labels[:-1]) + 1
+    first = np.concatenate(([0], change))
+    last = np.concatenate((change - 1, [len(centre) - 1]))
+    segments = []
+    for i, j in zip(first, last):
+        seg_start = int(windows.start[0]) if i == 0 else int(centre[i] - half_hop)
+        seg_end = int(windows.end[-1]) if j == len(centre) - 1 else int(centre[j] + half_hop)
+        segments.append(Segment(seg_start, seg_end, windows.labels[i]))
+    return segments
+
+
+class SlidingWindowClassifier:
+    # Sprotna različica: vsak vzorec posodobi tekoče vsote v O(1); ob vsakem
+    # koraku vrne oznako za okno [end - window, end).
+    def __init__(self, window_s: float = DEFAULT_WINDOW_S, hop_s: float = DEFAULT_HOP_S):
+        self.window_ms = int(round(window_s * 1000))
+        self.hop_ms = int(round(hop_s * 1000))
+        if self.window_ms <= 0 or self.hop_ms <= 0:
+            raise ValueError("Dolžina okna in korak morata biti pozitivna")
+        self._accel = deque()
+        self._gyro = deque()
+        self._shift = None
+        self._sum_z = 0.0
+        self._sum_z2 = 0.0
+        self._sum_mag = 0.0
+        self._next_end = None
+
+    def _evict(self, before: int) -> None:
+        while self._accel and self._accel[0][0] < before:
+            _, dz = self._accel.popleft()
+            self._sum_z -= dz
+            self._sum_z2 -= dz * dz
+        while self._gyro and self._gyro[0][0] < before:
+            _, mag = self._gyro.popleft()
+            self._sum_mag -= mag
+        if not self._accel:
+            self._sum_z = self._sum_z2 = 0.0
+        if not self._gyro:
+            self._sum_mag = 0.0
+
+    def _emit(self) -> Optional[WindowLabel]:
+        n_accel, n_gyro = len(self._accel), len(self._gyro)
+        if n_accel < MIN_ACCEL_SAMPLES:
+            return None
+        mean = self._sum_z / n_accel
+        std_z = max(self._sum_z2 / n_accel - mean * mean, 0.0) ** 0.5
+        end = self._next_end
+        if n_gyro < MIN_GYRO_SAMPLES:
+            return WindowLabel(end - self.window_ms, end, std_z, float("nan"), classify_accel(std_z))
+        avg_gyro = self._sum_mag / n_gyro
+        return WindowLabel(end - self.window_ms, end, std_z, avg_gyro, classify(std_z, avg_gyro))
+
+    def push(self, sensor_type: str, timestamp: int, x: float, y: float,
+             z: float) -> List[WindowLabel]:
+        timestamp = int(timestamp)
+        if self._next_end is None:
+            self._next_end = timestamp + self.window_ms
+
+        emitted = []
+        while timestamp >= self._next_end:
+            self._evict(self._next_end - self.window_ms)
+            if not self._accel and not self._gyro:
+                # Prazna okna (npr. skok ure) preskočimo v O(1): naslednji konec
+                # na mreži korakov, ki je že za novim vzorcem
+                self._next_end += ((timestamp - self._next_end) // self.hop_ms + 1) * self.hop_ms
+                break
+            result = self._emit()
+            if result is not None:
+                emitted.append(result)
+            self._next_end += self.hop_ms
+
+        if sensor_type == "accelerometer":
+            if self._shift is None:
+                self._shift = float(z)
+            dz = float(z) - self._shift
+            self._accel.append((timestamp, dz))
+            self._sum_z += dz
+            self._sum_z2 += dz * dz
+        elif sensor_type == "gyroscope":
+            mag = (x * x + y * y + z * z) ** 0.5
+            self._gyro.append((timestamp, mag))
+            self._sum_mag += mag
+        return emitted
+